@@ -0,0 +1,36 @@
+"""add outbox table
+
+Revision ID: 9d4f6a2b8e13
+Revises: e7a93b4c20d1
+Create Date: 2026-10-19 21:26:40.915382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f6a2b8e13'
+down_revision = 'e7a93b4c20d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbox',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('tx_id', sa.BigInteger(), server_default=sa.text('txid_current()'), nullable=False),
+    sa.Column('topic', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_tx_id_id', 'outbox', ['tx_id', 'id'], unique=False)
+    op.create_index('ix_outbox_created_at', 'outbox', ['created_at'], unique=False, postgresql_using='brin')
+
+
+def downgrade():
+    op.drop_index('ix_outbox_created_at', table_name='outbox')
+    op.drop_index('ix_outbox_tx_id_id', table_name='outbox')
+    op.drop_table('outbox')
@@ -0,0 +1,42 @@
+"""add post votes count and hot score
+
+Revision ID: a81e5d0c9f3b
+Revises: 3f9a1c2e7b05
+Create Date: 2026-10-19 14:37:02.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a81e5d0c9f3b'
+down_revision = '3f9a1c2e7b05'
+branch_labels = None
+depends_on = None
+
+# models.TRENDING_DECAY_SECONDS when this migration was written
+TRENDING_DECAY_SECONDS = 45000
+
+
+def upgrade():
+    op.add_column('posts', sa.Column('votes_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('posts', sa.Column('hot_score', sa.Float(), nullable=False,
+                  server_default=sa.text(f'extract(epoch from now()) / {TRENDING_DECAY_SECONDS}')))
+    # Existing posts: count their votes once, from then on the vote endpoint keeps both up to date
+    op.execute(f"""
+        UPDATE posts SET
+            votes_count = v.votes,
+            hot_score = log(greatest(v.votes, 1)) + extract(epoch from posts.created_at) / {TRENDING_DECAY_SECONDS}
+        FROM (SELECT posts.id, count(votes.post_id) AS votes
+              FROM posts LEFT OUTER JOIN votes ON votes.post_id = posts.id
+              GROUP BY posts.id) AS v
+        WHERE posts.id = v.id
+    """)
+    op.create_index(op.f('ix_posts_hot_score'), 'posts', ['hot_score'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_posts_hot_score'), table_name='posts')
+    op.drop_column('posts', 'hot_score')
+    op.drop_column('posts', 'votes_count')
@@ -0,0 +1,37 @@
+"""add jobs table
+
+Revision ID: e7a93b4c20d1
+Revises: c52e8b7f1d6a
+Create Date: 2026-10-19 20:03:17.442091
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a93b4c20d1'
+down_revision = 'c52e8b7f1d6a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('run_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('failed_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_due', 'jobs', ['run_at', 'id'], unique=False, postgresql_where=sa.text('failed_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_jobs_due', table_name='jobs')
+    op.drop_table('jobs')
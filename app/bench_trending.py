@@ -0,0 +1,119 @@
+# Benchmark of /posts/trending against computing the ranking from the votes table.
+#
+# Usage: python bench_trending.py [votes]   (default 10M, uses the database in .env)
+#
+# Everything happens in a "bench_trending" schema, dropped at the end.
+import sys
+import time
+import statistics
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+import models, queries
+from database import SQLALCHEMY_DATABASE_URL, connect_args
+
+VOTES = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+USERS = 100_000
+# Votes per post between 1 and 500, log-uniform: mean ~80, a few very popular posts
+POSTS = VOTES // 80
+
+# The ranking without the stored score: aggregate every vote, then sort
+AGGREGATE_TOP = f"""
+    SELECT posts.id, count(votes.post_id) AS votes
+    FROM posts LEFT OUTER JOIN votes ON votes.post_id = posts.id
+    GROUP BY posts.id
+    ORDER BY log(greatest(count(votes.post_id), 1))
+        + extract(epoch from posts.created_at) / {models.TRENDING_DECAY_SECONDS} DESC
+    LIMIT 10
+"""
+
+# Same statement as the migration adding the score
+BACKFILL = f"""
+    UPDATE posts SET
+        votes_count = v.votes,
+        hot_score = log(greatest(v.votes, 1)) + extract(epoch from posts.created_at) / {models.TRENDING_DECAY_SECONDS}
+    FROM (SELECT posts.id, count(votes.post_id) AS votes
+          FROM posts LEFT OUTER JOIN votes ON votes.post_id = posts.id
+          GROUP BY posts.id) AS v
+    WHERE posts.id = v.id
+"""
+
+
+def timed(f, n=1):
+    times = []
+    for i in range(n):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def report(name, seconds):
+    print(f"{name:<45} {seconds * 1000:>12.3f} ms")
+
+
+def main():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL,
+                           connect_args={**connect_args, "options": "-c search_path=bench_trending"})
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP SCHEMA IF EXISTS bench_trending CASCADE")
+        conn.exec_driver_sql("CREATE SCHEMA bench_trending")
+    try:
+        models.Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            load(conn)
+        with engine.connect() as conn:
+            with Session(engine) as session:
+                run(conn.execution_options(isolation_level="AUTOCOMMIT"), session)
+    finally:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP SCHEMA bench_trending CASCADE")
+
+
+def load(conn):
+    print(f"Loading {USERS} users, {POSTS} posts, ~{VOTES} votes...")
+    start = time.perf_counter()
+    conn.exec_driver_sql(f"""
+        INSERT INTO users (email, password) SELECT 'user' || g || '@example.com', 'x' FROM generate_series(1, {USERS}) g
+    """)
+    conn.exec_driver_sql(f"""
+        INSERT INTO posts (title, content, owner_id, created_at)
+        SELECT 'post ' || g, 'content', mod(g, {USERS}) + 1, now() - random() * interval '30 days'
+        FROM generate_series(1, {POSTS}) g
+    """)
+    conn.exec_driver_sql(f"""
+        INSERT INTO votes (post_id, user_id)
+        SELECT posts.id, mod(posts.id * 7919 + g, {USERS}) + 1
+        FROM posts, generate_series(1, floor(500 ^ (mod(posts.id * 7907, 1000) / 1000.0))::int) g
+    """)
+    conn.exec_driver_sql("INSERT INTO users (email, password) SELECT 'voter' || g, 'x' FROM generate_series(1, 1000) g")
+    votes = conn.exec_driver_sql("SELECT count(*) FROM votes").scalar()
+    print(f"Loaded {votes} votes in {time.perf_counter() - start:.1f} s\n")
+
+
+def run(conn, session):
+    conn.exec_driver_sql("ANALYZE")
+    report("top 10 by aggregating the votes", timed(lambda: conn.exec_driver_sql(AGGREGATE_TOP).all(), 3))
+    report("one-off backfill of the scores (migration)", timed(lambda: conn.exec_driver_sql(BACKFILL)))
+    conn.exec_driver_sql("VACUUM ANALYZE posts")
+
+    for limit, skip in [(10, 0), (100, 0), (10, 1000)]:
+        params = {"limit": limit, "skip": skip}
+        report(f"GET /posts/trending?limit={limit}&skip={skip}",
+               timed(lambda: session.execute(queries.get_trending, params).all(), 200))
+    top = session.execute(queries.get_trending, {"limit": 10, "skip": 0}).all()
+    assert [p.Post.id for p in top] == [r.id for r in conn.exec_driver_sql(AGGREGATE_TOP)]
+
+    # The write path of POST /vote: insert the vote and update the post, one transaction each
+    new_votes = [(post_id, USERS + 1 + i % 1000) for i, post_id in enumerate(range(1, POSTS, POSTS // 2000))]
+
+    def vote(post_id, user_id):
+        session.add(models.Votes(post_id=post_id, user_id=user_id))
+        session.execute(queries.update_post_votes, {"post_id": post_id, "delta": 1})
+        session.commit()
+
+    it = iter(new_votes)
+    report("vote + score update, per vote", timed(lambda: vote(*next(it)), len(new_votes)))
+
+
+if __name__ == "__main__":
+    main()
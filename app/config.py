@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseSettings
 
 
@@ -10,6 +12,57 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
+    # Cache server-side prepared statements per connection (needs the vendored psycopg2)
+    database_prepared_statements: bool = False
+    # Login fast-fail / backoff (see login_guard.py)
+    login_max_failures: int = 5
+    login_lockout_seconds: float = 1.0
+    login_max_lockout_seconds: float = 900.0
+    login_guard_max_entries: int = 100000
+    # Per-request SQL profiling (see profiling.py), with the summary at /admin/sql-profile
+    sql_profiling: bool = False
+    sql_profiling_sample_rate: float = 1.0
+    sql_profiling_server_timing: bool = False
+    sql_profiling_window: int = 1000
+    # Home timeline: authors with more followers aren't fanned out on write,
+    # their posts are merged in when the timeline is read
+    timeline_fanout_max_followers: int = 10000
+    # Latest posts copied to the timeline when following someone
+    timeline_backfill: int = 100
+    # Background recount of the post vote counters that drifted (see vote_counts.py), 0 to disable
+    vote_counts_repair_seconds: float = 3600
+    # Write-behind votes (see vote_buffer.py): buffered per worker, written every vote_flush_ms
+    vote_write_behind: bool = False
+    vote_flush_ms: int = 200
+    # Buffered votes waking the flush up early, and answered 503 past the hard max
+    vote_buffer_max: int = 10000
+    vote_buffer_hard_max: int = 50000
+    # Live updates (see realtime.py): NOTIFY on post/vote writes, WebSocket fan-out per worker
+    realtime: bool = False
+    realtime_queue_size: int = 100
+    realtime_max_subscriptions: int = 1000
+    # Server-Sent Events (GET /posts/stream): events kept for Last-Event-ID, keep-alive comment interval
+    realtime_replay_size: int = 1000
+    realtime_keepalive_seconds: float = 15
+    # Vote notifications (see notifications.py): aggregated per post and window, written every flush
+    notification_window_seconds: int = 3600
+    notification_flush_seconds: float = 5
+    # Transactional outbox (see outbox.py): post and vote events written with the change,
+    # relayed to the in-process subscribers (realtime, instead of NOTIFY) every outbox_poll_ms
+    outbox: bool = False
+    outbox_poll_ms: int = 100
+    outbox_batch_size: int = 500
+    outbox_retention_seconds: float = 86400
+    # Background jobs (see jobs.py): workers per web process (0 to run them with "python jobs.py" only)
+    jobs_workers: int = 1
+    jobs_batch_size: int = 100
+    jobs_poll_seconds: float = 1
+    jobs_max_attempts: int = 5
+    jobs_retry_seconds: float = 10
+    # The queue and worker counters at /admin/jobs
+    jobs_metrics: bool = False
+    # Users allowed on the /admin endpoints (JSON list of ids), none registered while empty
+    admin_user_ids: List[int] = []
 
     class Config:
         env_file = ".env"
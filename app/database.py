@@ -1,8 +1,10 @@
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import tempfile
 import time
 from config import settings
 # Connection Using SQLAlchemy
@@ -11,7 +13,18 @@ from config import settings
 SQLALCHEMY_DATABASE_URL = f'postgresql://{settings.database_username}:{settings.database_password}@{settings.database_hostname}:{settings.database_port}/{settings.database_name}'
 
 # Create an Engine: (Responsible for SQLAlchemy to connect to a DB)
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+connect_args = {}
+if settings.database_prepared_statements:
+    # Hot queries are prepared once per connection instead of planned on every execute
+    try:
+        from psycopg2.extras import PreparedStatementConnection
+    except ImportError:
+        raise RuntimeError(
+            "database_prepared_statements needs the psycopg2 of app/psycopg2-2.9.3 "
+            f"(see requirments.txt), psycopg2 {psycopg2.__version__} is installed") from None
+    connect_args["connection_factory"] = PreparedStatementConnection
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -25,6 +38,38 @@ def get_db():
     finally:
         db.close()
 
+# Run statements on the session's psycopg2 connection in pipeline mode: its cursors
+# (e.g. with execute_batch) queue their statements and read all the results at once
+# (without pipeline(), a psycopg2 other than app/psycopg2-2.9.3, they just run one by one)
+@contextmanager
+def pipeline(db):
+    dbapi_conn = db.connection().connection
+    if not hasattr(dbapi_conn, "pipeline"):
+        yield dbapi_conn
+        return
+    with dbapi_conn.pipeline():
+        yield dbapi_conn
+
+# Stream the output of a "COPY ... TO STDOUT" run on the session's psycopg2 connection:
+# chunks of at least `size` bytes read straight from the server (e.g. a StreamingResponse body)
+def copy_iter(db, sql, size=65536):
+    cursor = db.connection().connection.cursor()
+    if hasattr(cursor, "copy_iter"):
+        return cursor.copy_iter(sql, size)
+    return _copy_spooled(cursor, sql, size)
+
+# Without cursor.copy_iter() (a psycopg2 other than app/psycopg2-2.9.3): the whole output
+# is copied first, into a temporary file kept in memory up to 1 MB, then read in chunks
+def _copy_spooled(cursor, sql, size):
+    with tempfile.SpooledTemporaryFile(max_size=2**20) as f:
+        cursor.copy_expert(sql, f, size)
+        f.seek(0)
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                break
+            yield chunk
+
 #Connection using PostGreSQL, {psycopg} A Python driver for PostgreSQL
 
 # while True:
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+import models, queries
+from config import settings
+from database import SessionLocal
+
+# Background jobs, queued in the "jobs" table: no other service to run.
+#
+# Endpoints enqueue() their side effects (timeline fan-out and clean-up, ...) in their own
+# transaction, so a job exists if and only if the change it follows was committed.
+# Workers claim the due jobs in batches (SELECT ... FOR UPDATE SKIP LOCKED, see
+# queries.claim_jobs) and run them in the claiming transaction:
+#   * the jobs of a kind run together: their handler gets all the payloads of the batch,
+#     e.g. to write them with one statement, in a savepoint
+#   * a job is deleted in the transaction doing its work: done exactly once, or not at all
+#     if the worker dies (its locks go with the connection, another worker claims it)
+#   * a failed batch is retried job by job, then a failing job waits settings.jobs_retry_seconds
+#     * 2^attempts before running again; after settings.jobs_max_attempts its row stays with
+#     failed_at and last_error set, for inspection
+# Handlers must be idempotent: a job may run again if its commit is lost.
+#
+# Workers run in the web processes (settings.jobs_workers per process), or on their own:
+#   python jobs.py [workers]
+# with jobs_workers=0 for the web processes. GET /admin/jobs shows the queue and the
+# counters of the process answering it.
+
+logger = logging.getLogger(__name__)
+
+# kind -> handler(db, payloads)
+handlers = {}
+
+
+def handler(kind: str):
+    def register(f):
+        handlers[kind] = f
+        return f
+    return register
+
+
+def enqueue(db, kind: str, **payload):
+    """Add a job to the session's transaction: it runs once the transaction is committed."""
+    db.add(models.Job(kind=kind, payload=payload))
+
+
+class JobStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # kind -> [done, retried, failed, batches, seconds]
+        self._kinds = {}
+
+    def add(self, kind: str, done=0, retried=0, failed=0, seconds=0.0):
+        with self._lock:
+            entry = self._kinds.setdefault(kind, [0, 0, 0, 0, 0.0])
+            entry[0] += done
+            entry[1] += retried
+            entry[2] += failed
+            entry[3] += 1
+            entry[4] += seconds
+
+    def summary(self):
+        with self._lock:
+            kinds = {kind: list(entry) for kind, entry in self._kinds.items()}
+        return [{
+            "kind": kind,
+            "done": done,
+            "retried": retried,
+            "failed": failed,
+            "batches": batches,
+            "mean_batch_ms": seconds / batches * 1000,
+        } for kind, (done, retried, failed, batches, seconds) in sorted(kinds.items())]
+
+
+stats = JobStats()
+
+
+def run_batch(size: int):
+    """Claim and run up to size due jobs, returns how many were claimed."""
+    with SessionLocal() as db:
+        jobs = db.execute(queries.claim_jobs, {"limit": size}).all()
+        kinds = {}
+        for job in jobs:
+            kinds.setdefault(job.kind, []).append(job)
+        for kind, batch in kinds.items():
+            _run(db, kind, batch)
+        db.commit()
+    return len(jobs)
+
+
+def _run(db, kind, batch):
+    start = time.perf_counter()
+    try:
+        with db.begin_nested():
+            handlers[kind](db, [job.payload for job in batch])
+    except Exception as exc:
+        if len(batch) > 1:
+            # Don't let one job hold the others back
+            for job in batch:
+                _run(db, kind, [job])
+            return
+        logger.warning("Job %s (%s) failed: %r", batch[0].id, kind, exc)
+        failed = db.execute(queries.retry_jobs, {
+            "ids": [batch[0].id], "error": repr(exc), "retry_seconds": settings.jobs_retry_seconds,
+            "max_attempts": settings.jobs_max_attempts,
+        }).scalar()
+        stats.add(kind, retried=not failed, failed=failed, seconds=time.perf_counter() - start)
+    else:
+        db.execute(queries.delete_jobs, {"ids": [job.id for job in batch]})
+        stats.add(kind, done=len(batch), seconds=time.perf_counter() - start)
+
+
+async def work_forever(poll_interval: float, batch_size: int):
+    while True:
+        try:
+            claimed = await run_in_threadpool(run_batch, batch_size)
+        except Exception:
+            logger.exception("Job batch failed, retrying")
+            claimed = 0
+        # A full batch: there may be more waiting
+        if claimed < batch_size:
+            await asyncio.sleep(poll_interval)
+
+
+# Handlers
+
+@handler("fanout_post")
+def fanout_posts(db, payloads):
+    # payloads: post_id
+    db.execute(queries.fanout_post, payloads)
+
+
+@handler("backfill_timeline")
+def backfill_timelines(db, payloads):
+    # payloads: follower_id, followee_id, limit
+    db.execute(queries.backfill_timeline, payloads)
+
+
+@handler("backfill_followers")
+def backfill_followers(db, payloads):
+    # payloads: followee_id, limit
+    db.execute(queries.backfill_followers, payloads)
+
+
+@handler("unfollow_timeline")
+def unfollow_timelines(db, payloads):
+    # payloads: follower_id, followee_id
+    db.execute(queries.unfollow_timeline, payloads)
+
+
+async def main(workers: int):
+    tasks = [asyncio.create_task(work_forever(settings.jobs_poll_seconds, settings.jobs_batch_size))
+             for _ in range(workers)]
+    try:
+        while True:
+            await asyncio.sleep(60)
+            for kind in stats.summary():
+                logger.info("%s", kind)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4))
+    except KeyboardInterrupt:
+        pass
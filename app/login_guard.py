@@ -0,0 +1,98 @@
+import time
+import threading
+from collections import OrderedDict
+
+import utils
+from config import settings
+
+# In-memory fast-fail state for /login (per worker process): a failure counter
+# per email with exponential backoff, so hopeless attempts are rejected before
+# the DB or bcrypt is touched.
+#
+# Unknown emails and real accounts go through the SAME failure counter and
+# the SAME backoff schedule, and the SAME path otherwise: the users lookup, then
+# a bcrypt verify (against a dummy hash for an unknown email). That way response
+# codes and timings look identical whether or not the account exists (no user
+# enumeration). There is deliberately no cache of unknown emails: it would answer
+# faster than the lookup, and it couldn't follow signups handled by other workers.
+
+_dummy_hash = None
+
+
+def _get_dummy_hash():
+    # Computed lazily: hashing at import time would slow down every worker start
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = utils.hash("not-a-real-password")
+    return _dummy_hash
+
+
+def burn_verify(plain_password: str):
+    # Spend the same CPU as a real password check, result is always discarded
+    utils.verify(plain_password, _get_dummy_hash())
+
+
+class LoginGuard:
+    def __init__(self, max_failures: int, lockout_seconds: float, max_lockout_seconds: float,
+                 max_entries: int):
+        self.max_failures = max_failures
+        self.lockout_seconds = lockout_seconds
+        self.max_lockout_seconds = max_lockout_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # email -> [failures, locked_until, last_failure]
+        self._failures = OrderedDict()
+
+    @staticmethod
+    def _key(email: str):
+        # Exact match, same as the users.email lookup it stands in for
+        return email
+
+    def retry_after(self, email: str):
+        """Seconds the caller has to wait before trying this email again, 0 if allowed."""
+        key = self._key(email)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._failures.get(key)
+            if entry is None:
+                return 0
+            remaining = entry[1] - now
+            return remaining if remaining > 0 else 0
+
+    def forget(self, email: str):
+        # Called when an account is created: failures from before it existed don't count
+        key = self._key(email)
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def record_failure(self, email: str):
+        key = self._key(email)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._failures.get(key)
+            if entry is None or now - entry[2] > self.max_lockout_seconds:
+                # Counter decays once the account has been quiet for a full max lockout
+                entry = [0, 0.0, now]
+            entry[0] += 1
+            entry[2] = now
+            over = entry[0] - self.max_failures
+            if over >= 0:
+                entry[1] = now + min(self.lockout_seconds * (2 ** over), self.max_lockout_seconds)
+            self._failures[key] = entry
+            self._failures.move_to_end(key)
+            while len(self._failures) > self.max_entries:
+                self._failures.popitem(last=False)
+
+    def record_success(self, email: str):
+        key = self._key(email)
+        with self._lock:
+            self._failures.pop(key, None)
+
+
+login_guard = LoginGuard(
+    max_failures=settings.login_max_failures,
+    lockout_seconds=settings.login_lockout_seconds,
+    max_lockout_seconds=settings.login_max_lockout_seconds,
+    max_entries=settings.login_guard_max_entries,
+)
@@ -1,7 +1,14 @@
+import asyncio
 from fastapi import FastAPI
-import models
+import models, vote_counts, jobs
+from realtime import hub
+from outbox import relay
+from notifications import notification_buffer, flush_forever as flush_notifications_forever
+from vote_buffer import vote_buffer, flush_forever
 from database import engine
-from routers import posts, users, auth, vote
+from routers import posts, users, auth, vote, follow, updates, admin, notifications
+from config import settings
+import profiling
 from fastapi.middleware.cors import CORSMiddleware
 
 #Command that tells SQLAlchemy to run the create statement so that it generates all of the tables when it starts up
@@ -25,6 +32,60 @@ app.include_router(posts.router)
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(vote.router)
+app.include_router(follow.router)
+app.include_router(notifications.router)
+if settings.realtime:
+    app.include_router(updates.router)
+
+if settings.sql_profiling:
+    profiling.install(engine)
+    app.add_middleware(
+        profiling.SQLProfilingMiddleware,
+        sample_rate=settings.sql_profiling_sample_rate,
+        server_timing=settings.sql_profiling_server_timing,
+    )
+
+# Admin endpoints: none without an allow-list
+if settings.admin_user_ids:
+    if settings.sql_profiling:
+        app.include_router(admin.profiling_router)
+    if settings.jobs_metrics:
+        app.include_router(admin.jobs_router)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if settings.vote_counts_repair_seconds:
+        # Keep a reference, the event loop only holds a weak one
+        app.state.vote_counts_repair = asyncio.create_task(
+            vote_counts.repair_forever(settings.vote_counts_repair_seconds))
+    if settings.vote_write_behind:
+        app.state.vote_buffer_flush = asyncio.create_task(flush_forever(settings.vote_flush_ms / 1000))
+    if settings.outbox:
+        app.state.outbox_relay = asyncio.create_task(relay.relay_forever(settings.outbox_poll_ms / 1000))
+    if settings.realtime:
+        hub.start()
+    app.state.notification_flush = asyncio.create_task(
+        flush_notifications_forever(settings.notification_flush_seconds))
+    app.state.job_workers = [asyncio.create_task(jobs.work_forever(settings.jobs_poll_seconds, settings.jobs_batch_size))
+                             for _ in range(settings.jobs_workers)]
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    if settings.vote_counts_repair_seconds:
+        app.state.vote_counts_repair.cancel()
+    if settings.vote_write_behind:
+        app.state.vote_buffer_flush.cancel()
+        # The server stopped taking requests: write the votes still buffered
+        vote_buffer.flush()
+    if settings.realtime:
+        hub.stop()
+    if settings.outbox:
+        app.state.outbox_relay.cancel()
+    app.state.notification_flush.cancel()
+    notification_buffer.flush()
+    # A batch still running finishes in its thread, or is rolled back with its connection
+    for worker in app.state.job_workers:
+        worker.cancel()
 
 @app.get("/")
 def root():
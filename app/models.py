@@ -1,9 +1,16 @@
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Float, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from database import Base
 
+# Trending ("hot") score of a post: log10(votes) + created_at / TRENDING_DECAY_SECONDS,
+# so 10x the votes are worth as much as being 12.5h newer. Both terms only change
+# with a vote, the score is updated with the vote count (see queries.update_post_votes).
+# Changing the constant needs the stored scores recomputed (see the trending migration).
+TRENDING_DECAY_SECONDS = 45000
+
 class Post(Base):
     __tablename__ = "posts"
 
@@ -13,9 +20,16 @@ class Post(Base):
     published = Column(Boolean, server_default= 'TRUE')
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    votes_count = Column(Integer, nullable=False, server_default= '0')
+    # now() is the transaction timestamp, the same as created_at's
+    hot_score = Column(Float, nullable=False, index=True,
+                       server_default= text(f'extract(epoch from now()) / {TRENDING_DECAY_SECONDS}'))
 
     owner = relationship("User")
 
+    # Latest posts of an author, for the home timeline fan-out on read (see queries.get_home)
+    __table_args__ = (Index("ix_posts_owner_id_id", "owner_id", "id"),)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key= True, nullable=False)
@@ -23,8 +37,84 @@ class User(Base):
     password = Column(String, nullable = False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
     phone_number = Column(String)
-    
+    # Kept by the follow endpoints, decides between fan-out on write and on read.
+    # Indexed: the few accounts past the threshold are looked up on each home timeline read
+    followers_count = Column(Integer, nullable = False, server_default= '0', index = True)
+    # Unread notifications, a counter kept with their rows (see notifications.py)
+    unread_notifications = Column(Integer, nullable = False, server_default= '0')
+
 class Votes(Base):
     __tablename__ = "votes"
     post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key = True, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key = True, nullable=False)
\ No newline at end of file
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key = True, nullable=False)
+
+class Follow(Base):
+    __tablename__ = "follows"
+    follower_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key = True, nullable=False)
+    followee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key = True, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
+
+    # Followers of a user, index-only scanned by the fan-out
+    __table_args__ = (Index("ix_follows_followee_id_follower_id", "followee_id", "follower_id"),)
+
+class Timeline(Base):
+    # Home timeline rows, written when a followed user posts (fan-out on write).
+    # Post ids grow with time: the primary key is the timeline order.
+    __tablename__ = "timelines"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key = True, nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key = True, nullable=False, index = True)
+
+class Notification(Base):
+    # One row per recipient, post and time window: "<count> people liked your post"
+    __tablename__ = "notifications"
+    id = Column(Integer, primary_key = True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)
+    window_start = Column(TIMESTAMP(timezone=True), nullable=False)
+    count = Column(Integer, nullable=False)
+    read = Column(Boolean, nullable=False, server_default= 'FALSE')
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
+
+    __table_args__ = (
+        # The inbox pages
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # The row new events of the window add to, as long as it's unread
+        Index("ix_notifications_unread_window", "user_id", "post_id", "kind", "window_start",
+              unique=True, postgresql_where=text("NOT read")),
+    )
+
+class Job(Base):
+    # Background job queue (see jobs.py): a row per job, deleted once done
+    __tablename__ = "jobs"
+    id = Column(BigInteger, primary_key = True, nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    run_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
+    attempts = Column(Integer, nullable=False, server_default= '0')
+    last_error = Column(String)
+    # Set once out of attempts: kept for inspection, never run again
+    failed_at = Column(TIMESTAMP(timezone=True))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
+
+    __table_args__ = (
+        # What the workers claim: the due jobs, oldest first
+        Index("ix_jobs_due", "run_at", "id", postgresql_where=text("failed_at IS NULL")),
+    )
+
+class OutboxEvent(Base):
+    # Post and vote events, written in the transaction making the change (see outbox.py)
+    __tablename__ = "outbox"
+    id = Column(BigInteger, primary_key = True, nullable=False)
+    # The writing transaction: the relay reads the rows of the finished ones only
+    tx_id = Column(BigInteger, nullable=False, server_default= text('txid_current()'))
+    topic = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default= text('now()') )
+
+    __table_args__ = (
+        Index("ix_outbox_tx_id_id", "tx_id", "id"),
+        # Append only: a BRIN index is enough to prune the old rows
+        Index("ix_outbox_created_at", "created_at", postgresql_using="brin"),
+    )
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from starlette.concurrency import run_in_threadpool
+
+import queries
+from config import settings
+from database import SessionLocal
+
+# Notifications: "<count> people liked your post", one row per post and time window.
+#
+# A vote only counts +1 for its post in memory (add()); a background task writes the
+# counts every settings.notification_flush_seconds, in one transaction:
+#   * one upsert for all the posts: the count goes to the post owner's unread row of the
+#     current window (settings.notification_window_seconds), or starts a new one. Once read,
+#     the next events of the window start a new row.
+#   * one UPDATE of the users' unread counters, for the rows that are new
+# so a viral post costs a statement per flush, not a row per vote.
+#
+# users.unread_notifications counts the unread rows and is kept with them: incremented in
+# the flush inserting them, decremented by the request marking them read (routers/notifications.py),
+# so GET /notifications never counts. Like the write-behind votes, the counts buffered in a
+# killed worker are lost (a clean shutdown flushes them); a failed flush is retried with the next one.
+
+logger = logging.getLogger(__name__)
+
+VOTE = "vote"
+
+
+class NotificationBuffer:
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        # One flush at a time, so a failed batch is requeued before the next one
+        self._flush_lock = threading.Lock()
+        # post_id -> votes since the last flush
+        self._votes = Counter()
+
+    def add(self, post_id: int):
+        """Count a vote on the post for its owner's notifications."""
+        with self._lock:
+            self._votes[post_id] += 1
+
+    def window_start(self, now: datetime):
+        timestamp = now.timestamp()
+        return datetime.fromtimestamp(timestamp - timestamp % self.window_seconds, timezone.utc)
+
+    def flush(self):
+        """Write the buffered counts, returns how many posts got notifications."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._votes:
+                    return 0
+                batch, self._votes = self._votes, Counter()
+            try:
+                self._write(batch)
+            except Exception:
+                with self._lock:
+                    self._votes.update(batch)
+                raise
+            return len(batch)
+
+    def _write(self, batch):
+        post_ids = sorted(batch)
+        with SessionLocal() as db:
+            rows = db.execute(queries.upsert_notifications, {
+                "kind": VOTE, "window_start": self.window_start(datetime.now(timezone.utc)),
+                "post_ids": post_ids, "counts": [batch[post_id] for post_id in post_ids],
+            }).all()
+            unread = Counter(user_id for user_id, inserted in rows if inserted)
+            if unread:
+                user_ids = sorted(unread)
+                db.execute(queries.update_unread_notifications,
+                           {"user_ids": user_ids, "deltas": [unread[user_id] for user_id in user_ids]})
+            db.commit()
+
+
+notification_buffer = NotificationBuffer(settings.notification_window_seconds)
+
+
+async def flush_forever(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(notification_buffer.flush)
+        except Exception:
+            logger.exception("Notification flush failed, retrying with the next one")
@@ -5,7 +5,7 @@ from fastapi import Depends, status, HTTPException
 from fastapi.security.oauth2 import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-import schemas, database, models
+import schemas, database, models, queries
 from config import settings
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -47,6 +47,12 @@ def get_current_user(token: str = Depends(oauth_scheme), db: Session = Depends(d
 
     token = verify_access_token(token, credentials_exception)
 
-    user = db.query(models.User).filter(models.User.id == token.id).first()
+    user = db.execute(queries.get_user, {"id": token.id}).scalars().first()
 
     return user
+
+
+def get_admin_user(current_user = Depends(get_current_user)):
+    if current_user is None or current_user.id not in settings.admin_user_ids:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+    return current_user
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+import queries
+from config import settings
+from database import SessionLocal
+
+# Transactional outbox (enabled with settings.outbox).
+#
+# The post and vote endpoints record their events (realtime.notify_post(), notify_votes())
+# as rows of the "outbox" table, in the transaction making the change: an event exists
+# if and only if its change was committed, and costs the writer an INSERT, nothing more.
+#
+# Each worker process runs a Relay tailing the table in batches and handing the events to
+# its in-process subscribers (realtime.hub, ...), on the event loop:
+#   * rows are read in (transaction id, id) order, only once every transaction before them
+#     is finished (see queries.read_outbox): a row committed late is never skipped
+#   * the position is kept in memory: a relay starts at the tail, and keeps its place
+#     across database errors (nothing is lost while it retries)
+#   * rows older than settings.outbox_retention_seconds are deleted
+# A long-running transaction delays the events committed after it started, until it ends.
+
+logger = logging.getLogger(__name__)
+
+
+def record(db, events):
+    """Add the events (dicts with a "type") to the session's transaction."""
+    db.execute(queries.insert_outbox, {
+        "topics": [event["type"] for event in events],
+        "payloads": [json.dumps(event) for event in events],
+    })
+
+
+class Relay:
+    def __init__(self, batch_size: int, retention_seconds: float):
+        self.batch_size = batch_size
+        self.retention_seconds = retention_seconds
+        # callback(payload), payload being the event's JSON
+        self._subscribers = []
+        # (tx_id, id) of the last row read, None until started
+        self._position = None
+        self._pruned = 0.0
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def fetch(self):
+        """The next batch of payloads."""
+        with SessionLocal() as db:
+            if self._position is None:
+                self._position = tuple(db.execute(queries.outbox_tail).first() or (0, 0))
+            rows = db.execute(queries.read_outbox, {
+                "after_tx_id": self._position[0], "after_id": self._position[1], "limit": self.batch_size,
+            }).all()
+            if time.monotonic() - self._pruned > 60:
+                self._pruned = time.monotonic()
+                try:
+                    db.execute(queries.prune_outbox, {"seconds": self.retention_seconds})
+                    db.commit()
+                except Exception:
+                    # Not losing the rows just read
+                    logger.exception("Pruning the outbox failed")
+        if rows:
+            self._position = (rows[-1].tx_id, rows[-1].id)
+        return [row.payload for row in rows]
+
+    def publish(self, payloads):
+        for payload in payloads:
+            for callback in self._subscribers:
+                try:
+                    callback(payload)
+                except Exception:
+                    logger.exception("Outbox subscriber %r failed", callback)
+
+    async def relay_forever(self, interval: float):
+        while True:
+            try:
+                payloads = await run_in_threadpool(self.fetch)
+            except Exception:
+                logger.exception("Reading the outbox failed, retrying")
+                payloads = []
+            self.publish(payloads)
+            # A full batch: there may be more waiting
+            if len(payloads) < self.batch_size:
+                await asyncio.sleep(interval)
+
+
+relay = Relay(settings.outbox_batch_size, settings.outbox_retention_seconds)
@@ -0,0 +1,151 @@
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from config import settings
+
+# Per-request SQL profiling (enabled with settings.sql_profiling).
+#
+# SQLProfilingMiddleware opens a RequestProfile for a sampled fraction of the
+# requests; the SQLAlchemy cursor events count the statements, DB time and rows
+# into the profile of the request running them. The profile object is shared
+# through a ContextVar: the threadpool running the sync endpoints and
+# dependencies copies the context, so they see the same object.
+# Requests that aren't sampled only pay for a ContextVar lookup per statement.
+
+_current_profile = ContextVar("sql_profile", default=None)
+
+
+class RequestProfile:
+    __slots__ = ("statements", "db_time", "rows")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+
+    def server_timing(self):
+        return f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} statements"'
+
+
+class RouteStats:
+    def __init__(self, window: int):
+        self.window = window
+        # "METHOD /path/{template}" -> total requests, deque of the last `window`
+        # (duration, db_time, statements, rows)
+        self._routes = {}
+
+    def add(self, route: str, profile: RequestProfile, duration: float):
+        # Only called from the event loop thread
+        entry = self._routes.get(route)
+        if entry is None:
+            entry = self._routes[route] = [0, deque(maxlen=self.window)]
+        entry[0] += 1
+        entry[1].append((duration, profile.db_time, profile.statements, profile.rows))
+
+    def summary(self):
+        rv = []
+        for route, (total, samples) in list(self._routes.items()):
+            samples = list(samples)
+            n = len(samples)
+            db_times = sorted(s[1] for s in samples)
+            duration = sum(s[0] for s in samples)
+            db_time = sum(db_times)
+            rv.append({
+                "route": route,
+                "requests": total,
+                "window": n,
+                "mean_ms": duration / n * 1000,
+                "db_mean_ms": db_time / n * 1000,
+                "db_p95_ms": db_times[min(n - 1, int(n * 0.95))] * 1000,
+                "db_share": db_time / duration if duration else 0.0,
+                "statements_mean": sum(s[2] for s in samples) / n,
+                "rows_mean": sum(s[3] for s in samples) / n,
+            })
+        # Routes costing the most DB time first
+        rv.sort(key=lambda r: r["db_mean_ms"] * r["window"], reverse=True)
+        return rv
+
+    def reset(self):
+        self._routes = {}
+
+
+route_stats = RouteStats(settings.sql_profiling_window)
+# Statement shapes (SQLAlchemy's compiled SQL, so already parametrized) of the sampled
+# requests, a psycopg2.extras.QueryStats created by install()
+query_stats = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is None:
+        return
+    elapsed = time.perf_counter() - context._profile_start
+    rows = cursor.rowcount
+    if rows < 0:
+        rows = 0
+    profile.statements += 1
+    profile.db_time += elapsed
+    profile.rows += rows
+    query_stats.record(statement, elapsed, rows=rows)
+
+
+def install(engine):
+    # QueryStats comes with the psycopg2 built from app/psycopg2-2.9.3: only needed
+    # (and imported) with profiling on
+    global query_stats
+    from psycopg2.extras import QueryStats
+    query_stats = QueryStats()
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLProfilingMiddleware:
+    # Plain ASGI middleware: no extra task per request as with BaseHTTPMiddleware,
+    # and streamed response bodies keep running inside the profile
+    def __init__(self, app, sample_rate: float = 1.0, server_timing: bool = False):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.server_timing = server_timing
+        # endpoint function -> path template, filled from the app routes on first use
+        self._paths = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", profile.server_timing().encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing if self.server_timing else send)
+        finally:
+            _current_profile.reset(token)
+            route = self._route(scope)
+            if route is not None:
+                route_stats.add(route, profile, time.perf_counter() - start)
+
+    def _route(self, scope):
+        # The router stores the matched endpoint in the scope; unmatched requests aren't tracked
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return None
+        if self._paths is None:
+            self._paths = {r.endpoint: r.path for r in scope["app"].routes if hasattr(r, "endpoint")}
+        return f'{scope["method"]} {self._paths.get(endpoint, endpoint.__name__)}'
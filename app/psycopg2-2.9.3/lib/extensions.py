@@ -51,7 +51,7 @@ from psycopg2._psycopg import (                             # noqa
     adapt, adapters, encodings, connection, cursor,
     lobject, Xid, libpq_version, parse_dsn, quote_ident,
     string_types, binary_types, new_type, new_array_type, register_type,
-    ISQLQuote, Notify, Diagnostics, Column, ConnectionInfo,
+    ISQLQuote, Notify, Diagnostics, Column, ConnectionInfo, CopyIterator,
     QueryCanceledError, TransactionRollbackError,
     set_wait_callback, get_wait_callback, encrypt_password, )
 
@@ -92,6 +92,12 @@ TRANSACTION_STATUS_INERROR = 3
 TRANSACTION_STATUS_UNKNOWN = 4
 
 
+"""Connection pipeline mode status values."""
+PIPELINE_STATUS_OFF = 0
+PIPELINE_STATUS_ON = 1
+PIPELINE_STATUS_ABORTED = 2
+
+
 def register_adapter(typ, callable):
     """Register 'callable' as an ISQLQuote adapter for type 'typ'."""
     adapters[(typ, ISQLQuote)] = callable
@@ -135,6 +141,36 @@ class NoneAdapter:
         return _null
 
 
+class Pipeline:
+    """Context manager running a connection in pipeline mode.
+
+    Returned by `connection.pipeline()`: on exit the results of the queries
+    still in the pipeline are read and the connection leaves pipeline mode.
+    """
+    def __init__(self, conn):
+        self.connection = conn
+
+    def __enter__(self):
+        self.connection.enter_pipeline()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.connection.exit_pipeline()
+            return
+
+        # Don't mask the error raised in the block with the ones in the
+        # pipeline results.
+        try:
+            self.connection.exit_pipeline()
+        except Exception:
+            pass
+
+    def sync(self):
+        """Wait for the results of the queries sent so far."""
+        self.connection.pipeline_sync()
+
+
 def make_dsn(dsn=None, **kwargs):
     """Convert a set of keywords into a connection strings."""
     if dsn is None and not kwargs:
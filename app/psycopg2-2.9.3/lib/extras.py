@@ -29,11 +29,20 @@ and classes until a better place in the distribution is found.
 import os as _os
 import time as _time
 import re as _re
+import struct as _struct
+import datetime as _datetime
+import uuid as _uuid
+import threading as _threading
+from bisect import bisect_left as _bisect_left
+from random import random as _random
+from itertools import islice as _islice
 from collections import namedtuple, OrderedDict
+from collections.abc import Mapping as _Mapping
 
 import logging as _logging
 
 import psycopg2
+import psycopg2.errors
 from psycopg2 import extensions as _ext
 from .extensions import cursor as _cursor
 from .extensions import connection as _connection
@@ -281,6 +290,117 @@ class RealDictRow(OrderedDict):
         super().__setitem__(key, value)
 
 
+class CompactDictConnection(_connection):
+    """A connection that uses `CompactDictCursor` automatically."""
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault(
+            'cursor_factory', self.cursor_factory or CompactDictCursor)
+        return super().cursor(*args, **kwargs)
+
+
+class CompactDictCursor(_cursor):
+    """A cursor returning read-only mappings from column name to value.
+
+    The records behave like the ones returned by `RealDictCursor` but, instead
+    of a dict per row, they only store the tuple of values and a reference to
+    a name -> position index shared by all the records of the same result,
+    which makes them faster to create and much smaller in memory.
+    """
+    _index = None
+
+    def execute(self, query, vars=None):
+        self._index = None
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars):
+        self._index = None
+        return super().executemany(query, vars)
+
+    def callproc(self, procname, vars=None):
+        self._index = None
+        return super().callproc(procname, vars)
+
+    def fetchone(self):
+        t = super().fetchone()
+        if t is not None:
+            return CompactDictRow(self._get_index(), t)
+
+    def fetchmany(self, size=None):
+        ts = super().fetchmany(size)
+        index = self._get_index()
+        return [CompactDictRow(index, t) for t in ts]
+
+    def fetchall(self):
+        ts = super().fetchall()
+        index = self._get_index()
+        return [CompactDictRow(index, t) for t in ts]
+
+    def __iter__(self):
+        try:
+            it = super().__iter__()
+            t = next(it)
+            index = self._get_index()
+
+            yield CompactDictRow(index, t)
+
+            while True:
+                yield CompactDictRow(index, next(it))
+        except StopIteration:
+            return
+
+    def _get_index(self):
+        index = self._index
+        if index is None:
+            index = self._index = {
+                d[0]: i for i, d in enumerate(self.description or ())}
+        return index
+
+
+class CompactDictRow(_Mapping):
+    """A read-only mapping representing a data record.
+
+    Iterating on the record, or calling `!keys()`, returns the column names,
+    as for `RealDictRow`. The values are also available as a tuple in the
+    `!values_tuple` attribute.
+    """
+
+    __slots__ = ('_index', 'values_tuple')
+
+    def __init__(self, index, values):
+        self._index = index
+        self.values_tuple = values
+
+    def __getitem__(self, key):
+        return self.values_tuple[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __eq__(self, other):
+        if isinstance(other, CompactDictRow):
+            return (self._index == other._index
+                and self.values_tuple == other.values_tuple)
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def copy(self):
+        """Return the record as a new `!dict`."""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.copy()!r})"
+
+    def __reduce__(self):
+        return type(self), (self._index, self.values_tuple)
+
+
 class NamedTupleConnection(_connection):
     """A connection that uses `NamedTupleCursor` automatically."""
     def cursor(self, *args, **kwargs):
@@ -497,6 +617,453 @@ class MinTimeLoggingCursor(LoggingCursor):
         return LoggingCursor.callproc(self, procname, vars)
 
 
+class QueryStats:
+    """Latency and size statistics of queries, grouped by query fingerprint.
+
+    The statistics are collected by the cursors of a `StatsConnection`: the
+    same object can be shared by several connections, e.g. all the ones in a
+    pool, and by several threads. Only a `sample_rate` fraction of the
+    queries is measured. At most `maxsize` fingerprints are tracked: the
+    executions of queries beyond them are only counted in `dropped`.
+
+    Times are in milliseconds, histogram buckets are bounded by the values
+    in `buckets`.
+    """
+    buckets = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+               1000, 2500, 5000, 10000)
+
+    def __init__(self, sample_rate=1.0, maxsize=1000):
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self.maxsize = maxsize
+        self._lock = _threading.Lock()
+        self._fingerprints = {}
+        self.reset()
+
+    def reset(self):
+        """Discard the statistics collected so far."""
+        with self._lock:
+            self._entries = {}
+            self.dropped = 0
+
+    def sampled(self):
+        """Return `!True` if the next query should be measured."""
+        return self.sample_rate >= 1 or _random() < self.sample_rate
+
+    def fingerprint(self, query):
+        """Return the normalized form of *query* its statistics are grouped by.
+
+        Literal strings and numbers are replaced by ``?``, lists of them or
+        of parenthesized groups (e.g. the rows of a :sql:`VALUES` list) are
+        shortened to their first item and whitespace is collapsed. The
+        result is cached.
+        """
+        fp = self._fingerprints.get(query)
+        if fp is None:
+            if len(self._fingerprints) >= self.maxsize * 10:
+                self._fingerprints.clear()
+            fp = self._fingerprints[query] = _fingerprint_query(query)
+        return fp
+
+    def record(self, query, elapsed, rows=0, bytes_sent=0, bytes_received=0):
+        """Record an execution of *query* taking *elapsed* seconds."""
+        fp = self.fingerprint(query)
+        ms = elapsed * 1000.0
+        bucket = _bisect_left(self.buckets, ms)
+        with self._lock:
+            entry = self._entries.get(fp)
+            if entry is None:
+                if len(self._entries) >= self.maxsize:
+                    self.dropped += 1
+                    return
+                entry = self._entries[fp] = _QueryStatsEntry(
+                    len(self.buckets) + 1)
+            entry.calls += 1
+            entry.total_time += ms
+            if ms > entry.max_time:
+                entry.max_time = ms
+            entry.rows += rows
+            entry.bytes_sent += bytes_sent
+            entry.bytes_received += bytes_received
+            entry.histogram[bucket] += 1
+
+    def top(self, n=10, key='total_time'):
+        """Return the statistics of the *n* fingerprints with the highest *key*.
+
+        Return a list of dicts with keys ``query`` (the fingerprint),
+        ``calls``, ``total_time``, ``mean_time``, ``max_time``, ``p50``,
+        ``p95``, ``p99`` (estimated from the histogram), ``rows``,
+        ``bytes_sent``, ``bytes_received`` and ``histogram`` (the count of
+        executions in each bucket, the last one above the last bound). If
+        *n* is `!None` return all the fingerprints.
+        """
+        with self._lock:
+            entries = [(fp, e.copy()) for fp, e in self._entries.items()]
+        rv = [self._summary(fp, e) for fp, e in entries]
+        rv.sort(key=lambda s: s[key], reverse=True)
+        return rv if n is None else rv[:n]
+
+    def _summary(self, fp, entry):
+        return {
+            'query': fp,
+            'calls': entry.calls,
+            'total_time': entry.total_time,
+            'mean_time': entry.total_time / entry.calls,
+            'max_time': entry.max_time,
+            'p50': self._percentile(entry, 0.50),
+            'p95': self._percentile(entry, 0.95),
+            'p99': self._percentile(entry, 0.99),
+            'rows': entry.rows,
+            'bytes_sent': entry.bytes_sent,
+            'bytes_received': entry.bytes_received,
+            'histogram': entry.histogram,
+        }
+
+    def _percentile(self, entry, q):
+        threshold = q * entry.calls
+        count = 0
+        for bound, n in zip(self.buckets, entry.histogram):
+            count += n
+            if count >= threshold:
+                return min(bound, entry.max_time)
+        return entry.max_time
+
+
+class _QueryStatsEntry:
+    __slots__ = ('calls', 'total_time', 'max_time', 'rows',
+                 'bytes_sent', 'bytes_received', 'histogram')
+
+    def __init__(self, nbuckets):
+        self.calls = self.rows = self.bytes_sent = self.bytes_received = 0
+        self.total_time = self.max_time = 0.0
+        self.histogram = [0] * nbuckets
+
+    def copy(self):
+        rv = _QueryStatsEntry(0)
+        for attr in self.__slots__:
+            setattr(rv, attr, getattr(self, attr))
+        rv.histogram = self.histogram[:]
+        return rv
+
+
+_re_fingerprint = _re.compile(r"""
+      (?P<str> (?:(?<!\w)[eE])? '(?:[^']|'')*' )        # string literal
+    | (?P<num> (?<![\w$.]) [-+]? \d+ (?:\.\d*)? (?:[eE][-+]?\d+)? \b )
+    | (?P<ws> \s+ )
+    """, _re.VERBOSE)
+_re_fingerprint_lists = _re.compile(
+    r'(\([^()]*\)|\?)(?:\s*,\s*(?:\([^()]*\)|\?))+')
+
+
+def _fingerprint_query(query):
+    if isinstance(query, bytes):
+        query = query.decode('utf8', 'replace')
+    fp = _re_fingerprint.sub(
+        lambda m: ' ' if m.lastgroup == 'ws' else '?', query).strip()
+    return _re_fingerprint_lists.sub(r'\1, ...', fp)
+
+
+class StatsConnection(_connection):
+    """A connection recording latency and size statistics of its queries.
+
+    The statistics are collected into the `QueryStats` object passed to
+    `initialize()`, which must be called before creating cursors.
+
+    Note that this connection uses the specialized cursor `StatsCursor`.
+    """
+
+    def initialize(self, stats):
+        """Initialize the connection to record into the *stats* object."""
+        self._stats = stats
+
+    def cursor(self, *args, **kwargs):
+        if not hasattr(self, '_stats'):
+            raise self.ProgrammingError(
+                "StatsConnection object has not been initialize()d")
+        kwargs.setdefault('cursor_factory', self.cursor_factory or StatsCursor)
+        return super().cursor(*args, **kwargs)
+
+
+class StatsCursor(_cursor):
+    """The cursor sub-class companion to `StatsConnection`.
+
+    Measure the time spent in `execute()`, `executemany()` and `callproc()`,
+    the number of rows returned or affected, the size of the query sent and
+    the size of the result received. Queries executed in pipeline mode are
+    not measured, as their result is not available at the end of
+    `!execute()`.
+    """
+
+    def execute(self, query, vars=None):
+        stats = getattr(self.connection, '_stats', None)
+        if stats is None or not stats.sampled():
+            return super().execute(query, vars)
+        t0 = _time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(stats, query, _time.perf_counter() - t0)
+
+    def executemany(self, query, vars_list):
+        stats = getattr(self.connection, '_stats', None)
+        if stats is None or not stats.sampled():
+            return super().executemany(query, vars_list)
+        t0 = _time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(stats, query, _time.perf_counter() - t0)
+
+    def callproc(self, procname, vars=None):
+        stats = getattr(self.connection, '_stats', None)
+        if stats is None or not stats.sampled():
+            return super().callproc(procname, vars)
+        t0 = _time.perf_counter()
+        try:
+            return super().callproc(procname, vars)
+        finally:
+            self._record(stats, procname, _time.perf_counter() - t0)
+
+    def _record(self, stats, query, elapsed):
+        if self.connection.info.pipeline_status:
+            return
+        if not isinstance(query, (str, bytes)):
+            query = self.query or b''
+        stats.record(
+            query, elapsed,
+            rows=max(self.rowcount, 0),
+            bytes_sent=len(self.query or b''),
+            bytes_received=(
+                self.pgresult_size or 0 if _has_pgresult_size else 0))
+
+
+_has_pgresult_size = psycopg2.__libpq_version__ >= 120000
+
+
+class PreparedStatementConnection(_connection):
+    """A connection caching server-side prepared statements for its queries.
+
+    Queries executed at least `prepare_threshold` times are prepared on the
+    server with :sql:`PREPARE` and then run with :sql:`EXECUTE`, so Postgres
+    doesn't parse and plan them again on every execution. At most
+    `prepared_max` statements are kept per connection: the least recently
+    used ones are deallocated. Both attributes can be changed on the instance.
+
+    The cache is keyed on the query text as passed to `~cursor.execute()`,
+    before arguments are merged, so the query must use placeholders (not
+    string formatting) to be reused. Only :sql:`SELECT`, :sql:`INSERT`,
+    :sql:`UPDATE`, :sql:`DELETE`, :sql:`VALUES` and :sql:`WITH` statements are
+    prepared; everything else, and statements the server refuses to prepare,
+    are executed normally.
+
+    Arguments are still adapted by Psycopg and passed to :sql:`EXECUTE` as
+    literals, but the parameters types are decided by :sql:`PREPARE` from the
+    query context, not from the arguments, and the :sql:`EXECUTE` literals are
+    then cast to them. So placeholders whose type can't be inferred (e.g.
+    ``SELECT %s``) are treated as :sql:`text`, and an argument of a different
+    type than its context is converted: a float compared with an
+    :sql:`integer` column is rounded to an integer, whereas without
+    preparation the comparison is numeric and may select different rows. Use
+    an explicit cast in the query (e.g. ``WHERE id = %s::numeric``) where the
+    arguments types may differ from the context. The other visible difference
+    is `cursor.query` showing the :sql:`EXECUTE` statement.
+
+    Note that this connection uses the specialized cursor
+    `PreparedStatementCursor`.
+    """
+    prepare_threshold = 5
+    prepared_max = 100
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # key -> (statement name, argument names or count, EXECUTE sql)
+        self._prepared = OrderedDict()
+        # key -> number of executions seen, -1 if it can't be prepared
+        self._prepare_counts = OrderedDict()
+        self._deallocate = []
+        self._prepared_seq = 0
+
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory',
+            self.cursor_factory or PreparedStatementCursor)
+        return super().cursor(*args, **kwargs)
+
+    def clear_prepared(self):
+        """Forget all the prepared statements and deallocate them on the server.
+        """
+        self._prepared.clear()
+        self._prepare_counts.clear()
+        self._deallocate = []
+        if not self.closed and self.info.transaction_status in (
+                _ext.TRANSACTION_STATUS_IDLE, _ext.TRANSACTION_STATUS_INTRANS):
+            with _cursor(self) as curs:
+                curs.execute("DEALLOCATE ALL")
+
+    def _get_prepared(self, curs, query, vars):
+        """Return the prepared statement for *query*, preparing it if due.
+
+        Return `!None` if the query must be executed normally.
+        """
+        key = (query, isinstance(vars, dict))
+        stmt = self._prepared.get(key)
+        if stmt is not None:
+            self._prepared.move_to_end(key)
+            return stmt
+
+        count = self._prepare_counts.get(key, 0)
+        if count < 0:
+            return None
+        count += 1
+        self._prepare_counts[key] = count
+        self._prepare_counts.move_to_end(key)
+        if len(self._prepare_counts) > self.prepared_max * 10:
+            self._prepare_counts.popitem(last=False)
+        if count < self.prepare_threshold:
+            return None
+
+        # Don't try to prepare in a failed transaction: the query will fail.
+        if self.info.transaction_status == _ext.TRANSACTION_STATUS_INERROR:
+            return None
+
+        parsed = _prepare_sql(query, vars)
+        if parsed is None:
+            self._prepare_counts[key] = -1
+            return None
+        sql, names = parsed
+
+        self._prepared_seq += 1
+        name = f"_psycopg2_{self._prepared_seq}"
+        nargs = names if isinstance(names, int) else len(names)
+        exec_sql = f"EXECUTE {name}"
+        if nargs:
+            exec_sql += f" ({', '.join(['%s'] * nargs)})"
+
+        cmds = [f"DEALLOCATE {n}" for n in self._deallocate]
+        cmds.append(f"PREPARE {name} AS {sql}")
+        if not self.autocommit:
+            # A failed PREPARE would abort the user's transaction.
+            cmds.insert(0, "SAVEPOINT _psycopg2_prepare")
+            cmds.append("RELEASE SAVEPOINT _psycopg2_prepare")
+        try:
+            _cursor.execute(curs, ";".join(cmds))
+        except psycopg2.DatabaseError as e:
+            if not self.autocommit:
+                _cursor.execute(curs,
+                    "ROLLBACK TO SAVEPOINT _psycopg2_prepare;"
+                    "RELEASE SAVEPOINT _psycopg2_prepare")
+            # The statements stop at the error: the DEALLOCATEs before it ran
+            # (and aren't undone by the rollback), the ones after it didn't.
+            self._deallocate = self._still_prepared(curs, self._deallocate)
+            if not isinstance(e, psycopg2.errors.InvalidSqlStatementName):
+                # The PREPARE failed, not a DEALLOCATE
+                self._prepare_counts[key] = -1
+            return None
+        self._deallocate = []
+
+        stmt = self._prepared[key] = (name, names, exec_sql)
+        del self._prepare_counts[key]
+        while len(self._prepared) > self.prepared_max:
+            _, (old, _, _) = self._prepared.popitem(last=False)
+            self._deallocate.append(old)
+        return stmt
+
+
+    @staticmethod
+    def _still_prepared(curs, names):
+        """Return the statements among *names* still prepared on the server."""
+        if not names:
+            return []
+        _cursor.execute(curs,
+            "SELECT name FROM pg_prepared_statements WHERE name = ANY(%s)",
+            (names,))
+        found = {row[0] for row in _cursor.fetchall(curs)}
+        return [n for n in names if n in found]
+
+
+class PreparedStatementCursor(_cursor):
+    """The cursor sub-class companion to `PreparedStatementConnection`."""
+
+    def execute(self, query, vars=None):
+        conn = self.connection
+        if self.name is not None or not isinstance(
+                conn, PreparedStatementConnection):
+            return super().execute(query, vars)
+
+        from psycopg2.sql import Composable
+        if isinstance(query, Composable):
+            query = query.as_string(self)
+        elif isinstance(query, bytes):
+            query = query.decode(_ext.encodings[conn.encoding])
+
+        stmt = conn._get_prepared(self, query, vars)
+        if stmt is None:
+            return super().execute(query, vars)
+
+        name, names, exec_sql = stmt
+        if isinstance(names, int):
+            if vars is not None and len(vars) != names:
+                # let the normal path raise the appropriate error
+                return super().execute(query, vars)
+            args = tuple(vars) if names else None
+        else:
+            args = tuple(vars[n] for n in names)
+        try:
+            return super().execute(exec_sql, args)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Statements were dropped behind our back (e.g. DISCARD ALL).
+            conn._prepared.clear()
+            raise
+
+
+_re_placeholder = _re.compile(r'%(?:\(([^)]*)\))?(.)', _re.DOTALL)
+_re_preparable = _re.compile(
+    r'\s*(?:select|insert|update|delete|values|with)\b', _re.IGNORECASE)
+
+
+def _prepare_sql(query, vars):
+    """Convert a query with Python placeholders into one with $n parameters.
+
+    Return ``(sql, names)``, where *names* is the list of the mapping keys in
+    parameters order if *vars* is a mapping, else the number of parameters.
+    Return `!None` if the query can't be prepared.
+    """
+    if not _re_preparable.match(query):
+        return None
+
+    # Like cursor.execute(): no placeholder processing without arguments.
+    if vars is None:
+        return query, 0
+
+    named = isinstance(vars, dict)
+    names = {}
+    count = 0
+    parts = []
+    pos = 0
+    for m in _re_placeholder.finditer(query):
+        parts.append(query[pos:m.start()])
+        pos = m.end()
+        key, conv = m.groups()
+        if conv == '%' and key is None:
+            parts.append('%')
+        elif conv != 's':
+            return None
+        elif key is None:
+            if named:
+                return None
+            count += 1
+            parts.append(f'${count}')
+        else:
+            if not named:
+                return None
+            if key not in names:
+                names[key] = len(names) + 1
+            parts.append(f'${names[key]}')
+    parts.append(query[pos:])
+
+    return ''.join(parts), list(names) if named else count
+
+
 class LogicalReplicationConnection(_replicationConnection):
 
     def __init__(self, *args, **kwargs):
@@ -774,6 +1341,77 @@ def wait_select(conn):
             continue
 
 
+async def wait_asyncio(conn):
+    """Wait, without blocking the event loop, until an async connection is ready.
+
+    To be awaited after connecting with ``async_=True`` and after each
+    `~cursor.execute()` on such a connection. The connection file
+    descriptor is watched using :py:meth:`~asyncio.loop.add_reader()` and
+    :py:meth:`~asyncio.loop.add_writer()`. If the waiting task is cancelled
+    the running query is cancelled too.
+    """
+    import asyncio
+    from psycopg2.extensions import POLL_OK, POLL_READ, POLL_WRITE
+
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == POLL_OK:
+            return
+        elif state == POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise conn.OperationalError(f"bad state from poll: {state}")
+
+        fd = conn.fileno()
+        ready = loop.create_future()
+        add(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        except asyncio.CancelledError:
+            if not conn.closed and conn.isexecuting():
+                conn.cancel()
+            raise
+        finally:
+            remove(fd)
+
+
+
+async def copy_iter_asyncio(cur, sql, size=8192):
+    """Stream the data of a :sql:`COPY TO` on an async connection.
+
+    Asynchronous generator version of `~cursor.copy_iter()`: yield the data
+    as `!bytes` chunks, waiting for them without blocking the event loop.
+    If the generator is closed before the end of the data the COPY is
+    cancelled.
+    """
+    import asyncio
+
+    conn = cur.connection
+    loop = asyncio.get_running_loop()
+    it = cur.copy_iter(sql, size)
+    try:
+        await wait_asyncio(conn)
+        while True:
+            data = it.read()
+            if data is None:
+                return
+            elif data:
+                yield data
+                continue
+
+            fd = conn.fileno()
+            ready = loop.create_future()
+            loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+            try:
+                await ready
+            finally:
+                loop.remove_reader(fd)
+    finally:
+        it.close()
+
 def _solve_conn_curs(conn_or_curs):
     """Return the connection and a DBAPI cursor from a connection or cursor."""
     if conn_or_curs is None:
@@ -1181,13 +1819,24 @@ def execute_batch(cur, sql, argslist, page_size=100):
     After the execution of the function the `cursor.rowcount` property will
     **not** contain a total result.
 
+    If the connection is in :ref:`pipeline mode <pipeline-mode>` the
+    statements are sent one by one, without waiting for their results.
+
     """
+    if cur.connection.info.pipeline_status:
+        # multiple statements can't be sent in pipeline mode, but each one
+        # only costs a roundtrip at the end of the pipeline
+        for args in argslist:
+            cur.execute(sql, args)
+        return
+
     for page in _paginate(argslist, page_size=page_size):
         sqls = [cur.mogrify(sql, args) for args in page]
         cur.execute(b";".join(sqls))
 
 
-def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False):
+def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False,
+        page_bytes=None, copy_threshold=None):
     '''Execute a statement using :sql:`VALUES` with a sequence of parameters.
 
     :param cur: the cursor to use to execute the query.
@@ -1222,6 +1871,20 @@ def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False
         `~cursor.fetchall()`).  Useful for queries with :sql:`RETURNING`
         clause.
 
+    :param page_bytes: if specified, size the pages by the length of the
+        generated statement instead of by number of rows: the first page
+        contains *page_size* items, the following ones as many items as fit
+        in about *page_bytes* bytes, estimated from the rows already sent.
+
+    :param copy_threshold: if specified, and *argslist* is a sequence of at
+        least *copy_threshold* sequences, load the data using `copy_rows()`
+        instead. This only happens if *sql* is a plain
+        ``INSERT INTO table [(columns)] VALUES %s``, *template* and *fetch*
+        are not specified, all the columns types are supported by
+        `!copy_rows()` and all the values are of the exact Python types it
+        takes (checked before sending anything); otherwise the function
+        behaves as usual, so both paths store the same data.
+
     .. __: https://www.postgresql.org/docs/current/static/queries-values.html
 
     After the execution of the function the `cursor.rowcount` property will
@@ -1251,6 +1914,13 @@ def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False
     if isinstance(sql, Composable):
         sql = sql.as_string(cur)
 
+    if (copy_threshold is not None and template is None and not fetch
+            and hasattr(argslist, '__len__')
+            and len(argslist) >= copy_threshold
+            and not isinstance(argslist[0], dict)):
+        if _execute_values_copy(cur, sql, argslist):
+            return None
+
     # we can't just use sql % vals because vals is bytes: if sql is bytes
     # there will be some decoding error because of stupid codec used, and Py3
     # doesn't implement % on bytes.
@@ -1259,7 +1929,11 @@ def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False
     pre, post = _split_sql(sql)
 
     result = [] if fetch else None
-    for page in _paginate(argslist, page_size=page_size):
+    it = iter(argslist)
+    while True:
+        page = list(_islice(it, page_size))
+        if not page:
+            break
         if template is None:
             template = b'(' + b','.join([b'%s'] * len(page[0])) + b')'
         parts = pre[:]
@@ -1267,13 +1941,297 @@ def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False
             parts.append(cur.mogrify(template, args))
             parts.append(b',')
         parts[-1:] = post
-        cur.execute(b''.join(parts))
+        query = b''.join(parts)
+        cur.execute(query)
         if fetch:
             result.extend(cur.fetchall())
+        if page_bytes:
+            # size the next page on the average length of the rows so far
+            page_size = max(1, page_bytes * len(page) // len(query))
 
     return result
 
 
+def _execute_values_copy(cur, sql, argslist):
+    """Try to run `execute_values()` as a binary COPY.
+
+    Return `!False` if it's not possible: not a simple insert, a column type
+    not supported, or a value not of the exact Python type its column's
+    encoder takes (e.g. a `!str` for a :sql:`timestamp`, a tz-aware datetime
+    for a :sql:`timestamp`, which the server would convert to the session
+    time zone). At most the column types have been queried then, no data has
+    been sent.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode(_ext.encodings[cur.connection.encoding])
+    target = _parse_simple_insert(sql)
+    if target is None:
+        return False
+    table, cols_sql, attnames = target
+    oids = _copy_oids(cur, table, attnames)
+    if oids is None or not _copy_accepts(oids, argslist):
+        return False
+    _copy_binary(cur, table, cols_sql, _copy_encoders(cur, oids), argslist,
+        65536)
+    return True
+
+
+def copy_rows(cur, table, rows, columns=None, size=65536):
+    '''Insert *rows* into *table* using :sql:`COPY FROM STDIN` in binary format.
+
+    :param cur: the cursor to use to execute the query.
+
+    :param table: the name of the table to load. It is quoted: use a
+        `psycopg2.sql.Identifier` to specify a schema-qualified table.
+
+    :param rows: an iterable of sequences with a value for each column.
+
+    :param columns: the names of the columns in *rows* (all the table columns
+        if not specified).
+
+    :param size: the size of the chunks of data sent to the server.
+
+    Values are encoded in Python straight into PostgreSQL binary format,
+    according to the type of the target columns. The types supported are
+    :sql:`bool`, :sql:`int2`, :sql:`int4`, :sql:`int8`, :sql:`float4`,
+    :sql:`float8`, :sql:`text`, :sql:`varchar`, :sql:`bpchar`, :sql:`json`,
+    :sql:`jsonb` (as already serialized strings), :sql:`bytea`, :sql:`date`,
+    :sql:`timestamp` (requiring naive datetimes), :sql:`timestamptz`
+    (requiring tz-aware datetimes) and :sql:`uuid`:
+    `~psycopg2.NotSupportedError` is raised, before sending any data, if
+    other types are found.
+
+    Unlike with an :sql:`INSERT`, the values are not adapted and the server
+    doesn't convert them: they must be of the exact Python type of their
+    column (`!bool`; `!int` for the integers; `!float` or `!int` for the
+    floats; `!str` for the text and json types; `!bytes` for :sql:`bytea`;
+    `~datetime.date`, not `~datetime.datetime`, for :sql:`date`;
+    `~uuid.UUID`). A value of another type aborts the copy.
+    '''
+    from psycopg2.sql import Composable, Identifier
+    if not isinstance(table, Composable):
+        table = Identifier(table)
+    table = table.as_string(cur)
+    if columns is not None:
+        cols_sql = [Identifier(c).as_string(cur) for c in columns]
+    else:
+        cols_sql = None
+
+    oids = _copy_oids(cur, table, columns)
+    if oids is None:
+        raise psycopg2.NotSupportedError(
+            "can't copy into %s in binary format: unsupported column type"
+            % table)
+    _copy_binary(cur, table, cols_sql, _copy_encoders(cur, oids), rows, size)
+
+
+def _copy_oids(cur, table, attnames):
+    """Return the types oids of the *attnames* columns of *table*.
+
+    Return `!None` if any of the columns types is not supported.
+    """
+    cur.execute("""\
+SELECT attname, atttypid FROM pg_attribute
+WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+ORDER BY attnum""", (table,))
+    types = cur.fetchall()
+    if attnames is None:
+        attnames = [t[0] for t in types]
+    types = dict(types)
+
+    rv = []
+    for name in attnames:
+        oid = types.get(name)
+        if oid is None:
+            raise psycopg2.ProgrammingError(
+                f"column {name!r} of {table} does not exist")
+        if oid not in _copy_encoders_by_oid:
+            return None
+        rv.append(oid)
+    return rv
+
+
+def _copy_encoders(cur, oids):
+    """Return the binary encoders for columns of types *oids*."""
+    encoding = _ext.encodings[cur.connection.encoding]
+    rv = []
+    for oid in oids:
+        enc = _copy_encoders_by_oid[oid][1]
+        rv.append(enc(encoding) if oid in _copy_text_oids else enc)
+    return rv
+
+
+def _copy_accepts(oids, rows):
+    """Return `!True` if the *rows* values are all of their column's type."""
+    types = [_copy_encoders_by_oid[oid][0] for oid in oids]
+    # datetimes: aware or naive as the column requires
+    tzcols = [(i, _copy_tz_oids[oid]) for i, oid in enumerate(oids)
+        if oid in _copy_tz_oids]
+    n = len(oids)
+    for row in rows:
+        if len(row) != n:
+            return False
+        for t, v in zip(types, row):
+            if v is not None and type(v) not in t:
+                return False
+        for i, aware in tzcols:
+            v = row[i]
+            if v is not None and (v.tzinfo is not None) != aware:
+                return False
+    return True
+
+
+def _copy_binary(cur, table, cols_sql, encoders, rows, size):
+    sql = f"COPY {table}"
+    if cols_sql is not None:
+        sql += f" ({', '.join(cols_sql)})"
+    sql += " FROM STDIN (FORMAT binary)"
+    cur.copy_expert(sql, _CopyBinaryReader(rows, encoders), size)
+
+
+class _CopyBinaryReader:
+    """File-like object generating the binary COPY data for some rows.
+
+    Every `!read()` returns a new `!bytearray`, which psycopg sends to the
+    server without copying it into a `!bytes`.
+    """
+    _header = b'PGCOPY\n\xff\r\n\x00' + _struct.pack('!ii', 0, 0)
+    _trailer = b'\xff\xff'
+    _null = b'\xff\xff\xff\xff'
+
+    def __init__(self, rows, encoders):
+        self._rows = iter(rows)
+        self._encoders = encoders
+        self._nfields = _struct.pack('!h', len(encoders))
+        self._started = False
+        self._done = False
+
+    def read(self, size=-1):
+        if self._done:
+            return b''
+        buf = bytearray()
+        if not self._started:
+            buf += self._header
+            self._started = True
+
+        null = self._null
+        nfields = self._nfields
+        encoders = self._encoders
+        nenc = len(encoders)
+        for row in self._rows:
+            if len(row) != nenc:
+                raise ValueError(
+                    f"expected {nenc} values per row, got {len(row)}")
+            buf += nfields
+            for enc, v in zip(encoders, row):
+                buf += null if v is None else enc(v)
+            if len(buf) >= size > 0:
+                return buf
+
+        buf += self._trailer
+        self._done = True
+        return buf
+
+
+_PG_EPOCH_DATE = _datetime.date(2000, 1, 1)
+_PG_EPOCH = _datetime.datetime(2000, 1, 1)
+_PG_EPOCH_TZ = _datetime.datetime(2000, 1, 1, tzinfo=_datetime.timezone.utc)
+
+
+def _micros(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _enc_timestamp(v):
+    if v.tzinfo is not None:
+        raise ValueError("timestamp columns require naive datetimes")
+    return _struct.pack('!iq', 8, _micros(v - _PG_EPOCH))
+
+
+def _enc_timestamptz(v):
+    if v.tzinfo is None:
+        raise ValueError("timestamptz columns require tz-aware datetimes")
+    return _struct.pack('!iq', 8, _micros(v - _PG_EPOCH_TZ))
+
+
+def _enc_text(encoding):
+    def enc_text(v):
+        b = v.encode(encoding)
+        return _struct.pack('!i', len(b)) + b
+    return enc_text
+
+
+def _enc_jsonb(encoding):
+    def enc_jsonb(v):
+        b = v.encode(encoding)
+        return _struct.pack('!ib', len(b) + 1, 1) + b
+    return enc_jsonb
+
+
+def _enc_bytea(v):
+    return _struct.pack('!i', len(v)) + bytes(v)
+
+
+# The text encoders depend on the connection encoding.
+_copy_text_oids = {25, 114, 1042, 1043, 3802}
+
+# Datetime columns: True if they require tz-aware values, False naive ones.
+_copy_tz_oids = {1114: False, 1184: True}
+
+# oid -> (exact Python types accepted, encoder)
+_copy_encoders_by_oid = {
+    16: ((bool,),
+        lambda v: b'\x00\x00\x00\x01\x01' if v else b'\x00\x00\x00\x01\x00'),
+    17: ((bytes, bytearray, memoryview), _enc_bytea),
+    20: ((int,), lambda v, _p=_struct.Struct('!iq').pack: _p(8, v)),
+    21: ((int,), lambda v, _p=_struct.Struct('!ih').pack: _p(2, v)),
+    23: ((int,), lambda v, _p=_struct.Struct('!ii').pack: _p(4, v)),
+    25: ((str,), _enc_text),
+    114: ((str,), _enc_text),
+    700: ((float, int), lambda v, _p=_struct.Struct('!if').pack: _p(4, v)),
+    701: ((float, int), lambda v, _p=_struct.Struct('!id').pack: _p(8, v)),
+    1042: ((str,), _enc_text),
+    1043: ((str,), _enc_text),
+    1082: ((_datetime.date,),
+        lambda v: _struct.pack('!ii', 4, (v - _PG_EPOCH_DATE).days)),
+    1114: ((_datetime.datetime,), _enc_timestamp),
+    1184: ((_datetime.datetime,), _enc_timestamptz),
+    2950: ((_uuid.UUID,), lambda v: b'\x00\x00\x00\x10' + v.bytes),
+    3802: ((str,), _enc_jsonb),
+}
+
+
+_re_simple_insert = _re.compile(r'''
+    \s* insert \s+ into \s+
+    ( (?: "(?:[^"]|"")+" | [^\s("]+ ) )        # table, maybe qualified
+    \s* (?: \( ([^)]*) \) )? \s*                # column list
+    values \s* %s \s* ;? \s* $
+    ''', _re.IGNORECASE | _re.VERBOSE)
+
+
+def _parse_simple_insert(sql):
+    """Return table and columns of an ``INSERT INTO t (cols) VALUES %s``.
+
+    Return `!None` if the statement is anything more complex.
+    """
+    m = _re_simple_insert.match(sql)
+    if m is None:
+        return None
+    table, cols = m.groups()
+    if cols is None:
+        return table, None, None
+    cols_sql = [c.strip() for c in cols.split(',')]
+    attnames = []
+    for c in cols_sql:
+        if c.startswith('"') and c.endswith('"'):
+            attnames.append(c[1:-1].replace('""', '"'))
+        elif c.replace('_', '').isalnum():
+            attnames.append(c.lower())
+        else:
+            return None
+    return table, cols_sql, attnames
+
+
 def _split_sql(sql):
     """Split *sql* on a single ``%s`` placeholder.
 
@@ -25,6 +25,8 @@ This module implements thread-safe (and not) connection pools.
 # FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
 # License for more details.
 
+import time as _time
+
 import psycopg2
 from psycopg2 import extensions as _ext
 
@@ -185,3 +187,562 @@ class ThreadedConnectionPool(AbstractConnectionPool):
             self._closeall()
         finally:
             self._lock.release()
+
+
+class ManagedConnectionPool(ThreadedConnectionPool):
+    """A threaded pool that waits for connections and keeps them healthy.
+
+    Unlike `ThreadedConnectionPool`, `getconn()` blocks until a connection is
+    returned to the pool if *maxconn* connections are already in use. Idle
+    connections are kept up to *maxconn* and reused most recent first.
+
+    Connections older than *max_lifetime* seconds are closed instead of being
+    reused; idle connections exceeding *minconn* are closed after *max_idle*
+    seconds. If *check_interval* is set, a background thread checks the idle
+    connections every *check_interval* seconds, discarding the ones that
+    fail a ping (e.g. after a database restart) and topping the pool up to
+    *minconn* connections.
+    """
+
+    def __init__(self, minconn, maxconn, *args, max_lifetime=3600.0,
+            max_idle=600.0, check_interval=None, **kwargs):
+        """Initialize the pool and start the health check thread."""
+        import threading
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+
+        self._created = {}      # id(conn) -> creation time
+        self._idle_since = {}   # id(conn) -> time returned to the pool
+        self._connecting = 0
+        self._stats = dict.fromkeys((
+            'requests', 'hits', 'creations', 'waits', 'wait_time',
+            'timeouts', 'discarded', 'ping_failures'), 0)
+
+        ThreadedConnectionPool.__init__(
+            self, minconn, maxconn, *args, **kwargs)
+        self._cond = threading.Condition(self._lock)
+
+        self._stop = threading.Event()
+        self._checker = None
+        if check_interval:
+            self._checker = threading.Thread(
+                target=self._run_checks, name='psycopg2-pool-check',
+                daemon=True)
+            self._checker.start()
+
+    def _connect(self, key=None):
+        """Create a new connection and assign it to 'key' if not None."""
+        conn = AbstractConnectionPool._connect(self, key)
+        now = _time.monotonic()
+        self._created[id(conn)] = now
+        if key is None:
+            self._idle_since[id(conn)] = now
+        self._stats['creations'] += 1
+        return conn
+
+    def _forget(self, conn):
+        self._created.pop(id(conn), None)
+        self._idle_since.pop(id(conn), None)
+
+    def _discard(self, conn):
+        self._forget(conn)
+        self._stats['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn, now):
+        if conn.closed:
+            return True
+        if self.max_lifetime is not None:
+            if now - self._created.get(id(conn), now) > self.max_lifetime:
+                return True
+        return False
+
+    def _size(self):
+        return len(self._pool) + len(self._used) + self._connecting
+
+    def getconn(self, key=None, timeout=None):
+        """Get a free connection and assign it to 'key' if not None.
+
+        If the pool is exhausted wait up to *timeout* seconds (forever if
+        `!None`) for a connection to be returned, then raise `PoolError`.
+        """
+        with self._cond:
+            if self.closed:
+                raise PoolError("connection pool is closed")
+            if key is None:
+                key = self._getkey()
+            if key in self._used:
+                return self._used[key]
+
+            self._stats['requests'] += 1
+            deadline = None if timeout is None else _time.monotonic() + timeout
+            waited = None
+            while True:
+                now = _time.monotonic()
+                while self._pool:
+                    conn = self._pool.pop()
+                    if self._expired(conn, now):
+                        self._discard(conn)
+                        continue
+                    self._idle_since.pop(id(conn), None)
+                    self._used[key] = conn
+                    self._rused[id(conn)] = key
+                    self._stats['hits'] += 1
+                    self._end_wait(waited)
+                    return conn
+
+                if self._size() < self.maxconn:
+                    break
+
+                if waited is None:
+                    waited = now
+                    self._stats['waits'] += 1
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    self._end_wait(waited)
+                    raise PoolError("connection pool exhausted")
+                self._cond.wait(remaining)
+                if self.closed:
+                    raise PoolError("connection pool is closed")
+
+            # Connect without holding the lock: it may take a while.
+            self._end_wait(waited)
+            self._connecting += 1
+
+        try:
+            conn = psycopg2.connect(*self._args, **self._kwargs)
+        except BaseException:
+            with self._cond:
+                self._connecting -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._connecting -= 1
+            if self.closed:
+                conn.close()
+                raise PoolError("connection pool is closed")
+            self._created[id(conn)] = _time.monotonic()
+            self._stats['creations'] += 1
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+            return conn
+
+    def _end_wait(self, waited):
+        if waited is not None:
+            self._stats['wait_time'] += _time.monotonic() - waited
+
+    def putconn(self, conn=None, key=None, close=False):
+        """Put away an unused connection.
+
+        A connection in a transaction is rolled back without holding the pool
+        lock; it still counts towards *maxconn* in the meantime.
+        """
+        with self._cond:
+            if self.closed:
+                raise PoolError("connection pool is closed")
+
+            if key is None:
+                key = self._rused.get(id(conn))
+                if key is None:
+                    raise PoolError("trying to put unkeyed connection")
+
+            del self._used[key]
+            del self._rused[id(conn)]
+
+            if (close or self._expired(conn, _time.monotonic())
+                    or conn.info.transaction_status
+                    == _ext.TRANSACTION_STATUS_UNKNOWN):
+                # closing, or server connection lost
+                self._discard(conn)
+                self._cond.notify()
+                return
+            if conn.info.transaction_status == _ext.TRANSACTION_STATUS_IDLE:
+                self._idle_since[id(conn)] = _time.monotonic()
+                self._pool.append(conn)
+                self._cond.notify()
+                return
+            self._connecting += 1
+
+        # connection in error or in transaction
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            ok = False
+        else:
+            ok = True
+
+        with self._cond:
+            self._connecting -= 1
+            if self.closed:
+                conn.close()
+                return
+            if ok:
+                self._idle_since[id(conn)] = _time.monotonic()
+                self._pool.append(conn)
+            else:
+                self._discard(conn)
+            self._cond.notify()
+
+    def closeall(self):
+        """Close all connections (even the one currently in use.)"""
+        with self._cond:
+            self._stop.set()
+            self._closeall()
+            self._created.clear()
+            self._idle_since.clear()
+            self._cond.notify_all()
+
+    def get_stats(self):
+        """Return a dict with the pool counters and current size."""
+        with self._cond:
+            rv = dict(self._stats)
+            rv['pool_size'] = self._size()
+            rv['pool_available'] = len(self._pool)
+            rv['pool_used'] = len(self._used)
+            return rv
+
+    def check(self):
+        """Check the idle connections, discarding the expired and broken ones.
+
+        Connections are pinged without holding the pool lock: the ones being
+        checked are not available to `getconn()` in the meantime.
+        """
+        with self._cond:
+            if self.closed:
+                return
+            now = _time.monotonic()
+            keep = len(self._used) + self._connecting
+            tocheck = []
+            # The pool is used as a stack: the oldest idle are at the start.
+            for conn in self._pool:
+                if self._expired(conn, now):
+                    self._discard(conn)
+                elif (self.max_idle is not None and keep >= self.minconn
+                        and now - self._idle_since.get(id(conn), now)
+                        > self.max_idle):
+                    self._discard(conn)
+                else:
+                    tocheck.append(conn)
+                    keep += 1
+            self._pool = []
+            self._connecting += len(tocheck)
+
+        good = []
+        for conn in tocheck:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                if not conn.autocommit:
+                    conn.rollback()
+            except psycopg2.Error:
+                with self._cond:
+                    self._stats['ping_failures'] += 1
+                    self._discard(conn)
+            else:
+                good.append(conn)
+
+        with self._cond:
+            self._connecting -= len(tocheck)
+            if self.closed:
+                for conn in good:
+                    conn.close()
+                return
+            # Put them back below the connections returned in the meantime.
+            self._pool[:0] = good
+            self._cond.notify(len(tocheck))
+            missing = self.minconn - self._size()
+            self._connecting += max(missing, 0)
+
+        for i in range(missing):
+            try:
+                conn = psycopg2.connect(*self._args, **self._kwargs)
+            except psycopg2.Error:
+                with self._cond:
+                    self._connecting -= missing - i
+                break
+            with self._cond:
+                self._connecting -= 1
+                if self.closed:
+                    conn.close()
+                    continue
+                now = _time.monotonic()
+                self._created[id(conn)] = now
+                self._idle_since[id(conn)] = now
+                self._stats['creations'] += 1
+                self._pool.insert(0, conn)
+                self._cond.notify()
+
+    def _run_checks(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception:
+                # Never let the checker die: try again at the next round.
+                pass
+
+
+class AsyncConnectionPool:
+    """A pool of asynchronous connections to be used with asyncio.
+
+    Connections are created with ``async_=True`` and all the waiting is done
+    on the event loop (see `~psycopg2.extras.wait_asyncio()`), so the pool
+    must be used from a single event loop. *minconn* connections are
+    created by `open()`; no more than *maxconn* connections are ever open.
+
+    Tasks asking for a connection when none is available are served in
+    arrival order. At most *max_waiters* tasks can wait at the same time
+    (no limit if `!None`): after that `getconn()` fails immediately. A task
+    waits at most *timeout* seconds (forever if `!None`).
+    """
+
+    def __init__(self, minconn, maxconn, *args, max_waiters=None,
+            timeout=30.0, **kwargs):
+        import collections
+        self.minconn = int(minconn)
+        self.maxconn = int(maxconn)
+        self.max_waiters = max_waiters
+        self.timeout = timeout
+        self.closed = False
+
+        self._args = args
+        self._kwargs = kwargs
+        self._kwargs['async_'] = True
+
+        self._pool = []
+        self._used = set()
+        self._connecting = 0
+        self._waiters = collections.deque()
+
+    async def _connect(self):
+        from psycopg2.extras import wait_asyncio
+        conn = psycopg2.connect(*self._args, **self._kwargs)
+        try:
+            await wait_asyncio(conn)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _size(self):
+        return len(self._pool) + len(self._used) + self._connecting
+
+    async def open(self):
+        """Create the initial *minconn* connections."""
+        import asyncio
+        if self.closed:
+            raise PoolError("connection pool is closed")
+        missing = self.minconn - self._size()
+        if missing <= 0:
+            return
+        self._connecting += missing
+        try:
+            conns = await asyncio.gather(
+                *(self._connect() for i in range(missing)),
+                return_exceptions=True)
+        finally:
+            self._connecting -= missing
+        for conn in conns:
+            if not isinstance(conn, BaseException):
+                self._putback(conn)
+        for conn in conns:
+            if isinstance(conn, BaseException):
+                raise conn
+
+    async def getconn(self, timeout=None):
+        """Get a free connection from the pool.
+
+        Use *timeout* instead of the pool default if specified.
+        """
+        import asyncio
+        if timeout is None:
+            timeout = self.timeout
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        first = False
+
+        while True:
+            if self.closed:
+                raise PoolError("connection pool is closed")
+
+            # Don't jump ahead of the tasks already waiting.
+            if not self._waiters or first:
+                while self._pool:
+                    conn = self._pool.pop()
+                    if conn.closed:
+                        continue
+                    self._used.add(conn)
+                    return conn
+
+                if self._size() < self.maxconn:
+                    self._connecting += 1
+                    try:
+                        conn = await self._connect()
+                    except BaseException:
+                        self._connecting -= 1
+                        self._wakeup(None)
+                        raise
+                    self._connecting -= 1
+                    if self.closed:
+                        conn.close()
+                        raise PoolError("connection pool is closed")
+                    self._used.add(conn)
+                    return conn
+
+            if (self.max_waiters is not None
+                    and len(self._waiters) >= self.max_waiters):
+                raise PoolError("too many tasks waiting for a connection")
+
+            waiter = loop.create_future()
+            # A task woken up without a connection keeps its place in line.
+            if first:
+                self._waiters.appendleft(waiter)
+            else:
+                self._waiters.append(waiter)
+
+            remaining = None if deadline is None else deadline - loop.time()
+            try:
+                await asyncio.wait((waiter,), timeout=remaining)
+            except BaseException:
+                self._drop_waiter(waiter)
+                raise
+            if not waiter.done():
+                self._drop_waiter(waiter)
+                raise PoolError("timeout waiting for a connection")
+
+            conn = waiter.result()
+            if conn is not None:
+                return conn
+            first = True
+
+    def _drop_waiter(self, waiter):
+        if (waiter.done() and not waiter.cancelled()
+                and waiter.exception() is None):
+            # Got a connection while giving up: give it to someone else.
+            conn = waiter.result()
+            if conn is not None:
+                self._used.discard(conn)
+                self._putback(conn)
+            else:
+                self._wakeup(None)
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _wakeup(self, conn):
+        """Hand *conn* to the first waiting task, if any.
+
+        Passing `!None` tells the task a connection slot is free.
+        Return `!True` if the connection was handed over.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            if conn is not None:
+                self._used.add(conn)
+            waiter.set_result(conn)
+            return True
+        return False
+
+    def _putback(self, conn):
+        if not self._wakeup(conn):
+            self._pool.append(conn)
+
+    async def putconn(self, conn, close=False):
+        """Return a connection to the pool.
+
+        If *close* is `!True`, discard the connection from the pool.
+        """
+        from psycopg2.extras import wait_asyncio
+        if conn not in self._used:
+            raise PoolError("trying to put unkeyed connection")
+        self._used.discard(conn)
+
+        if not (close or self.closed or conn.closed or conn.isexecuting()):
+            status = conn.info.transaction_status
+            if status in (_ext.TRANSACTION_STATUS_INTRANS,
+                    _ext.TRANSACTION_STATUS_INERROR):
+                # connection in error or in transaction: still counted
+                # towards maxconn until rolled back
+                self._connecting += 1
+                try:
+                    # the cursor must stay alive until the query completes
+                    cur = conn.cursor()
+                    cur.execute("ROLLBACK")
+                    await wait_asyncio(conn)
+                except psycopg2.Error:
+                    close = True
+                except BaseException:
+                    # cancelled: the connection is in an unknown state
+                    self._connecting -= 1
+                    conn.close()
+                    if not self.closed:
+                        self._wakeup(None)
+                    raise
+                self._connecting -= 1
+            elif status != _ext.TRANSACTION_STATUS_IDLE:
+                close = True
+            if not (close or self.closed):
+                self._putback(conn)
+                return
+
+        conn.close()
+        if not self.closed:
+            self._wakeup(None)
+
+    def connection(self, timeout=None):
+        """Return a context manager to get a connection and put it back.
+
+        Usage::
+
+            async with pool.connection() as conn:
+                cur = conn.cursor()
+                cur.execute("SELECT ...")
+                await wait_asyncio(conn)
+        """
+        import contextlib
+
+        @contextlib.asynccontextmanager
+        async def connection():
+            conn = await self.getconn(timeout=timeout)
+            try:
+                yield conn
+            finally:
+                await self.putconn(conn)
+
+        return connection()
+
+    async def closeall(self):
+        """Close all connections, and make the waiting tasks fail."""
+        if self.closed:
+            raise PoolError("connection pool is closed")
+        self.closed = True
+        for conn in self._pool + list(self._used):
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._pool = []
+        self._used.clear()
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(PoolError("connection pool is closed"))
+
+    def get_stats(self):
+        """Return a dict with the current pool size."""
+        return {
+            'pool_size': self._size(),
+            'pool_available': len(self._pool),
+            'pool_used': len(self._used),
+            'waiting': len(self._waiters),
+        }
@@ -148,6 +148,10 @@ struct connectionObject {
 
     /* inside a with block */
     int entered;
+
+    /* In pipeline mode, the list of the cursors waiting for a result.
+     * NULL if the connection is not in pipeline mode. */
+    PyObject *pipeline;
 };
 
 /* map isolation level values into a numeric const */
@@ -195,6 +199,11 @@ HIDDEN void conn_set_error(connectionObject *self, const char *msg);
     "in asynchronous mode");                                   \
     return NULL; }
 
+#define EXC_IF_IN_PIPELINE(self, cmd) if ((self)->pipeline) { \
+    PyErr_SetString(ProgrammingError, #cmd " cannot be used "  \
+    "in pipeline mode");                                       \
+    return NULL; }
+
 #define EXC_IF_IN_TRANSACTION(self, cmd)                        \
     if (self->status != CONN_STATUS_READY) {                    \
         PyErr_Format(ProgrammingError,                          \
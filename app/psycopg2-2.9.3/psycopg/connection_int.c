@@ -1248,6 +1248,11 @@ conn_commit(connectionObject *self)
 {
     int res;
 
+    /* the results of the queries in the pipeline must be read first */
+    if (self->pipeline && pq_pipeline_sync(self) < 0) {
+        return -1;
+    }
+
     res = pq_commit(self);
     return res;
 }
@@ -1259,6 +1264,11 @@ conn_rollback(connectionObject *self)
 {
     int res;
 
+    /* the results in the pipeline are discarded with the transaction */
+    if (self->pipeline && pq_pipeline_sync(self) < 0) {
+        PyErr_Clear();
+    }
+
     res = pq_abort(self);
     return res;
 }
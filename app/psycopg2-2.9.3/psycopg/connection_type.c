@@ -187,6 +187,79 @@ psyco_conn_rollback(connectionObject *self, PyObject *dummy)
 }
 
 
+/* pipeline method - execute queries in pipeline mode */
+
+#define psyco_conn_pipeline_doc \
+"pipeline() -- Return a context manager executing queries in pipeline mode."
+
+static PyObject *
+psyco_conn_pipeline(connectionObject *self, PyObject *dummy)
+{
+    PyObject *ext = NULL, *pipeline = NULL, *rv = NULL;
+
+    EXC_IF_CONN_CLOSED(self);
+    EXC_IF_CONN_ASYNC(self, pipeline);
+
+    if (!(ext = PyImport_ImportModule("psycopg2.extensions"))) { goto exit; }
+    if (!(pipeline = PyObject_GetAttrString(ext, "Pipeline"))) { goto exit; }
+    rv = PyObject_CallFunctionObjArgs(pipeline, (PyObject *)self, NULL);
+
+exit:
+    Py_XDECREF(pipeline);
+    Py_XDECREF(ext);
+    return rv;
+}
+
+
+#define psyco_conn_enter_pipeline_doc \
+"enter_pipeline() -- Put the connection in pipeline mode."
+
+static PyObject *
+psyco_conn_enter_pipeline(connectionObject *self, PyObject *dummy)
+{
+    EXC_IF_CONN_CLOSED(self);
+    EXC_IF_CONN_ASYNC(self, enter_pipeline);
+
+    if (pq_pipeline_enter(self) < 0) {
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
+
+#define psyco_conn_pipeline_sync_doc \
+"pipeline_sync() -- Wait for the results of the queries in the pipeline."
+
+static PyObject *
+psyco_conn_pipeline_sync(connectionObject *self, PyObject *dummy)
+{
+    EXC_IF_CONN_CLOSED(self);
+
+    if (pq_pipeline_sync(self) < 0) {
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
+
+#define psyco_conn_exit_pipeline_doc \
+"exit_pipeline() -- Wait for the pending results and leave pipeline mode."
+
+static PyObject *
+psyco_conn_exit_pipeline(connectionObject *self, PyObject *dummy)
+{
+    EXC_IF_CONN_CLOSED(self);
+
+    if (pq_pipeline_exit(self) < 0) {
+        return NULL;
+    }
+
+    Py_RETURN_NONE;
+}
+
+
 #define psyco_conn_xid_doc \
 "xid(format_id, gtrid, bqual) -- create a transaction identifier."
 
@@ -212,6 +285,7 @@ psyco_conn_tpc_begin(connectionObject *self, PyObject *args)
 
     EXC_IF_CONN_CLOSED(self);
     EXC_IF_CONN_ASYNC(self, tpc_begin);
+    EXC_IF_IN_PIPELINE(self, tpc_begin);
     EXC_IF_TPC_NOT_SUPPORTED(self);
     EXC_IF_IN_TRANSACTION(self, tpc_begin);
 
@@ -979,6 +1053,7 @@ psyco_conn_lobject(connectionObject *self, PyObject *args, PyObject *keywds)
 
     EXC_IF_CONN_CLOSED(self);
     EXC_IF_CONN_ASYNC(self, lobject);
+    EXC_IF_IN_PIPELINE(self, lobject);
     EXC_IF_GREEN(lobject);
     EXC_IF_TPC_PREPARED(self, lobject);
 
@@ -1065,6 +1140,7 @@ psyco_conn_reset(connectionObject *self, PyObject *dummy)
 
     EXC_IF_CONN_CLOSED(self);
     EXC_IF_CONN_ASYNC(self, reset);
+    EXC_IF_IN_PIPELINE(self, reset);
 
     if (pq_reset(self) < 0)
         return NULL;
@@ -1192,6 +1268,14 @@ static struct PyMethodDef connectionObject_methods[] = {
      METH_NOARGS, psyco_conn_commit_doc},
     {"rollback", (PyCFunction)psyco_conn_rollback,
      METH_NOARGS, psyco_conn_rollback_doc},
+    {"pipeline", (PyCFunction)psyco_conn_pipeline,
+     METH_NOARGS, psyco_conn_pipeline_doc},
+    {"enter_pipeline", (PyCFunction)psyco_conn_enter_pipeline,
+     METH_NOARGS, psyco_conn_enter_pipeline_doc},
+    {"pipeline_sync", (PyCFunction)psyco_conn_pipeline_sync,
+     METH_NOARGS, psyco_conn_pipeline_sync_doc},
+    {"exit_pipeline", (PyCFunction)psyco_conn_exit_pipeline,
+     METH_NOARGS, psyco_conn_exit_pipeline_doc},
     {"xid", (PyCFunction)psyco_conn_xid,
      METH_VARARGS|METH_KEYWORDS, psyco_conn_xid_doc},
     {"tpc_begin", (PyCFunction)psyco_conn_tpc_begin,
@@ -1374,6 +1458,7 @@ connection_clear(connectionObject *self)
     Py_CLEAR(self->cursor_factory);
     Py_CLEAR(self->pyencoder);
     Py_CLEAR(self->pydecoder);
+    Py_CLEAR(self->pipeline);
     return 0;
 }
 
@@ -1462,6 +1547,7 @@ connection_traverse(connectionObject *self, visitproc visit, void *arg)
     Py_VISIT(self->cursor_factory);
     Py_VISIT(self->pyencoder);
     Py_VISIT(self->pydecoder);
+    Py_VISIT(self->pipeline);
     return 0;
 }
 
@@ -249,6 +249,30 @@ transaction_status_get(connInfoObject *self)
 }
 
 
+static const char pipeline_status_doc[] =
+"The current pipeline mode status of the connection.\n"
+"\n"
+"Symbolic constants for the values are defined in the module\n"
+"`psycopg2.extensions`: see :ref:`pipeline-status-constants` for the\n"
+"available values.\n"
+"\n"
+":type: `!int`\n"
+"\n"
+".. seealso:: libpq docs for `PQpipelineStatus()`__ for details.\n"
+".. __: https://www.postgresql.org/docs/current/static/libpq-pipeline-mode.html"
+    "#LIBPQ-PQPIPELINESTATUS";
+
+static PyObject *
+pipeline_status_get(connInfoObject *self)
+{
+#if PG_VERSION_NUM >= 140000
+    return PyInt_FromLong((long)PQpipelineStatus(self->conn->pgconn));
+#else
+    return PyInt_FromLong(0L);
+#endif
+}
+
+
 static const char parameter_status_doc[] =
 "Looks up a current parameter setting of the server.\n"
 "\n"
@@ -543,6 +567,8 @@ static struct PyGetSetDef connInfoObject_getsets[] = {
     { "status", (getter)status_get, NULL, (char *)status_doc },
     { "transaction_status", (getter)transaction_status_get, NULL,
         (char *)transaction_status_doc },
+    { "pipeline_status", (getter)pipeline_status_get, NULL,
+        (char *)pipeline_status_doc },
     { "protocol_version", (getter)protocol_version_get, NULL,
         (char *)protocol_version_doc },
     { "server_version", (getter)server_version_get, NULL,
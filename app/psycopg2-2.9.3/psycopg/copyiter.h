@@ -0,0 +1,63 @@
+/* copyiter.h - definition for the COPY TO data iterator
+ *
+ * Copyright (C) 2020-2021 The Psycopg Team
+ *
+ * This file is part of psycopg.
+ *
+ * psycopg2 is free software: you can redistribute it and/or modify it
+ * under the terms of the GNU Lesser General Public License as published
+ * by the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * In addition, as a special exception, the copyright holders give
+ * permission to link this program with the OpenSSL library (or with
+ * modified versions of OpenSSL that use the same license as OpenSSL),
+ * and distribute linked combinations including the two.
+ *
+ * You must obey the GNU Lesser General Public License in all respects for
+ * all of the code used other than OpenSSL.
+ *
+ * psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+ * FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+ * License for more details.
+ */
+
+
+#ifndef PSYCOPG_COPYITER_H
+#define PSYCOPG_COPYITER_H 1
+
+#include "psycopg/cursor.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+extern HIDDEN PyTypeObject copyIterType;
+
+typedef struct {
+    PyObject_HEAD
+
+    cursorObject *cursor;   /* the cursor executing the COPY */
+    Py_ssize_t size;        /* minimum size of the chunks returned */
+
+    int status;             /* one of the COPYITER_* values below */
+#define COPYITER_BEGIN  0   /* waiting for the COPY to start (async) */
+#define COPYITER_DATA   1   /* reading the COPY data */
+#define COPYITER_RESULT 2   /* data finished, reading the command result */
+#define COPYITER_END    3   /* all done */
+
+    char *buffer;           /* data accumulated for the next chunk */
+    Py_ssize_t buflen;      /* bytes of data in the buffer */
+    Py_ssize_t bufsize;     /* bytes allocated for the buffer */
+
+    PyObject *weakreflist;  /* list of weak references */
+} copyIterObject;
+
+HIDDEN PyObject *copyiter_new(cursorObject *curs, Py_ssize_t size);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /* !defined(PSYCOPG_COPYITER_H) */
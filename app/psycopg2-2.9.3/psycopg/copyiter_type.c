@@ -0,0 +1,343 @@
+/* copyiter_type.c - python interface to the COPY TO data iterator
+ *
+ * Copyright (C) 2020-2021 The Psycopg Team
+ *
+ * This file is part of psycopg.
+ *
+ * psycopg2 is free software: you can redistribute it and/or modify it
+ * under the terms of the GNU Lesser General Public License as published
+ * by the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * In addition, as a special exception, the copyright holders give
+ * permission to link this program with the OpenSSL library (or with
+ * modified versions of OpenSSL that use the same license as OpenSSL),
+ * and distribute linked combinations including the two.
+ *
+ * You must obey the GNU Lesser General Public License in all respects for
+ * all of the code used other than OpenSSL.
+ *
+ * psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+ * FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+ * License for more details.
+ */
+
+#define PSYCOPG_MODULE
+#include "psycopg/psycopg.h"
+
+#include "psycopg/copyiter.h"
+#include "psycopg/pqpath.h"
+
+
+/* Check that the COPY started and get ready to read its data.
+
+   On async connections the COPY result is received by poll(), so this is
+   called on the first read.
+*/
+RAISES_NEG static int
+copyiter_start(copyIterObject *self)
+{
+    cursorObject *curs = self->cursor;
+    connectionObject *conn = curs->conn;
+
+    if (conn->async_cursor
+            && PyWeakref_GetObject(conn->async_cursor) == (PyObject *)curs) {
+        PyErr_SetString(ProgrammingError,
+            "the COPY is still executing: wait for the connection to be "
+            "ready before reading");
+        return -1;
+    }
+    if (!curs->pgres || PQresultStatus(curs->pgres) != PGRES_COPY_OUT) {
+        PyErr_SetString(ProgrammingError,
+            "copy_iter() requires a COPY ... TO STDOUT statement");
+        return -1;
+    }
+    CLEARPGRES(curs->pgres);
+
+    /* on sync connections, stop other cursors from executing until the
+     * data is consumed: the async_cursor has to be a weakref, but doesn't
+     * need to be a cursor (see psyco_exec_green()) */
+    if (!conn->async) {
+        if (!(conn->async_cursor = PyWeakref_NewRef((PyObject *)self, NULL))) {
+            return -1;
+        }
+    }
+
+    self->status = COPYITER_DATA;
+    return 0;
+}
+
+/* Mark the iterator as done and release the connection. */
+static void
+copyiter_finish(copyIterObject *self)
+{
+    connectionObject *conn = self->cursor->conn;
+
+    if (self->status != COPYITER_BEGIN && !conn->async) {
+        Py_CLEAR(conn->async_cursor);
+    }
+    self->cursor->copy_stream = 0;
+    self->status = COPYITER_END;
+
+    PyMem_RawFree(self->buffer);
+    self->buffer = NULL;
+    self->buflen = self->bufsize = 0;
+}
+
+static PyObject *
+copyiter_chunk(copyIterObject *self)
+{
+    PyObject *rv;
+
+    rv = Bytes_FromStringAndSize(self->buffer, self->buflen);
+    self->buflen = 0;
+    return rv;
+}
+
+/* Return the next chunk of data.
+
+   Return an empty bytes if no data is available yet (only on async
+   connections), NULL without an exception set at the end of the data.
+*/
+static PyObject *
+copyiter_next_chunk(copyIterObject *self)
+{
+    cursorObject *curs = self->cursor;
+    int async = curs->conn->async;
+    int r;
+
+    if (self->status == COPYITER_END) {
+        return NULL;
+    }
+
+    EXC_IF_CURS_CLOSED(curs);
+
+    if (self->status == COPYITER_BEGIN) {
+        if (0 > copyiter_start(self)) { return NULL; }
+    }
+
+    if (self->status == COPYITER_DATA) {
+        r = pq_copy_read(curs, &self->buffer, &self->buflen, &self->bufsize,
+            self->size, async);
+        if (r < 0) { goto error; }
+        if (r == 2) { self->status = COPYITER_RESULT; }
+        if (self->buflen) { return copyiter_chunk(self); }
+        if (r == 0) { return Bytes_FromStringAndSize("", 0); }
+    }
+
+    r = pq_copy_read_result(curs, async);
+    if (r < 0) { goto error; }
+    if (r == 0) { return Bytes_FromStringAndSize("", 0); }
+    copyiter_finish(self);
+    return NULL;
+
+error:
+    copyiter_finish(self);
+    return NULL;
+}
+
+/* Stop the COPY if its data was not consumed yet. */
+RAISES_NEG static int
+copyiter_stop(copyIterObject *self)
+{
+    cursorObject *curs = self->cursor;
+    int rv = 0;
+
+    if (self->status == COPYITER_END) {
+        return 0;
+    }
+    if (curs->closed || curs->conn->closed) {
+        copyiter_finish(self);
+        return 0;
+    }
+
+    switch (self->status) {
+    case COPYITER_BEGIN:
+        /* only cancel if the COPY started (async poll() completed) */
+        if (!(curs->pgres && PQresultStatus(curs->pgres) == PGRES_COPY_OUT)) {
+            break;
+        }
+        CLEARPGRES(curs->pgres);
+        /* fall through */
+    case COPYITER_DATA:
+        rv = pq_copy_cancel(curs);
+        break;
+    case COPYITER_RESULT:
+        rv = pq_copy_read_result(curs, 0);
+        break;
+    }
+
+    copyiter_finish(self);
+    return rv;
+}
+
+
+/* methods */
+
+#define copyiter_read_doc \
+"read() -> bytes -- Return the next chunk of data, `!None` at the end.\n\n" \
+"On asynchronous connections never block: return an empty bytes if no\n" \
+"data is available yet."
+
+static PyObject *
+copyiter_read(copyIterObject *self, PyObject *dummy)
+{
+    PyObject *rv;
+
+    if (!(rv = copyiter_next_chunk(self)) && !PyErr_Occurred()) {
+        Py_RETURN_NONE;
+    }
+    return rv;
+}
+
+#define copyiter_close_doc \
+"close() -- Stop the COPY, cancelling it if its data was not consumed."
+
+static PyObject *
+copyiter_close(copyIterObject *self, PyObject *dummy)
+{
+    if (0 > copyiter_stop(self)) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+copyiter_iternext(copyIterObject *self)
+{
+    if (self->cursor->conn->async) {
+        PyErr_SetString(ProgrammingError,
+            "iteration cannot be used in asynchronous mode: use read()");
+        return NULL;
+    }
+    return copyiter_next_chunk(self);
+}
+
+
+/* object member and method lists */
+
+static struct PyMemberDef copyiter_members[] = {
+    {"cursor", T_OBJECT, offsetof(copyIterObject, cursor), READONLY,
+        "The cursor executing the COPY."},
+    {NULL}
+};
+
+static struct PyMethodDef copyiter_methods[] = {
+    {"read", (PyCFunction)copyiter_read,
+     METH_NOARGS, copyiter_read_doc},
+    {"close", (PyCFunction)copyiter_close,
+     METH_NOARGS, copyiter_close_doc},
+    {NULL}
+};
+
+
+/* initialization and finalization methods */
+
+PyObject *
+copyiter_new(cursorObject *curs, Py_ssize_t size)
+{
+    copyIterObject *self;
+
+    if (!(self = PyObject_GC_New(copyIterObject, &copyIterType))) {
+        return NULL;
+    }
+    Py_INCREF(curs);
+    self->cursor = curs;
+    self->size = size;
+    self->status = COPYITER_BEGIN;
+    self->buffer = NULL;
+    self->buflen = self->bufsize = 0;
+    self->weakreflist = NULL;
+    PyObject_GC_Track(self);
+
+    Dprintf("copyiter_new: new copy iterator at %p: size = "
+        FORMAT_CODE_PY_SSIZE_T, self, size);
+
+    /* on sync connections the COPY already started */
+    if (!curs->conn->async && 0 > copyiter_start(self)) {
+        Py_DECREF(self);
+        return NULL;
+    }
+
+    return (PyObject *)self;
+}
+
+static int
+copyiter_traverse(copyIterObject *self, visitproc visit, void *arg)
+{
+    Py_VISIT((PyObject *)self->cursor);
+    return 0;
+}
+
+static void
+copyiter_dealloc(PyObject* obj)
+{
+    copyIterObject *self = (copyIterObject *)obj;
+    PyObject *t, *v, *tb;
+
+    PyObject_GC_UnTrack(obj);
+
+    if (self->weakreflist) {
+        PyObject_ClearWeakRefs(obj);
+    }
+
+    /* don't leave the connection in COPY state */
+    PyErr_Fetch(&t, &v, &tb);
+    if (0 > copyiter_stop(self)) {
+        PyErr_WriteUnraisable(obj);
+    }
+    PyErr_Restore(t, v, tb);
+
+    Py_CLEAR(self->cursor);
+
+    Dprintf("copyiter_dealloc: deleted copy iterator at %p", obj);
+
+    Py_TYPE(obj)->tp_free(obj);
+}
+
+
+/* object type */
+
+#define copyIterType_doc \
+"Iterator over the data of a COPY TO, returned by `cursor.copy_iter()`."
+
+PyTypeObject copyIterType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "psycopg2.extensions.CopyIterator",
+    sizeof(copyIterObject), 0,
+    copyiter_dealloc, /*tp_dealloc*/
+    0,          /*tp_print*/
+    0,          /*tp_getattr*/
+    0,          /*tp_setattr*/
+    0,          /*tp_compare*/
+    0,          /*tp_repr*/
+    0,          /*tp_as_number*/
+    0,          /*tp_as_sequence*/
+    0,          /*tp_as_mapping*/
+    0,          /*tp_hash */
+    0,          /*tp_call*/
+    0,          /*tp_str*/
+    0,          /*tp_getattro*/
+    0,          /*tp_setattro*/
+    0,          /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC, /*tp_flags*/
+    copyIterType_doc, /*tp_doc*/
+    (traverseproc)copyiter_traverse, /*tp_traverse*/
+    0,          /*tp_clear*/
+    0,          /*tp_richcompare*/
+    offsetof(copyIterObject, weakreflist), /*tp_weaklistoffset*/
+    PyObject_SelfIter, /*tp_iter*/
+    (iternextfunc)copyiter_iternext, /*tp_iternext*/
+    copyiter_methods, /*tp_methods*/
+    copyiter_members, /*tp_members*/
+    0,          /*tp_getset*/
+    0,          /*tp_base*/
+    0,          /*tp_dict*/
+    0,          /*tp_descr_get*/
+    0,          /*tp_descr_set*/
+    0,          /*tp_dictoffset*/
+    0,          /*tp_init*/
+    0,          /*tp_alloc*/
+    0,          /*tp_new*/
+};
@@ -44,6 +44,9 @@ struct cursorObject {
     int closed:1;            /* 1 if the cursor is closed */
     int notuples:1;          /* 1 if the command was not a SELECT query */
     int withhold:1;          /* 1 if the cursor is named and uses WITH HOLD */
+    int binary:1;            /* 1 if results are requested in binary format */
+    int pipeline_pending:1;  /* 1 if waiting for a result in pipeline mode */
+    int copy_stream:1;       /* 1 if COPY TO data is read by copy_iter() */
 
     int scrollable;          /* 1 if the cursor is named and SCROLLABLE,
                                 0 if not scrollable
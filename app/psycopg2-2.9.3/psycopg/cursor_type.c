@@ -31,7 +31,9 @@
 #include "psycopg/connection.h"
 #include "psycopg/green.h"
 #include "psycopg/pqpath.h"
+#include "psycopg/copyiter.h"
 #include "psycopg/typecast.h"
+#include "psycopg/pgtypes.h"
 #include "psycopg/microprotocols.h"
 #include "psycopg/microprotocols_proto.h"
 
@@ -481,6 +483,11 @@ curs_execute(cursorObject *self, PyObject *args, PyObject *kwargs)
                 "can't use a named cursor outside of transactions");
             return NULL;
         }
+        if (self->conn->pipeline) {
+            psyco_set_error(ProgrammingError, self,
+                "can't use a named cursor in pipeline mode");
+            return NULL;
+        }
         EXC_IF_NO_MARK(self);
     }
 
@@ -650,11 +657,25 @@ curs_cast(cursorObject *self, PyObject *args)
 "default) or using the sequence factory previously set in the\n" \
 "`row_factory` attribute. Return `!None` when no more data is available.\n"
 
+/* Wait for the result of a query sent in pipeline mode, if needed */
+RAISES_NEG static int
+_psyco_curs_pipeline_wait(cursorObject *self)
+{
+    if (self->pipeline_pending && self->conn && !self->conn->closed) {
+        return pq_pipeline_sync(self->conn);
+    }
+    return 0;
+}
+
 RAISES_NEG static int
 _psyco_curs_prefetch(cursorObject *self)
 {
     int i = 0;
 
+    if (self->pipeline_pending) {
+        return _psyco_curs_pipeline_wait(self);
+    }
+
     if (self->pgres == NULL) {
         Dprintf("_psyco_curs_prefetch: trying to fetch data");
         do {
@@ -689,8 +710,15 @@ _psyco_curs_buildrow_fill(cursorObject *self, PyObject *res,
         Dprintf("_psyco_curs_buildrow: row %ld, element %d, len %d",
                 self->row, i, len);
 
-        if (!(val = typecast_cast(PyTuple_GET_ITEM(self->casts, i), str, len,
-                            (PyObject*)self))) {
+        if (PQfformat(self->pgres, i)) {
+            val = typecast_cast_binary(PyTuple_GET_ITEM(self->casts, i),
+                PQftype(self->pgres, i), str, len, (PyObject*)self);
+        }
+        else {
+            val = typecast_cast(PyTuple_GET_ITEM(self->casts, i), str, len,
+                (PyObject*)self);
+        }
+        if (!val) {
             goto exit;
         }
 
@@ -995,6 +1023,439 @@ exit:
 }
 
 
+/* fetch_columns method - fetch all results decoding them by column */
+
+#define curs_fetch_columns_doc \
+"fetch_columns(numpy=None) -> list of columns\n\n" \
+"Return all the remaining rows of a query result set as one object per\n" \
+"column.\n\n" \
+"Integer, float, boolean, date and timestamp columns without nulls are\n" \
+"decoded into NumPy arrays if `numpy` is true, or if it is None and NumPy\n" \
+"can be imported, otherwise into typed `memoryview` objects. The other\n" \
+"columns are returned as lists of Python objects."
+
+/* The column types decoded without creating a Python object per value.
+ * Dates and timestamps are stored as days and microseconds since
+ * 1970-01-01 (timestamptz in UTC), the same as numpy datetime64. */
+typedef struct {
+    Oid oid;
+    int size;
+    const char *format;     /* memoryview.cast() format */
+    const char *dtype;      /* numpy dtype */
+} columnKind;
+
+static const columnKind column_kinds[] = {
+    {INT2OID, sizeof(short), "h", "int16"},
+    {INT4OID, sizeof(int), "i", "int32"},
+    {INT8OID, sizeof(long long), "q", "int64"},
+    {FLOAT4OID, sizeof(float), "f", "float32"},
+    {FLOAT8OID, sizeof(double), "d", "float64"},
+    {BOOLOID, sizeof(char), "?", "bool"},
+    {DATEOID, sizeof(long long), "q", "datetime64[D]"},
+    {TIMESTAMPOID, sizeof(long long), "q", "datetime64[us]"},
+    {TIMESTAMPTZOID, sizeof(long long), "q", "datetime64[us]"},
+    {0}
+};
+
+/* Parse a run of at least mindigits digits, advancing *s. */
+static int
+_col_parse_digits(const char **s, int mindigits, int maxdigits, long long *rv)
+{
+    const char *p = *s;
+    long long acc = 0;
+
+    while (*p >= '0' && *p <= '9' && p - *s < maxdigits) {
+        acc = acc * 10 + (*p++ - '0');
+    }
+    if (p - *s < mindigits) { return -1; }
+    *s = p;
+    *rv = acc;
+    return 0;
+}
+
+/* Parse a 64 bits integer. Accumulated unsigned: -9223372036854775808 has no
+ * positive counterpart. */
+static int
+_col_parse_int(const char *s, long long *rv)
+{
+    int neg = 0;
+    const char *p;
+    unsigned long long acc = 0;
+
+    if (*s == '-') { neg = 1; s++; }
+    for (p = s; *p >= '0' && *p <= '9' && p - s < 19; p++) {
+        acc = acc * 10 + (unsigned)(*p - '0');
+    }
+    if (p == s || *p) { return -1; }
+    if (acc > (unsigned long long)LLONG_MAX + neg) { return -1; }
+    *rv = neg ? -(long long)(acc - 1) - 1 : (long long)acc;
+    return 0;
+}
+
+/* days since 1970-01-01 of a date in the proleptic gregorian calendar */
+static long long
+_col_days_from_civil(long long y, long long m, long long d)
+{
+    long long era, yoe, doy, doe;
+
+    y -= m <= 2;
+    era = (y >= 0 ? y : y - 399) / 400;
+    yoe = y - era * 400;
+    doy = (153 * (m + (m > 2 ? -3 : 9)) + 2) / 5 + d - 1;
+    doe = yoe * 365 + yoe / 4 - yoe / 100 + doy;
+    return era * 146097 + doe - 719468;
+}
+
+/* Parse an ISO date (not BC, not infinity), advancing *s. */
+static int
+_col_parse_date(const char **s, long long *days)
+{
+    long long y, m, d;
+
+    if (0 > _col_parse_digits(s, 4, 7, &y) || *(*s)++ != '-') { return -1; }
+    if (0 > _col_parse_digits(s, 2, 2, &m) || *(*s)++ != '-') { return -1; }
+    if (0 > _col_parse_digits(s, 2, 2, &d)) { return -1; }
+    if (m < 1 || m > 12 || d < 1 || d > 31) { return -1; }
+    *days = _col_days_from_civil(y, m, d);
+    return 0;
+}
+
+/* Parse an ISO timestamp, with offset if withtz, into microseconds. */
+static int
+_col_parse_timestamp(const char *s, int withtz, long long *rv)
+{
+    long long days, hh, mm, ss, us = 0, tz = 0, tzpart;
+    int i, sign;
+
+    if (0 > _col_parse_date(&s, &days) || *s++ != ' ') { return -1; }
+    if (0 > _col_parse_digits(&s, 2, 2, &hh) || *s++ != ':') { return -1; }
+    if (0 > _col_parse_digits(&s, 2, 2, &mm) || *s++ != ':') { return -1; }
+    if (0 > _col_parse_digits(&s, 2, 2, &ss)) { return -1; }
+    if (*s == '.') {
+        s++;
+        for (i = 0; i < 6; i++) {
+            us *= 10;
+            if (*s >= '0' && *s <= '9') { us += *s++ - '0'; }
+            else if (i == 0) { return -1; }
+        }
+    }
+    if (withtz) {
+        if (*s != '+' && *s != '-') { return -1; }
+        sign = *s++ == '-' ? -1 : 1;
+        if (0 > _col_parse_digits(&s, 2, 2, &tz)) { return -1; }
+        tz *= 3600;
+        if (*s == ':') {
+            s++;
+            if (0 > _col_parse_digits(&s, 2, 2, &tzpart)) { return -1; }
+            tz += tzpart * 60;
+        }
+        if (*s == ':') {
+            s++;
+            if (0 > _col_parse_digits(&s, 2, 2, &tzpart)) { return -1; }
+            tz += tzpart;
+        }
+        tz *= sign;
+    }
+    if (*s) { return -1; }
+
+    *rv = ((days * 86400 + hh * 3600 + mm * 60 + ss - tz) * 1000000) + us;
+    return 0;
+}
+
+/* Decode a column into buf. Return -1 if any value can't be decoded. */
+static int
+_curs_decode_column(cursorObject *self, int col, int size,
+                    const columnKind *kind, char *buf)
+{
+    int i;
+    const char *s;
+    char *end;
+    long long ll;
+    double dd;
+    short sv;
+    int iv;
+    float fv;
+
+    for (i = 0; i < size; i++, buf += kind->size) {
+        if (PQgetisnull(self->pgres, self->row + i, col)) { return -1; }
+        s = PQgetvalue(self->pgres, self->row + i, col);
+
+        switch (kind->oid) {
+        case INT2OID:
+            if (0 > _col_parse_int(s, &ll)) { return -1; }
+            sv = (short)ll;
+            memcpy(buf, &sv, sizeof(sv));
+            break;
+        case INT4OID:
+            if (0 > _col_parse_int(s, &ll)) { return -1; }
+            iv = (int)ll;
+            memcpy(buf, &iv, sizeof(iv));
+            break;
+        case INT8OID:
+            if (0 > _col_parse_int(s, &ll)) { return -1; }
+            memcpy(buf, &ll, sizeof(ll));
+            break;
+        case FLOAT4OID:
+        case FLOAT8OID:
+            dd = PyOS_string_to_double(s, &end, NULL);
+            if (dd == -1.0 && PyErr_Occurred()) {
+                PyErr_Clear();
+                return -1;
+            }
+            if (*end) { return -1; }
+            if (kind->oid == FLOAT4OID) {
+                fv = (float)dd;
+                memcpy(buf, &fv, sizeof(fv));
+            }
+            else {
+                memcpy(buf, &dd, sizeof(dd));
+            }
+            break;
+        case BOOLOID:
+            if (s[0] == 't' && !s[1]) { *buf = 1; }
+            else if (s[0] == 'f' && !s[1]) { *buf = 0; }
+            else { return -1; }
+            break;
+        case DATEOID:
+            if (0 > _col_parse_date(&s, &ll) || *s) { return -1; }
+            memcpy(buf, &ll, sizeof(ll));
+            break;
+        case TIMESTAMPOID:
+        case TIMESTAMPTZOID:
+            if (0 > _col_parse_timestamp(
+                    s, kind->oid == TIMESTAMPTZOID, &ll)) {
+                return -1;
+            }
+            memcpy(buf, &ll, sizeof(ll));
+            break;
+        default:
+            return -1;
+        }
+    }
+
+    return 0;
+}
+
+/* Decode a column received in binary format into buf. */
+static int
+_curs_decode_column_binary(cursorObject *self, int col, int size,
+                           const columnKind *kind, char *buf)
+{
+    int i, j, len;
+    const unsigned char *s;
+    unsigned long long u;
+    long long ll;
+    short sv;
+    int iv;
+    union { unsigned int i; float f; } uf;
+    union { unsigned long long i; double f; } ud;
+
+    for (i = 0; i < size; i++, buf += kind->size) {
+        if (PQgetisnull(self->pgres, self->row + i, col)) { return -1; }
+        s = (const unsigned char *)PQgetvalue(self->pgres, self->row + i, col);
+        len = PQgetlength(self->pgres, self->row + i, col);
+
+        /* all the values are big endian integers, of the size of the type */
+        for (u = 0, j = 0; j < len && j < 8; j++) { u = (u << 8) | s[j]; }
+
+        switch (kind->oid) {
+        case INT2OID:
+            if (len != 2) { return -1; }
+            sv = (short)u;
+            memcpy(buf, &sv, sizeof(sv));
+            break;
+        case INT4OID:
+            if (len != 4) { return -1; }
+            iv = (int)u;
+            memcpy(buf, &iv, sizeof(iv));
+            break;
+        case INT8OID:
+            if (len != 8) { return -1; }
+            ll = (long long)u;
+            memcpy(buf, &ll, sizeof(ll));
+            break;
+        case FLOAT4OID:
+            if (len != 4) { return -1; }
+            uf.i = (unsigned int)u;
+            memcpy(buf, &uf.f, sizeof(float));
+            break;
+        case FLOAT8OID:
+            if (len != 8) { return -1; }
+            ud.i = u;
+            memcpy(buf, &ud.f, sizeof(double));
+            break;
+        case BOOLOID:
+            if (len != 1) { return -1; }
+            *buf = (char)(u != 0);
+            break;
+        case DATEOID:
+            /* days since 2000-01-01, infinity as INT_MAX/INT_MIN */
+            if (len != 4) { return -1; }
+            iv = (int)u;
+            if (iv == INT_MAX || iv == INT_MIN) { return -1; }
+            ll = (long long)iv + 10957;
+            memcpy(buf, &ll, sizeof(ll));
+            break;
+        case TIMESTAMPOID:
+        case TIMESTAMPTZOID:
+            /* microseconds since 2000-01-01, infinity as LLONG_MAX/MIN */
+            if (len != 8) { return -1; }
+            ll = (long long)u;
+            if (ll == LLONG_MAX || ll == LLONG_MIN) { return -1; }
+            ll += 946684800000000LL;
+            memcpy(buf, &ll, sizeof(ll));
+            break;
+        default:
+            return -1;
+        }
+    }
+
+    return 0;
+}
+
+static PyObject *
+_curs_fetch_column(cursorObject *self, int col, int size, PyObject *numpy)
+{
+    const columnKind *kind = NULL;
+    PyObject *buf = NULL, *view = NULL, *val;
+    PyObject *rv = NULL;
+    const char *str;
+    int i, len;
+    Oid oid;
+
+    oid = PQftype(self->pgres, col);
+    for (kind = column_kinds; kind->oid; kind++) {
+        if (kind->oid == oid) { break; }
+    }
+    if (!kind->oid) { kind = NULL; }
+
+    if (kind) {
+        if (!(buf = PyByteArray_FromStringAndSize(
+                NULL, (Py_ssize_t)size * kind->size))) {
+            goto exit;
+        }
+        if (0 <= (PQfformat(self->pgres, col)
+                ? _curs_decode_column_binary(
+                    self, col, size, kind, PyByteArray_AS_STRING(buf))
+                : _curs_decode_column(
+                    self, col, size, kind, PyByteArray_AS_STRING(buf)))) {
+            if (numpy) {
+                rv = PyObject_CallMethod(
+                    numpy, "frombuffer", "Os", buf, kind->dtype);
+            }
+            else if ((view = PyMemoryView_FromObject(buf))) {
+                rv = PyObject_CallMethod(view, "cast", "s", kind->format);
+            }
+            goto exit;
+        }
+        /* nulls or values out of the native range (e.g. infinity):
+         * fall back to Python objects */
+        Dprintf("_curs_fetch_column: column %d decoded as objects", col);
+    }
+
+    if (!(rv = PyList_New(size))) { goto exit; }
+    for (i = 0; i < size; i++) {
+        if (PQgetisnull(self->pgres, self->row + i, col)) {
+            str = NULL;
+            len = 0;
+        }
+        else {
+            str = PQgetvalue(self->pgres, self->row + i, col);
+            len = PQgetlength(self->pgres, self->row + i, col);
+        }
+        if (PQfformat(self->pgres, col)) {
+            val = typecast_cast_binary(PyTuple_GET_ITEM(self->casts, col),
+                PQftype(self->pgres, col), str, len, (PyObject *)self);
+        }
+        else {
+            val = typecast_cast(PyTuple_GET_ITEM(self->casts, col),
+                str, len, (PyObject *)self);
+        }
+        if (!val) {
+            Py_CLEAR(rv);
+            goto exit;
+        }
+        PyList_SET_ITEM(rv, i, val);
+    }
+
+exit:
+    Py_XDECREF(view);
+    Py_XDECREF(buf);
+    return rv;
+}
+
+static PyObject *
+curs_fetch_columns(cursorObject *self, PyObject *args, PyObject *kwargs)
+{
+    PyObject *pynumpy = Py_None;
+    PyObject *numpy = NULL;
+    PyObject *list = NULL;
+    PyObject *col;
+    PyObject *rv = NULL;
+    int i, n, size, use;
+
+    static char *kwlist[] = {"numpy", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|O", kwlist, &pynumpy)) {
+        return NULL;
+    }
+
+    EXC_IF_CURS_CLOSED(self);
+    if (_psyco_curs_prefetch(self) < 0) return NULL;
+    EXC_IF_NO_TUPLES(self);
+
+    if (self->qname != NULL) {
+        char buffer[128];
+
+        EXC_IF_NO_MARK(self);
+        EXC_IF_ASYNC_IN_PROGRESS(self, fetch_columns);
+        EXC_IF_TPC_PREPARED(self->conn, fetch_columns);
+        PyOS_snprintf(buffer, sizeof(buffer), "FETCH FORWARD ALL FROM %s", self->qname);
+        if (pq_execute(self, buffer, 0, 0, self->withhold) == -1) { goto exit; }
+        if (_psyco_curs_prefetch(self) < 0) { goto exit; }
+    }
+
+    if (pynumpy == Py_None) {
+        if (!(numpy = PyImport_ImportModule("numpy"))) {
+            if (!PyErr_ExceptionMatches(PyExc_ImportError)) { goto exit; }
+            PyErr_Clear();
+        }
+    }
+    else {
+        if (0 > (use = PyObject_IsTrue(pynumpy))) { goto exit; }
+        if (use && !(numpy = PyImport_ImportModule("numpy"))) { goto exit; }
+    }
+
+    size = self->rowcount - self->row;
+    if (size < 0) { size = 0; }
+    n = PQnfields(self->pgres);
+
+    if (!(list = PyList_New(n))) { goto exit; }
+    for (i = 0; i < n; i++) {
+        if (!(col = _curs_fetch_column(self, i, size, numpy))) { goto exit; }
+        PyList_SET_ITEM(list, i, col);
+    }
+    self->row += size;
+
+    /* if the query was async aggresively free pgres, to allow
+       successive requests to reallocate it */
+    if (self->row >= self->rowcount
+        && self->conn->async_cursor
+        && PyWeakref_GetObject(self->conn->async_cursor) == (PyObject*)self)
+        CLEARPGRES(self->pgres);
+
+    /* success */
+    rv = list;
+    list = NULL;
+
+exit:
+    Py_XDECREF(list);
+    Py_XDECREF(numpy);
+
+    return rv;
+}
+
+
 /* callproc method - execute a stored procedure */
 
 #define curs_callproc_doc \
@@ -1433,6 +1894,7 @@ curs_copy_from(cursorObject *self, PyObject *args, PyObject *kwargs)
     EXC_IF_CURS_ASYNC(self, copy_from);
     EXC_IF_GREEN(copy_from);
     EXC_IF_TPC_PREPARED(self->conn, copy_from);
+    EXC_IF_IN_PIPELINE(self->conn, copy_from);
 
     if (!(columnlist = _psyco_curs_copy_columns(self, columns))) {
         goto exit;
@@ -1540,6 +2002,7 @@ curs_copy_to(cursorObject *self, PyObject *args, PyObject *kwargs)
     EXC_IF_CURS_ASYNC(self, copy_to);
     EXC_IF_GREEN(copy_to);
     EXC_IF_TPC_PREPARED(self->conn, copy_to);
+    EXC_IF_IN_PIPELINE(self->conn, copy_to);
 
     if (!(quoted_table_name = psyco_escape_identifier(
             self->conn, table_name, -1))) {
@@ -1629,6 +2092,7 @@ curs_copy_expert(cursorObject *self, PyObject *args, PyObject *kwargs)
     EXC_IF_CURS_ASYNC(self, copy_expert);
     EXC_IF_GREEN(copy_expert);
     EXC_IF_TPC_PREPARED(self->conn, copy_expert);
+    EXC_IF_IN_PIPELINE(self->conn, copy_expert);
 
     sql = curs_validate_sql_basic(self, sql);
 
@@ -1675,6 +2139,59 @@ exit:
     return res;
 }
 
+/* extension: copy_iter - iterate over the data of a COPY TO */
+
+#define curs_copy_iter_doc \
+"copy_iter(sql, size=8192) -> iterator -- Stream the data of a COPY TO.\n\n" \
+"Execute a ``COPY ... TO STDOUT`` statement and return an iterator\n"     \
+"yielding its data as `bytes` chunks of at least `size` bytes (except the\n" \
+"last one)."
+
+static PyObject *
+curs_copy_iter(cursorObject *self, PyObject *args, PyObject *kwargs)
+{
+    Py_ssize_t size = DEFAULT_COPYBUFF;
+    PyObject *sql, *res = NULL;
+
+    static char *kwlist[] = {"sql", "size", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs,
+        "O|n", kwlist, &sql, &size))
+    { return NULL; }
+
+    EXC_IF_CURS_CLOSED(self);
+    EXC_IF_ASYNC_IN_PROGRESS(self, copy_iter);
+    EXC_IF_GREEN(copy_iter);
+    EXC_IF_TPC_PREPARED(self->conn, copy_iter);
+    EXC_IF_IN_PIPELINE(self->conn, copy_iter);
+
+    if (size <= 0) {
+        PyErr_SetString(PyExc_ValueError, "size must be positive");
+        return NULL;
+    }
+
+    if (!(sql = curs_validate_sql_basic(self, sql))) { goto exit; }
+
+    Py_CLEAR(self->query);
+    Py_INCREF(sql);
+    self->query = sql;
+
+    /* the data is left on the connection for the iterator to read: on
+       async connections pq_fetch() is only called by poll() */
+    self->copy_stream = 1;
+    if (pq_execute(self, Bytes_AS_STRING(sql), self->conn->async, 0, 0) < 0) {
+        self->copy_stream = 0;
+        goto exit;
+    }
+
+    res = copyiter_new(self, size);
+
+exit:
+    Py_XDECREF(sql);
+
+    return res;
+}
+
 /* extension: closed - return true if cursor is closed */
 
 #define curs_closed_doc \
@@ -1716,6 +2233,34 @@ curs_withhold_set(cursorObject *self, PyObject *pyvalue)
     return 0;
 }
 
+/* extension: binary - get or set the format of the results */
+
+#define curs_binary_doc \
+"Set or return if the cursor receives the results in binary format"
+
+static PyObject *
+curs_binary_get(cursorObject *self)
+{
+    return PyBool_FromLong(self->binary);
+}
+
+static int
+curs_binary_set(cursorObject *self, PyObject *pyvalue)
+{
+    int value;
+
+    if (!pyvalue) {
+        PyErr_SetString(PyExc_AttributeError, "can't delete binary");
+        return -1;
+    }
+    if ((value = PyObject_IsTrue(pyvalue)) == -1)
+        return -1;
+
+    self->binary = value;
+
+    return 0;
+}
+
 #define curs_scrollable_doc \
 "Set or return cursor use of SCROLL"
 
@@ -1780,6 +2325,68 @@ curs_pgresult_ptr_get(cursorObject *self)
 }
 
 
+#define curs_pgresult_size_doc \
+"pgresult_size -- Memory used by the result of the last query, in bytes."
+
+static PyObject *
+curs_pgresult_size_get(cursorObject *self)
+{
+#if PG_VERSION_NUM >= 120000
+    if (self->pgres) {
+        return PyLong_FromSize_t(PQresultMemorySize(self->pgres));
+    }
+    else {
+        Py_RETURN_NONE;
+    }
+#else
+    PyErr_SetString(NotSupportedError,
+        "'pgresult_size' not available in libpq < 12");
+    return NULL;
+#endif
+}
+
+
+#define curs_rowcount_doc \
+"Number of rows read from the backend in the last command."
+
+static PyObject *
+curs_rowcount_get(cursorObject *self)
+{
+    if (_psyco_curs_pipeline_wait(self) < 0) { return NULL; }
+    return PyLong_FromLong(self->rowcount);
+}
+
+
+#define curs_description_doc \
+"Cursor description as defined in DBAPI-2.0."
+
+static PyObject *
+curs_description_get(cursorObject *self)
+{
+    PyObject *rv;
+
+    if (_psyco_curs_pipeline_wait(self) < 0) { return NULL; }
+    rv = self->description ? self->description : Py_None;
+    Py_INCREF(rv);
+    return rv;
+}
+
+
+#define curs_statusmessage_doc \
+"The return message of the last command."
+
+static PyObject *
+curs_statusmessage_get(cursorObject *self)
+{
+    PyObject *rv;
+
+    if (_psyco_curs_pipeline_wait(self) < 0) { return NULL; }
+    rv = self->pgstatus ? self->pgstatus : Py_None;
+    Py_INCREF(rv);
+    return rv;
+}
+
+
 /** the cursor object **/
 
 /* iterator protocol */
@@ -1856,6 +2463,10 @@ static struct PyMethodDef cursorObject_methods[] = {
      METH_VARARGS|METH_KEYWORDS, curs_copy_to_doc},
     {"copy_expert", (PyCFunction)curs_copy_expert,
      METH_VARARGS|METH_KEYWORDS, curs_copy_expert_doc},
+    {"copy_iter", (PyCFunction)curs_copy_iter,
+     METH_VARARGS|METH_KEYWORDS, curs_copy_iter_doc},
+    {"fetch_columns", (PyCFunction)curs_fetch_columns,
+     METH_VARARGS|METH_KEYWORDS, curs_fetch_columns_doc},
     {NULL}
 };
 
@@ -1865,15 +2476,11 @@ static struct PyMethodDef cursorObject_methods[] = {
 
 static struct PyMemberDef cursorObject_members[] = {
     /* DBAPI-2.0 basics */
-    {"rowcount", T_LONG, OFFSETOF(rowcount), READONLY,
-        "Number of rows read from the backend in the last command."},
     {"arraysize", T_LONG, OFFSETOF(arraysize), 0,
         "Number of records `fetchmany()` must fetch if not explicitly " \
         "specified."},
     {"itersize", T_LONG, OFFSETOF(itersize), 0,
         "Number of records ``iter(cur)`` must fetch per network roundtrip."},
-    {"description", T_OBJECT, OFFSETOF(description), READONLY,
-        "Cursor description as defined in DBAPI-2.0."},
     {"lastrowid", T_OID, OFFSETOF(lastoid), READONLY,
         "The ``oid`` of the last row inserted by the cursor."},
     /* DBAPI-2.0 extensions */
@@ -1882,8 +2489,6 @@ static struct PyMemberDef cursorObject_members[] = {
     {"connection", T_OBJECT, OFFSETOF(conn), READONLY,
         "The connection where the cursor comes from."},
     {"name", T_STRING, OFFSETOF(name), READONLY},
-    {"statusmessage", T_OBJECT, OFFSETOF(pgstatus), READONLY,
-        "The return message of the last command."},
     {"query", T_OBJECT, OFFSETOF(query), READONLY,
         "The last query text sent to the backend."},
     {"row_factory", T_OBJECT, OFFSETOF(tuple_factory), 0},
@@ -1896,6 +2501,14 @@ static struct PyMemberDef cursorObject_members[] = {
 
 /* object calculated member list */
 static struct PyGetSetDef cursorObject_getsets[] = {
+    /* these are plain members, unless a query result is still pending in
+     * the pipeline: in this case they wait for it */
+    { "rowcount", (getter)curs_rowcount_get, NULL,
+      curs_rowcount_doc, NULL },
+    { "description", (getter)curs_description_get, NULL,
+      curs_description_doc, NULL },
+    { "statusmessage", (getter)curs_statusmessage_get, NULL,
+      curs_statusmessage_doc, NULL },
     { "closed", (getter)curs_closed_get, NULL,
       curs_closed_doc, NULL },
     { "withhold",
@@ -1906,9 +2519,16 @@ static struct PyGetSetDef cursorObject_getsets[] = {
       (getter)curs_scrollable_get,
       (setter)curs_scrollable_set,
       curs_scrollable_doc, NULL },
+    { "binary",
+      (getter)curs_binary_get,
+      (setter)curs_binary_set,
+      curs_binary_doc, NULL },
     { "pgresult_ptr",
       (getter)curs_pgresult_ptr_get, NULL,
       curs_pgresult_ptr_doc, NULL },
+    { "pgresult_size",
+      (getter)curs_pgresult_size_get, NULL,
+      curs_pgresult_size_doc, NULL },
     {NULL}
 };
 
@@ -145,6 +145,14 @@ psyco_wait(connectionObject *conn)
  * check if there is already one using `PyErr_Occurred()` */
 PGresult *
 psyco_exec_green(connectionObject *conn, const char *command)
+{
+    return psyco_exec_green_format(conn, command, 0);
+}
+
+/* The same, requesting the result in text (0) or binary (1) format. */
+PGresult *
+psyco_exec_green_format(connectionObject *conn, const char *command,
+                        int format)
 {
     PGresult *result = NULL;
 
@@ -163,7 +171,7 @@ psyco_exec_green(connectionObject *conn, const char *command)
     }
 
     /* Send the query asynchronously */
-    if (0 == pq_send_query(conn, command)) {
+    if (0 == pq_send_query_format(conn, command, format)) {
         goto end;
     }
 
@@ -62,6 +62,8 @@ HIDDEN PyObject *psyco_get_wait_callback(PyObject *self, PyObject *obj);
 HIDDEN int psyco_green(void);
 HIDDEN int psyco_wait(connectionObject *conn);
 HIDDEN PGresult *psyco_exec_green(connectionObject *conn, const char *command);
+HIDDEN PGresult *psyco_exec_green_format(connectionObject *conn,
+                                         const char *command, int format);
 
 #define EXC_IF_GREEN(cmd) \
 if (psyco_green()) {   \
@@ -17,6 +17,7 @@
 #define PG_ATTRIBUTE_RELTYPE_OID 75
 #define PG_PROC_RELTYPE_OID 81
 #define PG_CLASS_RELTYPE_OID 83
+#define JSONOID 114
 #define POINTOID 600
 #define LSEGOID 601
 #define PATHOID 602
@@ -63,3 +64,5 @@
 #define INTERNALOID 2281
 #define OPAQUEOID 2282
 #define ANYELEMENTOID 2283
+#define UUIDOID 2950
+#define JSONBOID 3802
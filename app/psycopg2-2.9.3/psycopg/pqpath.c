@@ -259,9 +259,19 @@ pq_execute_command_locked(
     connectionObject *conn, const char *query, PyThreadState **tstate)
 {
     int pgstatus, retvalue = -1;
+    int pipeline = 0;
     Dprintf("pq_execute_command_locked: pgconn = %p, query = %s",
             conn->pgconn, query);
 
+#if PG_VERSION_NUM >= 140000
+    /* Synchronous commands are not allowed in pipeline mode: if no result is
+     * pending (the caller has synced the pipeline) leave it for the time of
+     * the command. */
+    if (conn->pipeline && PQexitPipelineMode(conn->pgconn)) {
+        pipeline = 1;
+    }
+#endif
+
     if (!psyco_green()) {
         conn_set_result(conn, PQexec(conn->pgconn, query));
     } else {
@@ -290,6 +300,11 @@ pq_execute_command_locked(
     CLEARPGRES(conn->pgres);
 
 cleanup:
+#if PG_VERSION_NUM >= 140000
+    if (pipeline) {
+        PQenterPipelineMode(conn->pgconn);
+    }
+#endif
     return retvalue;
 }
 
@@ -341,6 +356,28 @@ pq_complete_error(connectionObject *conn)
    On error, -1 is returned, and the conn->pgres argument will hold the
    relevant result structure.
  */
+/* Write in buf the command to start a transaction on conn */
+static void
+_pq_begin_command(connectionObject *conn, char *buf, size_t bufsize)
+{
+    if (conn->isolevel == ISOLATION_LEVEL_DEFAULT
+            && conn->readonly == STATE_DEFAULT
+            && conn->deferrable == STATE_DEFAULT) {
+        strcpy(buf, "BEGIN");
+    }
+    else {
+        snprintf(buf, bufsize,
+            conn->server_version >= 80000 ?
+                "BEGIN%s%s%s%s" : "BEGIN;SET TRANSACTION%s%s%s%s",
+            (conn->isolevel >= 1 && conn->isolevel <= 4)
+                ? " ISOLATION LEVEL " : "",
+            (conn->isolevel >= 1 && conn->isolevel <= 4)
+                ? srv_isolevels[conn->isolevel] : "",
+            srv_readonly[conn->readonly],
+            srv_deferrable[conn->deferrable]);
+    }
+}
+
 int
 pq_begin_locked(connectionObject *conn, PyThreadState **tstate)
 {
@@ -361,23 +398,7 @@ pq_begin_locked(connectionObject *conn, PyThreadState **tstate)
         return 0;
     }
 
-    if (conn->isolevel == ISOLATION_LEVEL_DEFAULT
-            && conn->readonly == STATE_DEFAULT
-            && conn->deferrable == STATE_DEFAULT) {
-        strcpy(buf, "BEGIN");
-    }
-    else {
-        snprintf(buf, bufsize,
-            conn->server_version >= 80000 ?
-                "BEGIN%s%s%s%s" : "BEGIN;SET TRANSACTION%s%s%s%s",
-            (conn->isolevel >= 1 && conn->isolevel <= 4)
-                ? " ISOLATION LEVEL " : "",
-            (conn->isolevel >= 1 && conn->isolevel <= 4)
-                ? srv_isolevels[conn->isolevel] : "",
-            srv_readonly[conn->readonly],
-            srv_deferrable[conn->deferrable]);
-    }
-
+    _pq_begin_command(conn, buf, bufsize);
     result = pq_execute_command_locked(conn, buf, tstate);
     if (result == 0)
         conn->status = CONN_STATUS_BEGIN;
@@ -832,11 +853,19 @@ _pq_execute_sync(cursorObject *curs, const char *query, int no_result, int no_be
     Dprintf("pq_execute: executing SYNC query: pgconn = %p", conn->pgconn);
     Dprintf("    %-.200s", query);
     if (!psyco_green()) {
-        conn_set_result(conn, PQexec(conn->pgconn, query));
+        if (!curs->binary) {
+            conn_set_result(conn, PQexec(conn->pgconn, query));
+        }
+        else {
+            /* the extended protocol allows to choose the results format */
+            conn_set_result(conn, PQexecParams(
+                conn->pgconn, query, 0, NULL, NULL, NULL, NULL, 1));
+        }
     }
     else {
         Py_BLOCK_THREADS;
-        conn_set_result(conn, psyco_exec_green(conn, query));
+        conn_set_result(conn,
+            psyco_exec_green_format(conn, query, curs->binary));
         Py_UNBLOCK_THREADS;
     }
 
@@ -894,7 +923,10 @@ _pq_execute_async(cursorObject *curs, const char *query, int no_result)
     Dprintf("pq_execute: executing ASYNC query: pgconn = %p", conn->pgconn);
     Dprintf("    %-.200s", query);
 
-    if (PQsendQuery(conn->pgconn, query) == 0) {
+    if ((curs->binary
+            ? PQsendQueryParams(
+                conn->pgconn, query, 0, NULL, NULL, NULL, NULL, 1)
+            : PQsendQuery(conn->pgconn, query)) == 0) {
         if (CONNECTION_BAD == PQstatus(conn->pgconn)) {
             conn->closed = 2;
         }
@@ -938,6 +970,71 @@ _pq_execute_async(cursorObject *curs, const char *query, int no_result)
     return 0;
 }
 
+#if PG_VERSION_NUM >= 140000
+
+/* Send a query in pipeline mode, without waiting for its result.
+
+   The cursor is appended to conn->pipeline, the list of the objects
+   waiting for a result, in the order the queries are sent (None stands for
+   a BEGIN sent by psycopg): they will get their result when the pipeline is
+   synced by pq_pipeline_sync().
+ */
+RAISES_NEG static int
+_pq_execute_pipeline(cursorObject *curs, const char *query, int no_begin)
+{
+    connectionObject *conn = curs->conn;
+    const size_t bufsize = 256;
+    char buf[256];  /* buf size must be same as bufsize */
+    int begin, sent_begin = 0, rv = 1;
+
+    CLEARPGRES(curs->pgres);
+    curs_reset(curs);
+
+    begin = (!no_begin && conn->status == CONN_STATUS_READY
+        && !(conn->autocommit && !conn->entered));
+    if (begin) {
+        _pq_begin_command(conn, buf, bufsize);
+    }
+
+    Py_BEGIN_ALLOW_THREADS;
+    pthread_mutex_lock(&(conn->lock));
+
+    Dprintf("pq_execute: queuing PIPELINE query: pgconn = %p", conn->pgconn);
+    Dprintf("    %-.200s", query);
+
+    if (begin) {
+        rv = sent_begin = PQsendQueryParams(
+            conn->pgconn, buf, 0, NULL, NULL, NULL, NULL, 0);
+    }
+    if (rv) {
+        rv = PQsendQueryParams(conn->pgconn, query, 0, NULL, NULL, NULL, NULL,
+            curs->binary ? 1 : 0);
+    }
+
+    pthread_mutex_unlock(&(conn->lock));
+    Py_END_ALLOW_THREADS;
+
+    if (sent_begin) {
+        conn->status = CONN_STATUS_BEGIN;
+        if (0 > PyList_Append(conn->pipeline, Py_None)) { return -1; }
+    }
+
+    if (!rv) {
+        if (CONNECTION_BAD == PQstatus(conn->pgconn)) {
+            conn->closed = 2;
+        }
+        PyErr_SetString(OperationalError, PQerrorMessage(conn->pgconn));
+        return -1;
+    }
+
+    if (0 > PyList_Append(conn->pipeline, (PyObject *)curs)) { return -1; }
+    curs->pipeline_pending = 1;
+
+    return 0;
+}
+
+#endif /* PG_VERSION_NUM >= 140000 */
+
 RAISES_NEG int
 pq_execute(cursorObject *curs, const char *query, int async, int no_result, int no_begin)
 {
@@ -949,6 +1046,12 @@ pq_execute(cursorObject *curs, const char *query, int async, int no_result, int
     }
     Dprintf("pq_execute: pg connection at %p OK", curs->conn->pgconn);
 
+#if PG_VERSION_NUM >= 140000
+    if (curs->conn->pipeline) {
+        return _pq_execute_pipeline(curs, query, no_begin);
+    }
+#endif
+
     if (!async) {
         return _pq_execute_sync(curs, query, no_result, no_begin);
     } else {
@@ -957,6 +1060,235 @@ pq_execute(cursorObject *curs, const char *query, int async, int no_result, int
 }
 
 
+/* pq_pipeline_enter - put the connection in pipeline mode
+
+   This function should be called while holding the global interpreter
+   lock.
+*/
+RAISES_NEG int
+pq_pipeline_enter(connectionObject *conn)
+{
+#if PG_VERSION_NUM >= 140000
+    int rv;
+
+    if (conn->pipeline) {
+        PyErr_SetString(ProgrammingError,
+            "the connection is already in pipeline mode");
+        return -1;
+    }
+    if (psyco_green()) {
+        PyErr_SetString(NotSupportedError,
+            "pipeline mode can't be used with a wait callback");
+        return -1;
+    }
+
+    if (!(conn->pipeline = PyList_New(0))) { return -1; }
+
+    Py_BEGIN_ALLOW_THREADS;
+    pthread_mutex_lock(&(conn->lock));
+    rv = PQenterPipelineMode(conn->pgconn);
+    pthread_mutex_unlock(&(conn->lock));
+    Py_END_ALLOW_THREADS;
+
+    if (!rv) {
+        Py_CLEAR(conn->pipeline);
+        PyErr_SetString(OperationalError, PQerrorMessage(conn->pgconn));
+        return -1;
+    }
+
+    return 0;
+#else
+    PyErr_SetString(NotSupportedError,
+        "pipeline mode requires libpq 14 or later");
+    return -1;
+#endif
+}
+
+/* pq_pipeline_sync - read the results of the queries in the pipeline
+
+   Send a sync point to the server and assign the results received to the
+   cursors which executed the queries. If a query fails, the following ones
+   are skipped by the server up to the sync point: the first error is raised
+   only after all the results have been read, so that the connection is left
+   in a consistent state.
+
+   This function should be called while holding the global interpreter
+   lock.
+*/
+RAISES_NEG int
+pq_pipeline_sync(connectionObject *conn)
+{
+#if PG_VERSION_NUM >= 140000
+    PyObject *queue;
+    PyObject *exc_type = NULL, *exc_value = NULL, *exc_tb = NULL;
+    PGresult **results;
+    PGresult *res;
+    Py_ssize_t i, n;
+    int ok = 1, rv = -1;
+
+    if (!conn->pipeline) {
+        PyErr_SetString(ProgrammingError,
+            "the connection is not in pipeline mode");
+        return -1;
+    }
+    if (conn->closed) {
+        PyErr_SetString(InterfaceError, "connection already closed");
+        return -1;
+    }
+
+    if (!(n = PyList_GET_SIZE(conn->pipeline))) {
+        Dprintf("pq_pipeline_sync: nothing to sync");
+        return 0;
+    }
+
+    if (!(results = PyMem_Calloc(n, sizeof(PGresult *)))) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    if (!(queue = PyList_New(0))) {
+        PyMem_Free(results);
+        return -1;
+    }
+
+    /* take the queue away from the connection: from now on the cursors in it
+     * will get a result or be reset */
+    {
+        PyObject *tmp = conn->pipeline;
+        conn->pipeline = queue;
+        queue = tmp;
+    }
+
+    Py_BEGIN_ALLOW_THREADS;
+    pthread_mutex_lock(&(conn->lock));
+
+    Dprintf("pq_pipeline_sync: reading " FORMAT_CODE_PY_SSIZE_T " results", n);
+    if (!PQpipelineSync(conn->pgconn)) {
+        ok = 0;
+    }
+    for (i = 0; ok && i < n; i++) {
+        if (!(results[i] = PQgetResult(conn->pgconn))) {
+            ok = 0;
+            break;
+        }
+        /* the result of each query is terminated by a NULL */
+        while ((res = PQgetResult(conn->pgconn))) {
+            PQclear(res);
+        }
+    }
+    if (ok) {
+        res = PQgetResult(conn->pgconn);
+        ok = (PQresultStatus(res) == PGRES_PIPELINE_SYNC);
+        PQclear(res);
+    }
+
+    Py_BLOCK_THREADS;
+    conn_notifies_process(conn);
+    conn_notice_process(conn);
+    Py_UNBLOCK_THREADS;
+
+    pthread_mutex_unlock(&(conn->lock));
+    Py_END_ALLOW_THREADS;
+
+    for (i = 0; i < n; i++) {
+        PyObject *item = PyList_GET_ITEM(queue, i);
+        cursorObject *curs;
+
+        if (item == Py_None) {
+            /* a BEGIN sent by psycopg */
+            if (results[i] && !exc_type
+                    && PQresultStatus(results[i]) == PGRES_FATAL_ERROR) {
+                pq_raise(conn, NULL, &results[i]);
+                PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+            }
+            continue;
+        }
+
+        curs = (cursorObject *)item;
+        curs->pipeline_pending = 0;
+        if (!results[i]
+                || PQresultStatus(results[i]) == PGRES_PIPELINE_ABORTED) {
+            /* skipped after an error or never executed */
+            CLEARPGRES(curs->pgres);
+            curs_reset(curs);
+            continue;
+        }
+
+        curs_set_result(curs, results[i]);
+        results[i] = NULL;
+        if (pq_fetch(curs, 0) < 0) {
+            if (!exc_type) {
+                PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+            }
+            else {
+                PyErr_Clear();
+            }
+        }
+    }
+
+    if (exc_type) {
+        PyErr_Restore(exc_type, exc_value, exc_tb);
+    }
+    else if (!ok) {
+        if (CONNECTION_BAD == PQstatus(conn->pgconn)) {
+            conn->closed = 2;
+        }
+        PyErr_SetString(OperationalError, PQerrorMessage(conn->pgconn));
+    }
+    else {
+        rv = 0;
+    }
+
+    for (i = 0; i < n; i++) {
+        PQclear(results[i]);
+    }
+    PyMem_Free(results);
+    Py_DECREF(queue);
+
+    return rv;
+#else
+    PyErr_SetString(ProgrammingError,
+        "the connection is not in pipeline mode");
+    return -1;
+#endif
+}
+
+/* pq_pipeline_exit - sync the pipeline and leave pipeline mode
+
+   This function should be called while holding the global interpreter
+   lock.
+*/
+RAISES_NEG int
+pq_pipeline_exit(connectionObject *conn)
+{
+#if PG_VERSION_NUM >= 140000
+    int rv, ok = 1;
+
+    if (!conn->pipeline) {
+        return 0;
+    }
+
+    rv = pq_pipeline_sync(conn);
+
+    if (!conn->closed) {
+        Py_BEGIN_ALLOW_THREADS;
+        pthread_mutex_lock(&(conn->lock));
+        ok = PQexitPipelineMode(conn->pgconn);
+        pthread_mutex_unlock(&(conn->lock));
+        Py_END_ALLOW_THREADS;
+    }
+    Py_CLEAR(conn->pipeline);
+
+    if (rv < 0) {
+        return -1;
+    }
+    if (!ok) {
+        PyErr_SetString(OperationalError, PQerrorMessage(conn->pgconn));
+        return -1;
+    }
+#endif
+    return 0;
+}
+
 /* send an async query to the backend.
  *
  * Return 1 if command succeeded, else 0.
@@ -965,6 +1297,13 @@ pq_execute(cursorObject *curs, const char *query, int async, int no_result, int
  */
 int
 pq_send_query(connectionObject *conn, const char *query)
+{
+    return pq_send_query_format(conn, query, 0);
+}
+
+/* the same, requesting the results in text (0) or binary (1) format */
+int
+pq_send_query_format(connectionObject *conn, const char *query, int format)
 {
     int rv;
 
@@ -972,7 +1311,14 @@ pq_send_query(connectionObject *conn, const char *query)
     Dprintf("    %-.200s", query);
 
     CLEARPGRES(conn->pgres);
-    if (0 == (rv = PQsendQuery(conn->pgconn, query))) {
+    if (!format) {
+        rv = PQsendQuery(conn->pgconn, query);
+    }
+    else {
+        rv = PQsendQueryParams(
+            conn->pgconn, query, 0, NULL, NULL, NULL, NULL, format);
+    }
+    if (0 == rv) {
         Dprintf("pq_send_query: error: %s", PQerrorMessage(conn->pgconn));
     }
 
@@ -1009,16 +1355,6 @@ _get_cast(cursorObject *curs, PGresult *pgres, int i)
     Dprintf("_pq_fetch_tuples: looking for cast %u:", ftype);
     if (!(cast = curs_get_cast(curs, type))) { goto exit; }
 
-    /* else if we got binary tuples and if we got a field that
-       is binary use the default cast
-       FIXME: what the hell am I trying to do here? This just can't work..
-    */
-    if (cast == psyco_default_binary_cast && PQbinaryTuples(pgres)) {
-        Dprintf("_pq_fetch_tuples: Binary cursor and "
-                "binary field: %u using default cast", ftype);
-        cast = psyco_default_cast;
-    }
-
     Dprintf("_pq_fetch_tuples: using cast at %p for type %u", cast, ftype);
 
     /* success */
@@ -1208,8 +1544,10 @@ _pq_copy_in_v3(cursorObject *curs)
        uses the new PQputCopyData() and can detect errors and set the correct
        exception */
     PyObject *o, *func = NULL, *size = NULL;
+    Py_buffer view;
+    const char *data;
     Py_ssize_t length = 0;
-    int res, error = 0;
+    int res, error = 0, has_view;
 
     if (!curs->copyfile) {
         PyErr_SetString(ProgrammingError,
@@ -1248,25 +1586,45 @@ _pq_copy_in_v3(cursorObject *curs)
             o = tmp;
         }
 
-        if (!Bytes_Check(o)) {
+        /* besides bytes, accept any buffer (bytearray, memoryview...)
+         * so that the reader can hand over its data without copying it */
+        has_view = 0;
+        if (Bytes_Check(o)) {
+            data = Bytes_AS_STRING(o);
+            length = Bytes_GET_SIZE(o);
+        }
+        else if (PyObject_CheckBuffer(o)) {
+            if (0 > PyObject_GetBuffer(o, &view, PyBUF_SIMPLE)) {
+                Dprintf("_pq_copy_in_v3: can't get buffer from %s",
+                    Py_TYPE(o)->tp_name);
+                error = 1;
+                break;
+            }
+            has_view = 1;
+            data = (const char *)view.buf;
+            length = view.len;
+        }
+        else {
             Dprintf("_pq_copy_in_v3: got %s instead of bytes",
                 Py_TYPE(o)->tp_name);
             error = 1;
             break;
         }
 
-        if (0 == (length = Bytes_GET_SIZE(o))) {
+        if (0 == length) {
+            if (has_view) { PyBuffer_Release(&view); }
             break;
         }
         if (length > INT_MAX) {
             Dprintf("_pq_copy_in_v3: bad length: " FORMAT_CODE_PY_SSIZE_T,
                 length);
+            if (has_view) { PyBuffer_Release(&view); }
             error = 1;
             break;
         }
 
         Py_BEGIN_ALLOW_THREADS;
-        res = PQputCopyData(curs->conn->pgconn, Bytes_AS_STRING(o),
+        res = PQputCopyData(curs->conn->pgconn, data,
             /* Py_ssize_t->int cast was validated above */
             (int) length);
         Dprintf("_pq_copy_in_v3: sent " FORMAT_CODE_PY_SSIZE_T " bytes of data; res = %d",
@@ -1283,6 +1641,8 @@ _pq_copy_in_v3(cursorObject *curs)
         }
         Py_END_ALLOW_THREADS;
 
+        if (has_view) { PyBuffer_Release(&view); }
+
         if (error == 2) break;
 
         Py_DECREF(o);
@@ -1441,6 +1801,148 @@ exit:
     return ret;
 }
 
+/* Read the data of a COPY TO started by cursor.copy_iter().
+
+   Append the COPY data rows to *buffer (*bufsize bytes allocated, *buflen
+   used), reallocating it if needed, until at least size bytes are available.
+   In async mode don't block: read what is available on the socket.
+
+   Return 1 if the buffer is full, 2 if the COPY data is finished, 0 if no
+   more data is available for now (only in async mode), -1 on error.
+ */
+RAISES_NEG int
+pq_copy_read(cursorObject *curs, char **buffer, Py_ssize_t *buflen,
+             Py_ssize_t *bufsize, Py_ssize_t size, int async)
+{
+    connectionObject *conn = curs->conn;
+    char *row, *tmp;
+    Py_ssize_t newsize;
+    int len, nomem = 0;
+
+    Py_BEGIN_ALLOW_THREADS;
+    pthread_mutex_lock(&conn->lock);
+
+    if (async && !PQconsumeInput(conn->pgconn)) {
+        len = -2;
+    }
+    else {
+        while ((len = PQgetCopyData(conn->pgconn, &row, async)) > 0) {
+            if (*buflen + len > *bufsize) {
+                newsize = *bufsize ? *bufsize : size;
+                while (newsize < *buflen + len) { newsize *= 2; }
+                if (!(tmp = PyMem_RawRealloc(*buffer, newsize))) {
+                    PQfreemem(row);
+                    nomem = 1;
+                    break;
+                }
+                *buffer = tmp;
+                *bufsize = newsize;
+            }
+            memcpy(*buffer + *buflen, row, len);
+            *buflen += len;
+            PQfreemem(row);
+            if (*buflen >= size) { break; }
+        }
+    }
+
+    pthread_mutex_unlock(&conn->lock);
+    Py_END_ALLOW_THREADS;
+
+    Dprintf("pq_copy_read: len = %d, buflen = " FORMAT_CODE_PY_SSIZE_T,
+        len, *buflen);
+
+    if (nomem) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    if (len == -2) {
+        pq_raise(conn, curs, NULL);
+        return -1;
+    }
+    return len > 0 ? 1 : len == 0 ? 0 : 2;
+}
+
+/* Read the results of a COPY TO after its data was consumed.
+
+   Set the cursor rowcount and raise an exception if the COPY failed.
+   In async mode return 0 if the results are not available yet.
+ */
+RAISES_NEG int
+pq_copy_read_result(cursorObject *curs, int async)
+{
+    PGconn *pgconn = curs->conn->pgconn;
+
+    for (;;) {
+        if (async) {
+            if (!PQconsumeInput(pgconn)) {
+                pq_raise(curs->conn, curs, NULL);
+                return -1;
+            }
+            if (PQisBusy(pgconn)) { return 0; }
+        }
+
+        Py_BEGIN_ALLOW_THREADS;
+        curs_set_result(curs, PQgetResult(pgconn));
+        Py_END_ALLOW_THREADS;
+
+        if (NULL == curs->pgres) { break; }
+        _read_rowcount(curs);
+        if (PQresultStatus(curs->pgres) == PGRES_FATAL_ERROR) {
+            pq_raise(curs->conn, curs, NULL);
+            pq_clear_async(curs->conn);
+            return -1;
+        }
+        CLEARPGRES(curs->pgres);
+    }
+    return 1;
+}
+
+/* Stop a COPY TO started by cursor.copy_iter() before the end of its data.
+
+   The command is cancelled and the data already sent by the server
+   discarded; within a transaction, the transaction is left in error state.
+ */
+RAISES_NEG int
+pq_copy_cancel(cursorObject *curs)
+{
+    connectionObject *conn = curs->conn;
+    PGresult *pgres;
+    char errbuf[256];
+    char *row;
+    int len, rv = 0;
+
+    Dprintf("pq_copy_cancel: cancelling with key %p", conn->cancel);
+
+    Py_BEGIN_ALLOW_THREADS;
+    pthread_mutex_lock(&conn->lock);
+
+    if (PQcancel(conn->cancel, errbuf, sizeof(errbuf)) == 0) {
+        Dprintf("pq_copy_cancel: cancelling failed: %s", errbuf);
+        rv = -1;
+    }
+    while ((len = PQgetCopyData(conn->pgconn, &row, 0)) > 0) {
+        PQfreemem(row);
+    }
+    /* the cancel error is expected: drop it with the other results */
+    while ((pgres = PQgetResult(conn->pgconn))) {
+        PQclear(pgres);
+    }
+
+    pthread_mutex_unlock(&conn->lock);
+    Py_END_ALLOW_THREADS;
+
+    conn_notice_process(conn);
+
+    if (rv < 0) {
+        PyErr_SetString(OperationalError, errbuf);
+    }
+    else if (len == -2) {
+        pq_raise(conn, NULL, NULL);
+        rv = -1;
+    }
+    return rv;
+}
+
 /* Tries to read the next message from the replication stream, without
    blocking, in both sync and async connection modes.  If no message
    is ready in the CopyData buffer, tries to read from the server,
@@ -1730,9 +2232,11 @@ int
 pq_fetch(cursorObject *curs, int no_result)
 {
     int pgstatus, ex = -1;
+    int copy_stream = curs->copy_stream;
 
     /* even if we fail, we remove any information about the previous query */
     curs_reset(curs);
+    curs->copy_stream = 0;
 
     if (curs->pgres == NULL) return 0;
 
@@ -1760,6 +2264,12 @@ pq_fetch(cursorObject *curs, int no_result)
     case PGRES_COPY_OUT:
         Dprintf("pq_fetch: data from a COPY TO (no tuples)");
         curs->rowcount = -1;
+        if (copy_stream) {
+            /* The data will be read by the copy_iter() iterator: keep the
+               result to let it know that the COPY started. */
+            ex = 0;
+            break;
+        }
         ex = _pq_copy_out_v3(curs);
         /* error caught by out glorious notice handler */
         if (PyErr_Occurred()) ex = -1;
@@ -40,6 +40,11 @@ RAISES_NEG HIDDEN int pq_fetch(cursorObject *curs, int no_result);
 RAISES_NEG HIDDEN int pq_execute(cursorObject *curs, const char *query,
                                  int async, int no_result, int no_begin);
 HIDDEN int pq_send_query(connectionObject *conn, const char *query);
+HIDDEN int pq_send_query_format(connectionObject *conn, const char *query,
+                                int format);
+RAISES_NEG HIDDEN int pq_pipeline_enter(connectionObject *conn);
+RAISES_NEG HIDDEN int pq_pipeline_sync(connectionObject *conn);
+RAISES_NEG HIDDEN int pq_pipeline_exit(connectionObject *conn);
 HIDDEN int pq_begin_locked(connectionObject *conn, PyThreadState **tstate);
 HIDDEN int pq_commit(connectionObject *conn);
 RAISES_NEG HIDDEN int pq_abort_locked(connectionObject *conn,
@@ -59,6 +64,12 @@ HIDDEN int pq_flush(connectionObject *conn);
 HIDDEN void pq_clear_async(connectionObject *conn);
 RAISES_NEG HIDDEN int pq_set_non_blocking(connectionObject *conn, int arg);
 
+RAISES_NEG HIDDEN int pq_copy_read(cursorObject *curs, char **buffer,
+                                   Py_ssize_t *buflen, Py_ssize_t *bufsize,
+                                   Py_ssize_t size, int async);
+RAISES_NEG HIDDEN int pq_copy_read_result(cursorObject *curs, int async);
+RAISES_NEG HIDDEN int pq_copy_cancel(cursorObject *curs);
+
 HIDDEN void pq_set_critical(connectionObject *conn, const char *msg);
 
 HIDDEN int pq_execute_command_locked(connectionObject *conn, const char *query,
@@ -34,6 +34,7 @@
 #include "psycopg/replication_message.h"
 #include "psycopg/green.h"
 #include "psycopg/column.h"
+#include "psycopg/copyiter.h"
 #include "psycopg/lobject.h"
 #include "psycopg/notify.h"
 #include "psycopg/xid.h"
@@ -853,6 +854,7 @@ static struct {
     { "ISQLQuote", &isqlquoteType },
     { "Column", &columnType },
     { "Notify", &notifyType },
+    { "CopyIterator", &copyIterType },
     { "Xid", &xidType },
     { "ConnectionInfo", &connInfoType },
     { "Diagnostics", &diagnosticsType },
@@ -167,6 +167,7 @@ typecast_parse_time(const char* s, const char** t, Py_ssize_t* len,
 #include "psycopg/typecast_binary.c"
 #include "psycopg/typecast_datetime.c"
 #include "psycopg/typecast_array.c"
+#include "psycopg/typecast_recv.c"
 
 static long int typecast_default_DEFAULT[] = {0};
 static typecastObject_initlist typecast_default = {
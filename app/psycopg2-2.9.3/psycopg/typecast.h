@@ -88,4 +88,8 @@ HIDDEN PyObject *typecast_array_from_python(
 HIDDEN PyObject *typecast_cast(
     PyObject *self, const char *str, Py_ssize_t len, PyObject *curs);
 
+/* the same, for values received in binary format */
+HIDDEN PyObject *typecast_cast_binary(
+    PyObject *self, Oid oid, const char *str, Py_ssize_t len, PyObject *curs);
+
 #endif /* !defined(PSYCOPG_TYPECAST_H) */
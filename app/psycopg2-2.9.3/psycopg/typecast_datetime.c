@@ -39,6 +39,211 @@ typecast_datetime_init(void)
     return 0;
 }
 
+/* Cache of the tzinfo objects returned by the cursors tzinfo_factory.
+ *
+ * The factory is called only once per UTC offset and the object returned is
+ * shared by all the values with the same offset: datetime.timezone and
+ * FixedOffsetTimezone objects are immutable. Each of the last TZCACHE_SLOTS
+ * factories used gets a slot: a weak reference to the factory and a dict
+ * {offset in seconds: tzinfo}. A new factory takes the slot of a dead one or
+ * evicts the slots in turn, so short-lived factories (closures, per-cursor
+ * objects) are neither kept alive nor accumulated. The last object returned
+ * is also kept at hand, as the values in a column usually have the same
+ * offset.
+ */
+#define TZCACHE_SLOTS 8
+
+/* Don't grow a factory cache beyond this number of offsets */
+#define TZCACHE_MAX_SIZE 1000
+
+typedef struct {
+    PyObject *factory;      /* weak reference, NULL if the slot is unused */
+    PyObject *tzinfos;      /* dict offset -> tzinfo */
+} tzcache_slot;
+
+static tzcache_slot tzcache[TZCACHE_SLOTS];
+static int tzcache_next = 0;                    /* next slot to evict */
+static tzcache_slot *tzcache_last_slot = NULL;
+static PyObject *tzcache_last = NULL;           /* borrowed from its slot */
+static int tzcache_last_offset = 0;
+
+/* Return the cache slot of a factory, creating it if needed.
+ *
+ * Return a borrowed reference. Return NULL without an exception set if the
+ * factory can't be weakly referenced (then it's not cached), NULL with an
+ * exception set on error. */
+static tzcache_slot *
+typecast_tzcache_slot(PyObject *factory)
+{
+    tzcache_slot *slot = NULL;
+    PyObject *ref, *tzinfos, *oldref, *oldtzinfos;
+    int i;
+
+    for (i = 0; i < TZCACHE_SLOTS; i++) {
+        if (tzcache[i].factory
+                && PyWeakref_GET_OBJECT(tzcache[i].factory) == factory) {
+            return &tzcache[i];
+        }
+        if (!slot && (!tzcache[i].factory
+                || PyWeakref_GET_OBJECT(tzcache[i].factory) == Py_None)) {
+            slot = &tzcache[i];     /* unused or dead: reuse it */
+        }
+    }
+    if (!slot) {
+        slot = &tzcache[tzcache_next];
+        tzcache_next = (tzcache_next + 1) % TZCACHE_SLOTS;
+    }
+
+    if (!(ref = PyWeakref_NewRef(factory, NULL))) {
+        if (PyErr_ExceptionMatches(PyExc_TypeError)) { PyErr_Clear(); }
+        return NULL;
+    }
+    if (!(tzinfos = PyDict_New())) {
+        Py_DECREF(ref);
+        return NULL;
+    }
+
+    if (slot == tzcache_last_slot) { tzcache_last_slot = NULL; }
+    oldref = slot->factory;
+    oldtzinfos = slot->tzinfos;
+    slot->factory = ref;
+    slot->tzinfos = tzinfos;
+    /* Released last: their destructors may run Python code */
+    Py_XDECREF(oldref);
+    Py_XDECREF(oldtzinfos);
+    return slot;
+}
+
+/* Return the tzinfo for an offset of tzsec seconds from UTC.
+ *
+ * Return a new reference, NULL with an exception set on error. */
+static PyObject *
+typecast_tzinfo(PyObject *factory, int tzsec)
+{
+    tzcache_slot *slot;
+    PyObject *key = NULL, *tzoff = NULL, *rv = NULL;
+
+    if (tzcache_last_slot && tzsec == tzcache_last_offset
+            && PyWeakref_GET_OBJECT(tzcache_last_slot->factory) == factory) {
+        Py_INCREF(tzcache_last);
+        return tzcache_last;
+    }
+
+    if (!(slot = typecast_tzcache_slot(factory))) {
+        if (PyErr_Occurred()) { goto exit; }
+        /* not weakly referenceable: just call it */
+        if (!(tzoff = PyDelta_FromDSU(0, tzsec, 0))) { goto exit; }
+        rv = PyObject_CallFunctionObjArgs(factory, tzoff, NULL);
+        goto exit;
+    }
+
+    if (!(key = PyLong_FromLong(tzsec))) { goto exit; }
+    if ((rv = PyDict_GetItemWithError(slot->tzinfos, key))) {
+        Py_INCREF(rv);
+    }
+    else {
+        if (PyErr_Occurred()) { goto exit; }
+        if (!(tzoff = PyDelta_FromDSU(0, tzsec, 0))) { goto exit; }
+        if (!(rv = PyObject_CallFunctionObjArgs(factory, tzoff, NULL))) {
+            goto exit;
+        }
+        /* The factory may have used the cache, evicting the slot */
+        if (PyWeakref_GET_OBJECT(slot->factory) != factory) { goto exit; }
+        if (PyDict_GET_SIZE(slot->tzinfos) >= TZCACHE_MAX_SIZE) { goto exit; }
+        if (0 > PyDict_SetItem(slot->tzinfos, key, rv)) {
+            Py_CLEAR(rv);
+            goto exit;
+        }
+    }
+
+    tzcache_last_slot = slot;
+    tzcache_last_offset = tzsec;
+    tzcache_last = rv;
+
+exit:
+    Py_XDECREF(tzoff);
+    Py_XDECREF(key);
+    return rv;
+}
+
+#define ISDIGIT(c) ((unsigned)((c) - '0') < 10)
+#define DIGITS2(s) (((s)[0] - '0') * 10 + ((s)[1] - '0'))
+
+/* Parse a timestamp in the format returned by PostgreSQL in ISO DateStyle:
+ * YYYY-MM-DD HH:MM:SS[.US][+HH[:MM[:SS]]]
+ *
+ * Return 5 if the timezone was found, 3 if not (as typecast_parse_time()
+ * does), -1 if the string has a different format (e.g. years after 9999 or
+ * BC dates) and must be parsed by the generic functions.
+ */
+static int
+_parse_iso_timestamp(const char *s, Py_ssize_t len,
+    int *y, int *m, int *d, int *hh, int *mm, int *ss, int *us, int *tzsec)
+{
+    const char *end = s + len;
+    int i, tzsign, tzhh, tzmm = 0, tzss = 0, rv = 3;
+
+    if (len < 19 || s[4] != '-' || s[7] != '-' || s[10] != ' '
+            || s[13] != ':' || s[16] != ':') {
+        return -1;
+    }
+    for (i = 0; i < 19; i++) {
+        if (i == 4 || i == 7 || i == 10 || i == 13 || i == 16) { continue; }
+        if (!ISDIGIT(s[i])) { return -1; }
+    }
+
+    *y = DIGITS2(s) * 100 + DIGITS2(s + 2);
+    *m = DIGITS2(s + 5);
+    *d = DIGITS2(s + 8);
+    *hh = DIGITS2(s + 11);
+    *mm = DIGITS2(s + 14);
+    *ss = DIGITS2(s + 17);
+    *us = 0;
+    *tzsec = 0;
+    s += 19;
+
+    if (s < end && *s == '.') {
+        int usd = 0;
+        for (s++; s < end && ISDIGIT(*s); s++) {
+            if (++usd > 6) { return -1; }
+            *us = *us * 10 + (*s - '0');
+        }
+        if (!usd) { return -1; }
+        while (usd++ < 6) { *us *= 10; }
+    }
+
+    if (s == end) {
+        goto done;
+    }
+
+    if (*s != '+' && *s != '-') { return -1; }
+    tzsign = (*s == '-') ? -1 : 1;
+    if (end - s < 3 || !ISDIGIT(s[1]) || !ISDIGIT(s[2])) { return -1; }
+    tzhh = DIGITS2(s + 1);
+    s += 3;
+    if (s < end) {
+        if (end - s < 3 || s[0] != ':' || !ISDIGIT(s[1]) || !ISDIGIT(s[2])) {
+            return -1;
+        }
+        tzmm = DIGITS2(s + 1);
+        s += 3;
+    }
+    if (s < end) {
+        if (end - s != 3 || s[0] != ':' || !ISDIGIT(s[1]) || !ISDIGIT(s[2])) {
+            return -1;
+        }
+        tzss = DIGITS2(s + 1);
+    }
+    *tzsec = tzsign * (3600 * tzhh + 60 * tzmm + tzss);
+    rv = 5;
+
+done:
+    /* 24:00:00 -> 00:00:00 (ticket #278) */
+    if (*hh == 24) { *hh = 0; }
+
+    return rv;
+}
+
 /** DATE - cast a date into a date python object **/
 
 static PyObject *
@@ -104,13 +309,7 @@ _parse_inftz(const char *str, PyObject *curs)
     }
 
 #if defined(PYPY_VERSION) || PY_VERSION_HEX < 0x03070000
-    {
-        PyObject *tzoff;
-        if (!(tzoff = PyDelta_FromDSU(0, 0, 0))) { goto exit; }
-        tzinfo = PyObject_CallFunctionObjArgs(tzinfo_factory, tzoff, NULL);
-        Py_DECREF(tzoff);
-        if (!tzinfo) { goto exit; }
-    }
+    if (!(tzinfo = typecast_tzinfo(tzinfo_factory, 0))) { goto exit; }
 #else
     tzinfo = PyDateTime_TimeZone_UTC;
     Py_INCREF(tzinfo);
@@ -137,7 +336,6 @@ static PyObject *
 _parse_noninftz(const char *str, Py_ssize_t len, PyObject *curs)
 {
     PyObject* rv = NULL;
-    PyObject *tzoff = NULL;
     PyObject *tzinfo = NULL;
     PyObject *tzinfo_factory;
     int n, y=0, m=0, d=0;
@@ -145,26 +343,31 @@ _parse_noninftz(const char *str, Py_ssize_t len, PyObject *curs)
     const char *tp = NULL;
 
     Dprintf("typecast_PYDATETIMETZ_cast: s = %s", str);
-    n = typecast_parse_date(str, &tp, &len, &y, &m, &d);
-    Dprintf("typecast_PYDATE_cast: tp = %p "
-            "n = %d, len = " FORMAT_CODE_PY_SSIZE_T ","
-            " y = %d, m = %d, d = %d",
-             tp, n, len, y, m, d);
-    if (n != 3) {
-        PyErr_SetString(DataError, "unable to parse date");
-        goto exit;
-    }
 
-    if (len > 0) {
-        n = typecast_parse_time(tp, NULL, &len, &hh, &mm, &ss, &us, &tzsec);
-        Dprintf("typecast_PYDATETIMETZ_cast: n = %d,"
-            " len = " FORMAT_CODE_PY_SSIZE_T ","
-            " hh = %d, mm = %d, ss = %d, us = %d, tzsec = %d",
-            n, len, hh, mm, ss, us, tzsec);
-        if (n < 3 || n > 6) {
-            PyErr_SetString(DataError, "unable to parse time");
+    /* fast path for the format returned by the server */
+    n = _parse_iso_timestamp(str, len, &y, &m, &d, &hh, &mm, &ss, &us, &tzsec);
+    if (n < 0) {
+        n = typecast_parse_date(str, &tp, &len, &y, &m, &d);
+        Dprintf("typecast_PYDATE_cast: tp = %p "
+                "n = %d, len = " FORMAT_CODE_PY_SSIZE_T ","
+                " y = %d, m = %d, d = %d",
+                 tp, n, len, y, m, d);
+        if (n != 3) {
+            PyErr_SetString(DataError, "unable to parse date");
             goto exit;
         }
+
+        if (len > 0) {
+            n = typecast_parse_time(tp, NULL, &len, &hh, &mm, &ss, &us, &tzsec);
+            Dprintf("typecast_PYDATETIMETZ_cast: n = %d,"
+                " len = " FORMAT_CODE_PY_SSIZE_T ","
+                " hh = %d, mm = %d, ss = %d, us = %d, tzsec = %d",
+                n, len, hh, mm, ss, us, tzsec);
+            if (n < 3 || n > 6) {
+                PyErr_SetString(DataError, "unable to parse time");
+                goto exit;
+            }
+        }
     }
 
     if (ss > 59) {
@@ -183,9 +386,7 @@ _parse_noninftz(const char *str, Py_ssize_t len, PyObject *curs)
          * of minutes, so round the seconds to the closest minute */
         tzsec = 60 * (int)round(tzsec / 60.0);
 #endif
-        if (!(tzoff = PyDelta_FromDSU(0, tzsec, 0))) { goto exit; }
-        if (!(tzinfo = PyObject_CallFunctionObjArgs(
-                tzinfo_factory, tzoff, NULL))) {
+        if (!(tzinfo = typecast_tzinfo(tzinfo_factory, tzsec))) {
             goto exit;
         }
     }
@@ -197,12 +398,10 @@ _parse_noninftz(const char *str, Py_ssize_t len, PyObject *curs)
     Dprintf("typecast_PYDATETIMETZ_cast: tzinfo: %p, refcnt = "
         FORMAT_CODE_PY_SSIZE_T,
         tzinfo, Py_REFCNT(tzinfo));
-    rv = PyObject_CallFunction(
-        (PyObject*)PyDateTimeAPI->DateTimeType, "iiiiiiiO",
-        y, m, d, hh, mm, ss, us, tzinfo);
+    rv = PyDateTimeAPI->DateTime_FromDateAndTime(
+        y, m, d, hh, mm, ss, us, tzinfo, PyDateTimeAPI->DateTimeType);
 
 exit:
-    Py_XDECREF(tzoff);
     Py_XDECREF(tzinfo);
     return rv;
 }
@@ -244,7 +443,6 @@ static PyObject *
 typecast_PYTIME_cast(const char *str, Py_ssize_t len, PyObject *curs)
 {
     PyObject* rv = NULL;
-    PyObject *tzoff = NULL;
     PyObject *tzinfo = NULL;
     PyObject *tzinfo_factory;
     int n, hh=0, mm=0, ss=0, us=0, tzsec=0;
@@ -275,8 +473,7 @@ typecast_PYTIME_cast(const char *str, Py_ssize_t len, PyObject *curs)
          * of minutes, so round the seconds to the closest minute */
         tzsec = 60 * (int)round(tzsec / 60.0);
 #endif
-        if (!(tzoff = PyDelta_FromDSU(0, tzsec, 0))) { goto exit; }
-        if (!(tzinfo = PyObject_CallFunctionObjArgs(tzinfo_factory, tzoff, NULL))) {
+        if (!(tzinfo = typecast_tzinfo(tzinfo_factory, tzsec))) {
             goto exit;
         }
     }
@@ -289,7 +486,6 @@ typecast_PYTIME_cast(const char *str, Py_ssize_t len, PyObject *curs)
                                 hh, mm, ss, us, tzinfo);
 
 exit:
-    Py_XDECREF(tzoff);
     Py_XDECREF(tzinfo);
     return rv;
 }
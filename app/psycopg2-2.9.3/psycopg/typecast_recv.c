@@ -0,0 +1,388 @@
+/* typecast_recv.c - typecasting of values received in binary format
+ *
+ * Copyright (C) 2020-2021 The Psycopg Team
+ *
+ * This file is part of psycopg.
+ *
+ * psycopg2 is free software: you can redistribute it and/or modify it
+ * under the terms of the GNU Lesser General Public License as published
+ * by the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * In addition, as a special exception, the copyright holders give
+ * permission to link this program with the OpenSSL library (or with
+ * modified versions of OpenSSL that use the same license as OpenSSL),
+ * and distribute linked combinations including the two.
+ *
+ * You must obey the GNU Lesser General Public License in all respects for
+ * all of the code used other than OpenSSL.
+ *
+ * psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+ * ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+ * FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+ * License for more details.
+ */
+
+/* Values of the most common types are decoded directly into Python objects
+ * if the column uses the builtin typecaster for the type. Otherwise the
+ * value is converted to its text representation and passed to the
+ * typecaster, so that the typecasters registered by the user keep working.
+ */
+
+#include "psycopg/pgtypes.h"
+
+#include <math.h>
+
+/* days and microseconds between 1970-01-01 and 2000-01-01 */
+#define RECV_EPOCH_DAYS 10957
+#define RECV_USECS_PER_DAY 86400000000LL
+
+static PY_LONG_LONG
+recv_int8(const char *s)
+{
+    const unsigned char *u = (const unsigned char *)s;
+    unsigned PY_LONG_LONG rv = 0;
+    int i;
+
+    for (i = 0; i < 8; i++) {
+        rv = (rv << 8) | u[i];
+    }
+    return (PY_LONG_LONG)rv;
+}
+
+static int
+recv_int4(const char *s)
+{
+    const unsigned char *u = (const unsigned char *)s;
+    return (int)(((unsigned int)u[0] << 24) | ((unsigned int)u[1] << 16)
+        | ((unsigned int)u[2] << 8) | (unsigned int)u[3]);
+}
+
+static int
+recv_int2(const char *s)
+{
+    const unsigned char *u = (const unsigned char *)s;
+    return (short)((u[0] << 8) | u[1]);
+}
+
+/* convert a number of days since 1970-01-01 into a proleptic gregorian
+ * date (http://howardhinnant.github.io/date_algorithms.html) */
+static void
+recv_civil_from_days(PY_LONG_LONG z, int *y, int *m, int *d)
+{
+    PY_LONG_LONG era, doe, yoe, doy, mp;
+
+    z += 719468;
+    era = (z >= 0 ? z : z - 146096) / 146097;
+    doe = z - era * 146097;
+    yoe = (doe - doe / 1460 + doe / 36524 - doe / 146096) / 365;
+    doy = doe - (365 * yoe + yoe / 4 - yoe / 100);
+    mp = (5 * doy + 2) / 153;
+    *d = (int)(doy - (153 * mp + 2) / 5 + 1);
+    *m = (int)(mp < 10 ? mp + 3 : mp - 9);
+    *y = (int)(yoe + era * 400 + (*m <= 2));
+}
+
+/* split microseconds since 2000-01-01 into date and time of the day */
+static void
+recv_split_timestamp(PY_LONG_LONG usecs, int *y, int *m, int *d,
+                     int *hh, int *mm, int *ss, int *us)
+{
+    PY_LONG_LONG days, t;
+
+    days = usecs / RECV_USECS_PER_DAY;
+    t = usecs % RECV_USECS_PER_DAY;
+    if (t < 0) {
+        t += RECV_USECS_PER_DAY;
+        days -= 1;
+    }
+    recv_civil_from_days(days + RECV_EPOCH_DAYS, y, m, d);
+    *us = (int)(t % 1000000); t /= 1000000;
+    *ss = (int)(t % 60); t /= 60;
+    *mm = (int)(t % 60);
+    *hh = (int)(t / 60);
+}
+
+/* format a date in ISO format, BC dates included */
+static int
+recv_format_date(char *buf, size_t size, int y, int m, int d)
+{
+    if (y > 0) {
+        return PyOS_snprintf(buf, size, "%04d-%02d-%02d", y, m, d);
+    }
+    else {
+        return PyOS_snprintf(buf, size, "%04d-%02d-%02d BC", 1 - y, m, d);
+    }
+}
+
+/* format a binary numeric as text: the value is a sequence of int16:
+ * ndigits, weight, sign, dscale, followed by ndigits base 10000 digits.
+ * Return a string to free with PyMem_Free(), NULL with exception on error */
+static char *
+recv_numeric_as_text(const char *s, Py_ssize_t len)
+{
+    int ndigits, weight, sign, dscale, i, d, idx;
+    char *buf, *p;
+    size_t size;
+
+    if (len < 8) { goto error; }
+    ndigits = recv_int2(s);
+    weight = recv_int2(s + 2);
+    sign = recv_int2(s + 4) & 0xFFFF;
+    dscale = recv_int2(s + 6) & 0xFFFF;
+    if (ndigits < 0 || len != 8 + 2 * ndigits) { goto error; }
+
+    size = 32 + (weight > 0 ? (size_t)weight * 4 : 0) + (size_t)dscale;
+    if (!(buf = p = PyMem_Malloc(size))) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+
+    switch (sign) {
+    case 0xC000: strcpy(p, "NaN"); return buf;
+    case 0xD000: strcpy(p, "Infinity"); return buf;
+    case 0xF000: strcpy(p, "-Infinity"); return buf;
+    case 0x4000: *p++ = '-'; break;
+    }
+
+    if (weight < 0) {
+        *p++ = '0';
+    }
+    for (i = 0; i <= weight; i++) {
+        d = i < ndigits ? recv_int2(s + 8 + 2 * i) : 0;
+        p += sprintf(p, i == 0 ? "%d" : "%04d", d);
+    }
+    if (dscale > 0) {
+        *p++ = '.';
+        for (i = 0; i < dscale; i += 4) {
+            idx = weight + 1 + i / 4;
+            d = (idx >= 0 && idx < ndigits) ? recv_int2(s + 8 + 2 * idx) : 0;
+            sprintf(p + i, "%04d", d);
+        }
+        p += dscale;
+    }
+    *p = '\0';
+    return buf;
+
+error:
+    PyErr_SetString(DataError, "bad binary numeric value");
+    return NULL;
+}
+
+static PyObject *
+recv_cast_text(PyObject *obj, const char *str, PyObject *curs)
+{
+    return typecast_cast(obj, str, strlen(str), curs);
+}
+
+static PyObject *
+recv_tzinfo_utc(PyObject *curs)
+{
+    PyObject *tzinfo_factory;
+
+    tzinfo_factory = ((cursorObject *)curs)->tzinfo_factory;
+    if (tzinfo_factory == Py_None) {
+        Py_RETURN_NONE;
+    }
+#if !(defined(PYPY_VERSION) || PY_VERSION_HEX < 0x03070000)
+    /* the default factory is datetime.timezone: use its UTC singleton */
+    if (tzinfo_factory == (PyObject *)Py_TYPE(PyDateTime_TimeZone_UTC)) {
+        Py_INCREF(PyDateTime_TimeZone_UTC);
+        return PyDateTime_TimeZone_UTC;
+    }
+#endif
+    return typecast_tzinfo(tzinfo_factory, 0);
+}
+
+/* Decode a value of type oid received in binary format.
+ *
+ * Raise NotSupportedError for types without a binary decoder.
+ */
+PyObject *
+typecast_cast_binary(PyObject *obj, Oid oid, const char *str, Py_ssize_t len,
+                     PyObject *curs)
+{
+    typecast_function ccast = ((typecastObject *)obj)->ccast;
+    char buf[64];
+    PY_LONG_LONG ll;
+    double dd;
+    int y, m, d, hh, mm, ss, us, i;
+    PyObject *tzinfo, *rv;
+    char *text;
+
+    if (str == NULL) {
+        return typecast_cast(obj, NULL, 0, curs);
+    }
+
+    switch (oid) {
+
+    /* the binary representation of these types is the text one */
+    case TEXTOID:
+    case VARCHAROID:
+    case BPCHAROID:
+    case NAMEOID:
+    case CHAROID:
+    case UNKNOWNOID:
+    case JSONOID:
+        return typecast_cast(obj, str, len, curs);
+
+    case JSONBOID:
+        if (len < 1 || str[0] != 1) { break; }
+        return typecast_cast(obj, str + 1, len - 1, curs);
+
+    case BOOLOID:
+        if (len != 1) { break; }
+        if (ccast == typecast_BOOLEAN_cast) {
+            return PyBool_FromLong(str[0]);
+        }
+        return recv_cast_text(obj, str[0] ? "t" : "f", curs);
+
+    case INT2OID:
+    case INT4OID:
+    case INT8OID:
+    case OIDOID:
+        if (len == 2) { ll = recv_int2(str); }
+        else if (len == 4 && oid == OIDOID) {
+            ll = (unsigned int)recv_int4(str);
+        }
+        else if (len == 4) { ll = recv_int4(str); }
+        else if (len == 8) { ll = recv_int8(str); }
+        else { break; }
+        if (ccast == typecast_LONGINTEGER_cast) {
+            return PyLong_FromLongLong(ll);
+        }
+        PyOS_snprintf(buf, sizeof(buf), "%lld", ll);
+        return recv_cast_text(obj, buf, curs);
+
+    case FLOAT4OID:
+    case FLOAT8OID:
+        if (len == 4) {
+            union { int i; float f; } u;
+            u.i = recv_int4(str);
+            dd = u.f;
+        }
+        else if (len == 8) {
+            union { PY_LONG_LONG i; double f; } u;
+            u.i = recv_int8(str);
+            dd = u.f;
+        }
+        else { break; }
+        if (ccast == typecast_FLOAT_cast) {
+            return PyFloat_FromDouble(dd);
+        }
+        if (isnan(dd)) { return recv_cast_text(obj, "NaN", curs); }
+        if (isinf(dd)) {
+            return recv_cast_text(
+                obj, dd > 0 ? "Infinity" : "-Infinity", curs);
+        }
+        if (!(text = PyOS_double_to_string(dd, 'r', 0, 0, NULL))) {
+            return NULL;
+        }
+        rv = recv_cast_text(obj, text, curs);
+        PyMem_Free(text);
+        return rv;
+
+    case NUMERICOID:
+        if (!(text = recv_numeric_as_text(str, len))) { return NULL; }
+        rv = recv_cast_text(obj, text, curs);
+        PyMem_Free(text);
+        return rv;
+
+    case DATEOID:
+        if (len != 4) { break; }
+        i = recv_int4(str);
+        if (i == INT_MAX) { return recv_cast_text(obj, "infinity", curs); }
+        if (i == INT_MIN) { return recv_cast_text(obj, "-infinity", curs); }
+        recv_civil_from_days((PY_LONG_LONG)i + RECV_EPOCH_DAYS, &y, &m, &d);
+        if (ccast == typecast_PYDATE_cast) {
+            return PyDate_FromDate(y, m, d);
+        }
+        recv_format_date(buf, sizeof(buf), y, m, d);
+        return recv_cast_text(obj, buf, curs);
+
+    case TIMESTAMPOID:
+    case TIMESTAMPTZOID:
+        if (len != 8) { break; }
+        ll = recv_int8(str);
+        if (ll == PY_LLONG_MAX) {
+            return recv_cast_text(obj, "infinity", curs);
+        }
+        if (ll == PY_LLONG_MIN) {
+            return recv_cast_text(obj, "-infinity", curs);
+        }
+        recv_split_timestamp(ll, &y, &m, &d, &hh, &mm, &ss, &us);
+        if (oid == TIMESTAMPOID && ccast == typecast_PYDATETIME_cast) {
+            return PyDateTime_FromDateAndTime(y, m, d, hh, mm, ss, us);
+        }
+        if (oid == TIMESTAMPTZOID && ccast == typecast_PYDATETIMETZ_cast) {
+            /* the value is in UTC, whatever the session time zone */
+            if (!(tzinfo = recv_tzinfo_utc(curs))) { return NULL; }
+            rv = PyDateTimeAPI->DateTime_FromDateAndTime(
+                y, m, d, hh, mm, ss, us, tzinfo, PyDateTimeAPI->DateTimeType);
+            Py_DECREF(tzinfo);
+            return rv;
+        }
+        i = recv_format_date(buf, sizeof(buf), y, m, d);
+        if (y > 0) {
+            PyOS_snprintf(buf + i, sizeof(buf) - i, " %02d:%02d:%02d.%06d%s",
+                hh, mm, ss, us, oid == TIMESTAMPTZOID ? "+00" : "");
+        }
+        else {
+            /* move the BC suffix to the end */
+            PyOS_snprintf(buf + i - 3, sizeof(buf) - i + 3,
+                " %02d:%02d:%02d.%06d%s BC",
+                hh, mm, ss, us, oid == TIMESTAMPTZOID ? "+00" : "");
+        }
+        return recv_cast_text(obj, buf, curs);
+
+    case TIMEOID:
+        if (len != 8) { break; }
+        ll = recv_int8(str);
+        us = (int)(ll % 1000000); ll /= 1000000;
+        ss = (int)(ll % 60); ll /= 60;
+        mm = (int)(ll % 60);
+        hh = (int)(ll / 60);
+        PyOS_snprintf(buf, sizeof(buf), "%02d:%02d:%02d.%06d", hh, mm, ss, us);
+        return recv_cast_text(obj, buf, curs);
+
+    case UUIDOID:
+        if (len != 16) { break; }
+        {
+            static const char hex[] = "0123456789abcdef";
+            char *p = buf;
+            for (i = 0; i < 16; i++) {
+                if (i == 4 || i == 6 || i == 8 || i == 10) { *p++ = '-'; }
+                *p++ = hex[(str[i] >> 4) & 0xF];
+                *p++ = hex[str[i] & 0xF];
+            }
+            *p = '\0';
+        }
+        return recv_cast_text(obj, buf, curs);
+
+    case BYTEAOID:
+        if (ccast == typecast_BINARY_cast) {
+            PyObject *b;
+            if (!(b = Bytes_FromStringAndSize(str, len))) { return NULL; }
+            rv = PyMemoryView_FromObject(b);
+            Py_DECREF(b);
+            return rv;
+        }
+        if (ccast == typecast_BYTES_cast) {
+            return Bytes_FromStringAndSize(str, len);
+        }
+        PyErr_SetString(NotSupportedError,
+            "can't use a custom typecaster on bytea in binary format");
+        return NULL;
+
+    default:
+        PyErr_Format(NotSupportedError,
+            "can't receive values of type %u in binary format: "
+            "cast the column to text in the query", oid);
+        return NULL;
+    }
+
+    PyErr_Format(DataError,
+        "bad binary value for type %u: " FORMAT_CODE_PY_SSIZE_T " bytes",
+        oid, len);
+    return NULL;
+}
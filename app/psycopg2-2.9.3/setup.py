@@ -459,7 +459,7 @@ sources = [
     'libpq_support.c', 'win32_support.c', 'solaris_support.c', 'aix_support.c',
 
     'connection_int.c', 'connection_type.c',
-    'cursor_int.c', 'cursor_type.c', 'column_type.c',
+    'cursor_int.c', 'cursor_type.c', 'column_type.c', 'copyiter_type.c',
     'replication_connection_type.c',
     'replication_cursor_type.c',
     'replication_message_type.c',
@@ -481,7 +481,7 @@ depends = [
     'replication_connection.h',
     'replication_cursor.h',
     'replication_message.h',
-    'notify.h', 'pqpath.h', 'xid.h', 'column.h', 'conninfo.h',
+    'notify.h', 'pqpath.h', 'xid.h', 'column.h', 'conninfo.h', 'copyiter.h',
     'libpq_support.h', 'win32_support.h', 'utils.h',
 
     'adapter_asis.h', 'adapter_binary.h', 'adapter_datetime.h',
@@ -492,7 +492,7 @@ depends = [
 
     # included sources
     'typecast_array.c', 'typecast_basic.c', 'typecast_binary.c',
-    'typecast_builtins.c', 'typecast_datetime.c',
+    'typecast_builtins.c', 'typecast_datetime.c', 'typecast_recv.c',
 ]
 
 parser = configparser.ConfigParser()
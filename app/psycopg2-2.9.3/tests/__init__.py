@@ -43,18 +43,23 @@ from . import test_dates
 from . import test_errcodes
 from . import test_errors
 from . import test_extras_dictcursor
+from . import test_extras_prepared
+from . import test_extras_stats
 from . import test_fast_executemany
 from . import test_green
 from . import test_ipaddress
 from . import test_lobject
 from . import test_module
 from . import test_notify
+from . import test_pipeline
+from . import test_pool
 from . import test_psycopg2_dbapi20
 from . import test_quote
 from . import test_replication
 from . import test_sql
 from . import test_transaction
 from . import test_types_basic
+from . import test_types_binary
 from . import test_types_extras
 from . import test_with
 
@@ -83,18 +88,23 @@ def test_suite():
     suite.addTest(test_errcodes.test_suite())
     suite.addTest(test_errors.test_suite())
     suite.addTest(test_extras_dictcursor.test_suite())
+    suite.addTest(test_extras_prepared.test_suite())
+    suite.addTest(test_extras_stats.test_suite())
     suite.addTest(test_fast_executemany.test_suite())
     suite.addTest(test_green.test_suite())
     suite.addTest(test_ipaddress.test_suite())
     suite.addTest(test_lobject.test_suite())
     suite.addTest(test_module.test_suite())
     suite.addTest(test_notify.test_suite())
+    suite.addTest(test_pipeline.test_suite())
+    suite.addTest(test_pool.test_suite())
     suite.addTest(test_psycopg2_dbapi20.test_suite())
     suite.addTest(test_quote.test_suite())
     suite.addTest(test_replication.test_suite())
     suite.addTest(test_sql.test_suite())
     suite.addTest(test_transaction.test_suite())
     suite.addTest(test_types_basic.test_suite())
+    suite.addTest(test_types_binary.test_suite())
     suite.addTest(test_types_extras.test_suite())
     suite.addTest(test_with.test_suite())
     return suite
@@ -33,7 +33,9 @@ from itertools import cycle
 from subprocess import Popen, PIPE
 
 import psycopg2
+import psycopg2.errors
 import psycopg2.extensions
+import psycopg2.extras
 from .testutils import skip_copy_if_green, TextIOBase
 from .testconfig import dsn
 
@@ -396,6 +398,137 @@ conn.close()
             curs.copy_to, BrokenWrite(), "tcopy")
 
 
+@skip_copy_if_green
+class CopyIterTests(ConnectingTestCase):
+    query = "copy (select generate_series(1, %s)) to stdout"
+
+    def setUp(self):
+        ConnectingTestCase.setUp(self)
+        skip_if_crdb("copy", self.conn)
+
+    def data(self, n):
+        return b''.join(b'%d\n' % i for i in range(1, n + 1))
+
+    def test_copy_iter(self):
+        curs = self.conn.cursor()
+        chunks = list(curs.copy_iter(self.query % 10000))
+        for chunk in chunks:
+            self.assert_(isinstance(chunk, bytes))
+        self.assertEqual(b''.join(chunks), self.data(10000))
+        self.assertEqual(curs.rowcount, 10000)
+
+        curs.execute("select 1")
+        self.assertEqual(curs.fetchone(), (1,))
+
+    def test_copy_iter_size(self):
+        curs = self.conn.cursor()
+        chunks = list(curs.copy_iter(self.query % 10000, size=1000))
+        for chunk in chunks[:-1]:
+            self.assert_(len(chunk) >= 1000)
+        self.assert_(len(chunks[-1]) > 0)
+        self.assertEqual(b''.join(chunks), self.data(10000))
+        self.assertRaises(ValueError, curs.copy_iter, self.query % 10, 0)
+
+    def test_read(self):
+        curs = self.conn.cursor()
+        it = curs.copy_iter(self.query % 3)
+        self.assert_(it.cursor is curs)
+        self.assertEqual(it.read(), b'1\n2\n3\n')
+        self.assertEqual(it.read(), None)
+        self.assertEqual(it.read(), None)
+        self.assertRaises(StopIteration, next, it)
+
+    def test_busy(self):
+        curs = self.conn.cursor()
+        it = curs.copy_iter(self.query % 100000)
+        data = next(it)
+        self.assertRaises(psycopg2.ProgrammingError,
+            self.conn.cursor().execute, "select 1")
+        data += b''.join(it)
+        self.assertEqual(data, self.data(100000))
+        curs.execute("select 1")
+
+    def test_close(self):
+        curs = self.conn.cursor()
+        it = curs.copy_iter(self.query % 10000000)
+        next(it)
+        it.close()
+        self.assertEqual(self.conn.info.transaction_status,
+            psycopg2.extensions.TRANSACTION_STATUS_INERROR)
+        self.assertRaises(StopIteration, next, it)
+        self.conn.rollback()
+        curs.execute("select 1")
+        self.assertEqual(curs.fetchone(), (1,))
+
+    def test_del(self):
+        self.conn.autocommit = True
+        curs = self.conn.cursor()
+        it = curs.copy_iter(self.query % 10000000)
+        next(it)
+        del it
+        curs.execute("select 1")
+        self.assertEqual(curs.fetchone(), (1,))
+
+    def test_not_copy_to(self):
+        curs = self.conn.cursor()
+        self.assertRaises(psycopg2.ProgrammingError,
+            curs.copy_iter, "select 1")
+        curs.execute("create temp table tcopyiter (id int)")
+        self.assertRaises(psycopg2.ProgrammingError,
+            curs.copy_iter, "copy tcopyiter from stdin")
+
+    def test_error(self):
+        curs = self.conn.cursor()
+        it = curs.copy_iter(
+            "copy (select 1 / (i - 50000) from generate_series(1, 100000) i)"
+            " to stdout")
+        self.assertRaises(psycopg2.DataError, list, it)
+        self.assertEqual(self.conn.info.transaction_status,
+            psycopg2.extensions.TRANSACTION_STATUS_INERROR)
+        self.conn.rollback()
+        curs.execute("select 1")
+        self.assertEqual(curs.fetchone(), (1,))
+
+    def test_async(self):
+        import asyncio
+        from psycopg2.extras import copy_iter_asyncio, wait_asyncio
+
+        async def test():
+            aconn = self.connect(async_=True)
+            await wait_asyncio(aconn)
+            curs = aconn.cursor()
+            chunks = [c async for c in copy_iter_asyncio(
+                curs, self.query % 10000)]
+            self.assertEqual(b''.join(chunks), self.data(10000))
+            self.assertEqual(curs.rowcount, 10000)
+
+            # stop the iteration early
+            gen = copy_iter_asyncio(curs, self.query % 10000000)
+            async for chunk in gen:
+                break
+            await gen.aclose()
+
+            with self.assertRaises(psycopg2.errors.UndefinedTable):
+                async for chunk in copy_iter_asyncio(
+                        curs, "copy nosuchtable to stdout"):
+                    pass
+
+            curs.execute("select 1")
+            await wait_asyncio(aconn)
+            self.assertEqual(curs.fetchone(), (1,))
+
+        asyncio.run(asyncio.wait_for(test(), 10))
+
+    def test_async_iter(self):
+        aconn = self.connect(async_=True)
+        psycopg2.extras.wait_select(aconn)
+        curs = aconn.cursor()
+        it = curs.copy_iter(self.query % 10)
+        self.assertRaises(psycopg2.ProgrammingError, next, it)
+        psycopg2.extras.wait_select(aconn)
+        self.assertRaises(psycopg2.ProgrammingError, next, it)
+        it.close()
+
 def test_suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
 
@@ -31,12 +31,12 @@ import pickle
 import psycopg2
 import psycopg2.extensions
 import unittest
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from weakref import ref
 from .testutils import (ConnectingTestCase, skip_before_postgres,
     skip_if_no_getrefcount, slow, skip_if_no_superuser,
-    skip_if_windows, skip_if_crdb, crdb_version)
+    skip_if_windows, skip_if_crdb, crdb_version, skip_before_libpq)
 
 import psycopg2.extras
 
@@ -411,6 +411,20 @@ class CursorTests(ConnectingTestCase):
         curs.close()
         self.assert_(curs.pgresult_ptr is None)
 
+    @skip_before_libpq(12)
+    def test_pgresult_size(self):
+        curs = self.conn.cursor()
+        self.assert_(curs.pgresult_size is None)
+
+        curs.execute("select 'x'")
+        small = curs.pgresult_size
+        self.assert_(small > 0)
+        curs.execute("select repeat('x', 100000)")
+        self.assert_(curs.pgresult_size > small + 100000)
+
+        curs.execute("set timezone to 'UTC'")
+        self.assert_(curs.pgresult_size is None)
+
 
 @skip_if_crdb("named cursor")
 class NamedCursorTests(ConnectingTestCase):
@@ -693,6 +707,123 @@ class NamedCursorTests(ConnectingTestCase):
         self.assertEqual(cur.fetchone(), (9,))
 
 
+class FetchColumnsTests(ConnectingTestCase):
+    query = """
+        select x::int2 as i2, x::int4 as i4, x::int8 * 10000000000 as i8,
+            (x / 4.0)::float4 as f4, (x / 4.0)::float8 as f8, x % 2 = 0 as b,
+            '2000-01-01'::date + x as d,
+            '2000-01-01 12:34:56.789'::timestamp + x * '1 hour'::interval
+                as ts,
+            '2000-01-01 12:34:56+02'::timestamptz + x * '1 hour'::interval
+                as tstz,
+            x::numeric as n
+        from generate_series(-2, 2) x order by x
+        """
+
+    def test_memoryview(self):
+        cur = self.conn.cursor()
+        cur.execute(self.query)
+        cols = cur.fetch_columns(numpy=False)
+        self.assertEqual(len(cols), 10)
+        xs = list(range(-2, 3))
+        self.assertEqual([c.format for c in cols[:9]],
+            ['h', 'i', 'q', 'f', 'd', '?', 'q', 'q', 'q'])
+        self.assertEqual(cols[0].tolist(), xs)
+        self.assertEqual(cols[1].tolist(), xs)
+        self.assertEqual(cols[2].tolist(), [x * 10000000000 for x in xs])
+        self.assertEqual(cols[3].tolist(), [x / 4 for x in xs])
+        self.assertEqual(cols[4].tolist(), [x / 4 for x in xs])
+        self.assertEqual(cols[5].tolist(), [x % 2 == 0 for x in xs])
+
+        epoch = date(1970, 1, 1)
+        self.assertEqual(cols[6].tolist(),
+            [(date(2000, 1, 1) - epoch).days + x for x in xs])
+
+        def micros(dt):
+            return (dt - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+        self.assertEqual(cols[7].tolist(),
+            [micros(datetime(2000, 1, 1, 12 + x, 34, 56, 789000)) for x in xs])
+        self.assertEqual(cols[8].tolist(),
+            [micros(datetime(2000, 1, 1, 10 + x, 34, 56)) for x in xs])
+
+        # unsupported types are returned as objects
+        self.assertEqual(cols[9], [Decimal(x) for x in xs])
+
+        self.assertEqual(cur.rownumber, 5)
+        self.assertEqual(cur.fetchall(), [])
+
+    def test_timezone(self):
+        cur = self.conn.cursor()
+        cur.execute("set timezone to 'Asia/Kolkata'")
+        cur.execute("select '2000-01-01 00:00:00Z'::timestamptz")
+        col = cur.fetch_columns(numpy=False)[0]
+        self.assertEqual(col.tolist(),
+            [int(datetime(2000, 1, 1, tzinfo=timezone.utc).timestamp()) * 10 ** 6])
+
+    def test_nulls_and_special_values(self):
+        cur = self.conn.cursor()
+        cur.execute("""
+            select * from (values (1, 'infinity'::timestamp, 'NaN'::float8),
+                (null, '2000-01-01', 'Infinity')) x""")
+        cols = cur.fetch_columns(numpy=False)
+        self.assertEqual(cols[0], [1, None])
+        self.assertEqual(cols[1], [datetime.max, datetime(2000, 1, 1)])
+        self.assertEqual(cols[2].format, 'd')
+        self.assertEqual(cols[2][1], float('inf'))
+
+    def test_int_limits(self):
+        cur = self.conn.cursor()
+        cur.execute("""
+            select * from (values
+                ('-32768'::int2, '-2147483648'::int4,
+                    '-9223372036854775808'::int8),
+                (32767::int2, 2147483647::int4, 9223372036854775807::int8)) x
+            """)
+        cols = cur.fetch_columns(numpy=False)
+        self.assertEqual(cols[0].tolist(), [-2 ** 15, 2 ** 15 - 1])
+        self.assertEqual(cols[1].tolist(), [-2 ** 31, 2 ** 31 - 1])
+        self.assertEqual(cols[2].tolist(), [-2 ** 63, 2 ** 63 - 1])
+
+    def test_partial(self):
+        cur = self.conn.cursor()
+        cur.execute("select generate_series(1, 5)")
+        cur.fetchone()
+        self.assertEqual(cur.fetch_columns(numpy=False)[0].tolist(),
+            [2, 3, 4, 5])
+        self.assertEqual(cur.fetch_columns(numpy=False)[0].tolist(), [])
+
+    @skip_if_crdb("named cursor")
+    def test_named(self):
+        cur = self.conn.cursor('test')
+        cur.execute("select generate_series(1, 5)")
+        cur.fetchone()
+        self.assertEqual(cur.fetch_columns(numpy=False)[0].tolist(),
+            [2, 3, 4, 5])
+
+    def test_no_result(self):
+        cur = self.conn.cursor()
+        cur.execute("set timezone to 'UTC'")
+        self.assertRaises(psycopg2.ProgrammingError, cur.fetch_columns)
+
+    def test_numpy(self):
+        try:
+            import numpy as np
+        except ImportError:
+            return self.skipTest("numpy not available")
+
+        cur = self.conn.cursor()
+        cur.execute(self.query)
+        cols = cur.fetch_columns()
+        self.assertEqual([c.dtype for c in cols[:9]], [
+            np.int16, np.int32, np.int64, np.float32, np.float64, np.bool_,
+            np.dtype('datetime64[D]'), np.dtype('datetime64[us]'),
+            np.dtype('datetime64[us]')])
+        self.assertEqual(cols[1].sum(), 0)
+        self.assertEqual(cols[6][0], np.datetime64('1999-12-30'))
+        self.assertEqual(cols[8][2], np.datetime64('2000-01-01T10:34:56'))
+        self.assert_(isinstance(cols[9], list))
+
+
 def test_suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
 
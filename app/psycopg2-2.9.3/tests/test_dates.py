@@ -23,9 +23,11 @@
 # FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
 # License for more details.
 
+import gc
 import sys
 import math
 import pickle
+import weakref
 from datetime import date, datetime, time, timedelta, timezone
 
 import psycopg2
@@ -222,6 +224,73 @@ class DatetimeTests(ConnectingTestCase, CommonDatetimeTestsMixin):
         self.assertEqual(dt,
             datetime(2000, 1, 1, tzinfo=timezone(timedelta(minutes=120))))
 
+    def test_tzinfo_shared(self):
+        self.curs.execute("""
+            select '2000-01-01 00:00+02:00'::timestamptz + i * '1 hour'::interval
+            from generate_series(1, 3) i""")
+        rows = self.curs.fetchall()
+        self.assert_(rows[0][0].tzinfo is rows[2][0].tzinfo)
+
+    def test_tzinfo_factory_called_once(self):
+        calls = []
+
+        def factory(offset):
+            calls.append(offset)
+            return timezone(offset)
+
+        self.curs.tzinfo_factory = factory
+        self.curs.execute("set time zone interval '+02:00' hour to minute")
+        for i in range(3):
+            self.curs.execute("""
+                select '2000-01-01 00:00+02:00'::timestamptz,
+                    '2000-01-01 00:00+03:30'::timestamptz""")
+            self.assertEqual(self.curs.fetchone(), (
+                datetime(2000, 1, 1, 0, 0, tzinfo=timezone(timedelta(hours=2))),
+                datetime(1999, 12, 31, 22, 30,
+                    tzinfo=timezone(timedelta(hours=2)))))
+        self.assertEqual(calls, [timedelta(hours=2)])
+
+    def test_tzinfo_factory_not_kept(self):
+        def factory(offset):
+            return timezone(offset)
+
+        ref = weakref.ref(factory)
+        self.curs.tzinfo_factory = factory
+        self.curs.execute("select '2000-01-01 00:00+02:00'::timestamptz")
+        self.curs.fetchone()
+        self.curs.tzinfo_factory = timezone
+        del factory
+        gc.collect()
+        self.assert_(ref() is None)
+
+    def test_tzinfo_many_factories(self):
+        def make_factory(n):
+            def factory(offset):
+                return FixedOffsetTimezone(offset.seconds // 60, "tz%d" % n)
+            return factory
+
+        self.curs.execute("set time zone interval '+02:00' hour to minute")
+        factories = [make_factory(n) for n in range(20)]
+        for i in range(2):
+            for n, factory in enumerate(factories):
+                self.curs.tzinfo_factory = factory
+                self.curs.execute(
+                    "select '2000-01-01 00:00+02:00'::timestamptz")
+                self.assertEqual(
+                    self.curs.fetchone()[0].tzinfo.tzname(None), "tz%d" % n)
+
+    def test_parse_datetime_formats(self):
+        for s, dt in [
+            ("2007-01-01 13:30:29.5",
+                datetime(2007, 1, 1, 13, 30, 29, 500000)),
+            ("2007-01-01 13:30:29.000001+00",
+                datetime(2007, 1, 1, 13, 30, 29, 1, tzinfo=timezone.utc)),
+            ("2007-01-01 24:00:00", datetime(2007, 1, 1)),
+            ("2007-01-01T13:30:29", datetime(2007, 1, 1, 13, 30, 29)),
+            ("2007-1-1 13:30:29", datetime(2007, 1, 1, 13, 30, 29)),
+        ]:
+            self.assertEqual(self.DATETIME(s, self.curs), dt)
+
     def test_parse_datetime_timezone(self):
         self.check_datetime_tz("+01", 3600)
         self.check_datetime_tz("-01", -3600)
@@ -362,6 +362,81 @@ class ExtrasDictCursorRealTests(_DictCursorBase):
         assert r['d'] == 4
 
 
+class CompactDictCursorTests(_DictCursorBase):
+    def _cursor(self, *args):
+        return self.conn.cursor(
+            *args, cursor_factory=psycopg2.extras.CompactDictCursor)
+
+    def test_mapping(self):
+        curs = self._cursor()
+        curs.execute("select 5 as foo, 4 as bar, 33 as baz")
+        r = curs.fetchone()
+        self.assertEqual(r['foo'], 5)
+        self.assertEqual(len(r), 3)
+        self.assert_('bar' in r)
+        self.assert_('qux' not in r)
+        self.assertEqual(r.get('qux', 42), 42)
+        self.assertRaises(KeyError, r.__getitem__, 'qux')
+        self.assertEqual(list(r), ['foo', 'bar', 'baz'])
+        self.assertEqual(list(r.keys()), ['foo', 'bar', 'baz'])
+        self.assertEqual(list(r.values()), [5, 4, 33])
+        self.assertEqual(list(r.items()),
+            [('foo', 5), ('bar', 4), ('baz', 33)])
+        self.assertEqual(r, {'foo': 5, 'bar': 4, 'baz': 33})
+        self.assertEqual(r.copy(), {'foo': 5, 'bar': 4, 'baz': 33})
+        self.assertEqual(r.values_tuple, (5, 4, 33))
+        self.assertRaises(AttributeError, setattr, r, 'x', 1)
+
+    def test_shared_index(self):
+        curs = self._cursor()
+        curs.execute("select x as a from generate_series(1, 3) x")
+        rs = curs.fetchall()
+        self.assertEqual([r['a'] for r in rs], [1, 2, 3])
+        self.assert_(rs[0]._index is rs[2]._index)
+
+        curs.execute("select 1 as b")
+        self.assertEqual(curs.fetchone(), {'b': 1})
+
+    def test_fetch_methods(self):
+        curs = self._cursor()
+        for getter in [
+            lambda curs: curs.fetchone(),
+            lambda curs: curs.fetchmany()[0],
+            lambda curs: curs.fetchall()[0],
+            lambda curs: next(iter(curs)),
+        ]:
+            curs.execute("SELECT * FROM ExtrasDictCursorTests")
+            self.assertEqual(getter(curs)['foo'], 'bar')
+
+    @skip_if_crdb("named cursor")
+    def test_named_cursor(self):
+        curs = self._cursor('aname')
+        curs.itersize = 2
+        curs.execute("select x from generate_series(1, 5) x")
+        self.assertEqual([r['x'] for r in curs], [1, 2, 3, 4, 5])
+
+    def test_no_result(self):
+        curs = self._cursor()
+        curs.execute("select 1 where false")
+        self.assertEqual(curs.fetchone(), None)
+        self.assertEqual(curs.fetchall(), [])
+
+    def test_pickle(self):
+        curs = self._cursor()
+        curs.execute("select 10 as a, 20 as b")
+        r = curs.fetchone()
+        r1 = pickle.loads(pickle.dumps(r))
+        self.assertEqual(r, r1)
+        self.assertEqual(list(r1.items()), [('a', 10), ('b', 20)])
+        self.assertEqual(copy.deepcopy(r), r)
+
+    def test_connection(self):
+        conn = self.connect(
+            connection_factory=psycopg2.extras.CompactDictConnection)
+        curs = conn.cursor()
+        self.assert_(isinstance(curs, psycopg2.extras.CompactDictCursor))
+
+
 class NamedTupleCursorTest(ConnectingTestCase):
     def setUp(self):
         ConnectingTestCase.setUp(self)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+#
+# test_extras_prepared.py - tests for the prepared statements connection
+#
+# Copyright (C) 2020-2021 The Psycopg Team
+#
+# psycopg2 is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+
+import unittest
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import (
+    PreparedStatementConnection, PreparedStatementCursor, _prepare_sql)
+
+from .testutils import ConnectingTestCase, skip_if_crdb
+
+
+class PrepareSqlTests(unittest.TestCase):
+    def test_positional(self):
+        self.assertEqual(
+            _prepare_sql("select %s, %s", (1, 2)), ("select $1, $2", 2))
+
+    def test_named(self):
+        self.assertEqual(
+            _prepare_sql("select %(a)s, %(b)s, %(a)s", {'a': 1, 'b': 2}),
+            ("select $1, $2, $1", ['a', 'b']))
+
+    def test_percent(self):
+        self.assertEqual(
+            _prepare_sql("select 'x%%' || %s", ('y',)),
+            ("select 'x%' || $1", 1))
+
+    def test_no_args(self):
+        self.assertEqual(
+            _prepare_sql("select '%%'", None), ("select '%%'", 0))
+
+    def test_unpreparable(self):
+        self.assertEqual(_prepare_sql("create table x (id int)", ()), None)
+        self.assertEqual(_prepare_sql("select %d", (1,)), None)
+        self.assertEqual(_prepare_sql("select %(a)s", (1,)), None)
+        self.assertEqual(_prepare_sql("select %s", {'a': 1}), None)
+
+
+@skip_if_crdb("prepare")
+class PreparedStatementConnectionTests(ConnectingTestCase):
+    def setUp(self):
+        ConnectingTestCase.setUp(self)
+        self.conn = self.connect(connection_factory=PreparedStatementConnection)
+        self.conn.prepare_threshold = 2
+
+    def prepared_names(self):
+        curs = psycopg2.extensions.cursor(self.conn)
+        curs.execute("select name from pg_prepared_statements order by name")
+        return [r[0] for r in curs.fetchall()]
+
+    def test_cursor_factory(self):
+        curs = self.conn.cursor()
+        self.assert_(isinstance(curs, PreparedStatementCursor))
+
+    def test_prepare_after_threshold(self):
+        curs = self.conn.cursor()
+        curs.execute("select %s::int + 1", (1,))
+        self.assertEqual(curs.fetchone(), (2,))
+        self.assertEqual(self.prepared_names(), [])
+
+        for i in range(3):
+            curs.execute("select %s::int + 1", (i,))
+            self.assertEqual(curs.fetchone(), (i + 1,))
+        self.assertEqual(len(self.prepared_names()), 1)
+        self.assert_(curs.query.startswith(b"EXECUTE _psycopg2_"))
+
+    def test_named_args(self):
+        curs = self.conn.cursor()
+        for i in range(3):
+            curs.execute(
+                "select %(a)s::int, %(b)s::text, %(a)s::int",
+                {'a': i, 'b': 'x'})
+            self.assertEqual(curs.fetchone(), (i, 'x', i))
+
+    def test_composable(self):
+        curs = self.conn.cursor()
+        q = sql.SQL("select {}::int").format(sql.Placeholder())
+        for i in range(3):
+            curs.execute(q, (i,))
+            self.assertEqual(curs.fetchone(), (i,))
+        self.assertEqual(len(self.prepared_names()), 1)
+
+    def test_parameter_types_from_context(self):
+        curs = self.conn.cursor()
+        curs.execute("create temp table t (id int)")
+        curs.execute("insert into t values (1)")
+        q = "select id from t where id = %s"
+        curs.execute(q, (1.4,))
+        self.assertEqual(curs.fetchall(), [])
+
+        for i in range(2):
+            curs.execute(q, (i,))
+        self.assertEqual(len(self.prepared_names()), 1)
+        # $1 is an int: the float is rounded before the comparison
+        curs.execute(q, (1.4,))
+        self.assertEqual(curs.fetchall(), [(1,)])
+
+        # an explicit cast keeps the comparison numeric
+        q = "select id from t where id = %s::numeric"
+        for i in range(2):
+            curs.execute(q, (i,))
+        self.assertEqual(len(self.prepared_names()), 2)
+        curs.execute(q, (1.4,))
+        self.assertEqual(curs.fetchall(), [])
+        curs.execute(q, (1,))
+        self.assertEqual(curs.fetchall(), [(1,)])
+
+    def test_failed_prepare_keeps_transaction(self):
+        curs = self.conn.cursor()
+        for i in range(3):
+            # can't determine the type of $1: PREPARE fails
+            curs.execute("select %s is null", (None,))
+            self.assertEqual(curs.fetchone(), (True,))
+        self.assertEqual(self.prepared_names(), [])
+        self.conn.commit()
+
+    def test_failed_prepare_autocommit(self):
+        self.conn.autocommit = True
+        curs = self.conn.cursor()
+        for i in range(3):
+            curs.execute("select %s is null", (None,))
+            self.assertEqual(curs.fetchone(), (True,))
+        self.assertEqual(self.prepared_names(), [])
+
+    def test_not_preparable(self):
+        curs = self.conn.cursor()
+        for i in range(3):
+            curs.execute("set timezone to 'UTC'")
+        self.assertEqual(self.prepared_names(), [])
+
+    def test_eviction(self):
+        self.conn.prepared_max = 2
+        curs = self.conn.cursor()
+        for q in range(4):
+            for i in range(2):
+                curs.execute(f"select {q} + %s", (i,))
+        # Evicted statements are deallocated with the next prepare, so
+        # there is at most one more on the server than in the cache
+        self.assertEqual(len(self.conn._prepared), 2)
+        self.assertEqual(len(self.prepared_names()), 3)
+        curs.execute("select 4 + %s", (0,))
+        curs.execute("select 4 + %s", (0,))
+        self.assertEqual(len(self.conn._prepared), 2)
+        self.assertEqual(len(self.prepared_names()), 3)
+
+    def _evict_then_fail(self):
+        self.conn.prepared_max = 1
+        curs = self.conn.cursor()
+        for q in range(2):
+            for i in range(2):
+                curs.execute(f"select {q} + %s", (i,))
+        evicted = list(self.conn._deallocate)
+        self.assertEqual(len(evicted), 1)
+        # The DEALLOCATE runs, then the PREPARE fails
+        for i in range(2):
+            curs.execute("select %s is null", (None,))
+            self.assertEqual(curs.fetchone(), (True,))
+        return curs, evicted
+
+    def test_failed_prepare_deallocates(self):
+        curs, evicted = self._evict_then_fail()
+        self.assertEqual(self.conn._deallocate, [])
+        self.assert_(evicted[0] not in self.prepared_names())
+        # Nothing left to deallocate that doesn't exist: the next prepare works
+        for i in range(3):
+            curs.execute("select 2 + %s", (i,))
+        self.assert_(curs.query.startswith(b"EXECUTE _psycopg2_"))
+
+    def test_failed_prepare_deallocates_autocommit(self):
+        self.conn.autocommit = True
+        curs, evicted = self._evict_then_fail()
+        self.assertEqual(self.conn._deallocate, [])
+        self.assert_(evicted[0] not in self.prepared_names())
+
+    def test_failed_deallocate_keeps_the_rest(self):
+        self.conn.autocommit = True
+        self.conn.prepared_max = 1
+        curs = self.conn.cursor()
+        for q in range(3):
+            for i in range(2):
+                curs.execute(f"select {q} + %s", (i,))
+        # Two evictions queued after the last prepare, the first one gone
+        # behind our back: the second DEALLOCATE doesn't run
+        self.conn._deallocate.insert(0, "_psycopg2_gone")
+        queued = self.conn._deallocate[1:]
+        for i in range(2):
+            curs.execute("select 3 + %s", (i,))
+        self.assertEqual(self.conn._deallocate, queued)
+        # The query isn't blamed: it's prepared with the next attempt
+        curs.execute("select 3 + %s", (0,))
+        curs.execute("select 3 + %s", (0,))
+        self.assert_(curs.query.startswith(b"EXECUTE _psycopg2_"))
+        self.assert_("_psycopg2_gone" not in self.conn._deallocate)
+        for name in queued:
+            self.assert_(name not in self.prepared_names())
+
+    def test_rollback_keeps_statements(self):
+        curs = self.conn.cursor()
+        for i in range(2):
+            curs.execute("select %s::int", (i,))
+        self.conn.rollback()
+        curs.execute("select %s::int", (42,))
+        self.assertEqual(curs.fetchone(), (42,))
+
+    def test_clear_prepared(self):
+        curs = self.conn.cursor()
+        for i in range(2):
+            curs.execute("select %s::int", (i,))
+        self.assertEqual(len(self.prepared_names()), 1)
+        self.conn.clear_prepared()
+        self.assertEqual(self.prepared_names(), [])
+        curs.execute("select %s::int", (1,))
+        self.assertEqual(curs.fetchone(), (1,))
+
+    def test_wrong_args_number(self):
+        curs = self.conn.cursor()
+        for i in range(2):
+            curs.execute("select %s::int", (i,))
+        self.assertRaises(TypeError, curs.execute, "select %s::int", (1, 2))
+
+
+def test_suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
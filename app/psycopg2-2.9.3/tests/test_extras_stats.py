@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+#
+# test_extras_stats.py - tests for the query statistics connection
+#
+# Copyright (C) 2020-2021 The Psycopg Team
+#
+# psycopg2 is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+
+import unittest
+
+import psycopg2
+import psycopg2.errors
+from psycopg2 import sql
+from psycopg2.extras import (
+    QueryStats, StatsConnection, StatsCursor, PreparedStatementConnection,
+    PreparedStatementCursor, _fingerprint_query)
+
+from .testutils import ConnectingTestCase, skip_before_libpq
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_literals(self):
+        self.assertEqual(
+            _fingerprint_query(
+                "select * from t1 where id = 42 and x = 'it''s' and y = -1.5"),
+            "select * from t1 where id = ? and x = ? and y = ?")
+
+    def test_placeholders(self):
+        self.assertEqual(
+            _fingerprint_query("select %s, %(a)s, $1"), "select %s, %(a)s, $1")
+
+    def test_whitespace(self):
+        self.assertEqual(
+            _fingerprint_query("  select\n   1,\t2  "), "select ?, ...")
+
+    def test_lists(self):
+        self.assertEqual(
+            _fingerprint_query("select 1 where x in (1, 2, 3)"),
+            "select ? where x in (?, ...)")
+        self.assertEqual(
+            _fingerprint_query(b"insert into t values (1, 'a'), (2, 'b')"),
+            "insert into t values (?, ?), ...")
+
+
+class QueryStatsTests(unittest.TestCase):
+    def test_record(self):
+        stats = QueryStats()
+        stats.record("select 1", 0.002, rows=1, bytes_sent=8)
+        stats.record("select  2", 0.004, rows=1, bytes_sent=8)
+        stats.record("select 'x'", 0.030, rows=1, bytes_received=100)
+        stats.record("select %s", 0.001)
+
+        top = stats.top()
+        self.assertEqual([s['query'] for s in top], ["select ?", "select %s"])
+        s = top[0]
+        self.assertEqual(s['calls'], 3)
+        self.assertAlmostEqual(s['total_time'], 36.0)
+        self.assertAlmostEqual(s['mean_time'], 12.0)
+        self.assertAlmostEqual(s['max_time'], 30.0)
+        self.assertEqual(s['rows'], 3)
+        self.assertEqual(s['bytes_sent'], 16)
+        self.assertEqual(s['bytes_received'], 100)
+        self.assertEqual(sum(s['histogram']), 3)
+        self.assertEqual(len(s['histogram']), len(QueryStats.buckets) + 1)
+        self.assertEqual(s['p50'], 5)
+        self.assertEqual(s['p99'], 30.0)
+
+        self.assertEqual(len(stats.top(1)), 1)
+        self.assertEqual(
+            stats.top(key='calls')[-1]['query'], "select %s")
+
+    def test_maxsize(self):
+        stats = QueryStats(maxsize=2)
+        for q in ("select a", "select b", "select c", "select a"):
+            stats.record(q, 0.001)
+        self.assertEqual(len(stats.top(None)), 2)
+        self.assertEqual(stats.dropped, 1)
+
+    def test_reset(self):
+        stats = QueryStats()
+        stats.record("select 1", 0.001)
+        stats.reset()
+        self.assertEqual(stats.top(), [])
+
+    def test_top_is_a_copy(self):
+        stats = QueryStats()
+        stats.record("select 1", 0.001)
+        hist = stats.top()[0]['histogram']
+        stats.record("select 1", 0.001)
+        self.assertEqual(sum(hist), 1)
+
+    def test_sample_rate(self):
+        self.assertRaises(ValueError, QueryStats, sample_rate=0)
+        self.assertRaises(ValueError, QueryStats, sample_rate=1.5)
+        stats = QueryStats(sample_rate=0.5)
+        n = sum(stats.sampled() for i in range(10000))
+        self.assert_(3000 < n < 7000, n)
+
+
+class StatsConnectionTests(ConnectingTestCase):
+    def setUp(self):
+        ConnectingTestCase.setUp(self)
+        self.stats = QueryStats()
+        self.conn = self.connect(connection_factory=StatsConnection)
+        self.conn.initialize(self.stats)
+
+    def test_not_initialized(self):
+        conn = self.connect(connection_factory=StatsConnection)
+        self.assertRaises(psycopg2.ProgrammingError, conn.cursor)
+
+    def test_cursor_factory(self):
+        self.assert_(isinstance(self.conn.cursor(), StatsCursor))
+
+    def test_execute(self):
+        curs = self.conn.cursor()
+        for i in range(3):
+            curs.execute("select generate_series(1, %s)", (i + 1,))
+        curs.execute("select 'x'")
+
+        s = {s['query']: s for s in self.stats.top()}
+        s1 = s["select generate_series(?, %s)"]
+        self.assertEqual(s1['calls'], 3)
+        self.assertEqual(s1['rows'], 6)
+        self.assert_(s1['total_time'] > 0)
+        self.assertEqual(
+            s1['bytes_sent'],
+            sum(len(f"select generate_series(1, {i})") for i in (1, 2, 3)))
+        self.assertEqual(s["select ?"]['calls'], 1)
+
+    @skip_before_libpq(12)
+    def test_bytes_received(self):
+        curs = self.conn.cursor()
+        curs.execute("select repeat('x', 10000)")
+        self.assert_(self.stats.top()[0]['bytes_received'] > 10000)
+
+    def test_error(self):
+        curs = self.conn.cursor()
+        self.assertRaises(
+            psycopg2.errors.DivisionByZero, curs.execute, "select 1 / 0")
+        s = self.stats.top()[0]
+        self.assertEqual(s['query'], "select ? / ?")
+        self.assertEqual(s['calls'], 1)
+        self.assertEqual(s['rows'], 0)
+
+    def test_executemany(self):
+        curs = self.conn.cursor()
+        curs.execute("create temp table sttest (id int)")
+        curs.executemany(
+            "insert into sttest values (%s)", [(i,) for i in range(5)])
+        s = {s['query']: s for s in self.stats.top()}
+        s1 = s["insert into sttest values (%s)"]
+        self.assertEqual(s1['calls'], 1)
+        self.assertEqual(s1['rows'], 5)
+
+    def test_callproc(self):
+        curs = self.conn.cursor()
+        curs.callproc("lower", ("X",))
+        self.assertEqual(self.stats.top()[0]['query'], "lower")
+
+    def test_composable(self):
+        curs = self.conn.cursor()
+        curs.execute(sql.SQL("select {}").format(sql.Literal(10)))
+        self.assertEqual(self.stats.top()[0]['query'], "select ?")
+
+    def test_shared(self):
+        conn2 = self.connect(connection_factory=StatsConnection)
+        conn2.initialize(self.stats)
+        self.conn.cursor().execute("select 1")
+        conn2.cursor().execute("select 2")
+        self.assertEqual(self.stats.top()[0]['calls'], 2)
+
+    def test_sampling(self):
+        self.stats.sample_rate = 0.01
+        curs = self.conn.cursor()
+        for i in range(100):
+            curs.execute("select 1")
+        top = self.stats.top()
+        self.assert_(not top or top[0]['calls'] < 20)
+
+    @skip_before_libpq(14)
+    def test_pipeline(self):
+        curs = self.conn.cursor()
+        with self.conn.pipeline():
+            curs.execute("select 1")
+        self.assertEqual(self.stats.top(), [])
+
+    def test_prepared(self):
+        class Conn(StatsConnection, PreparedStatementConnection):
+            pass
+
+        class Cursor(StatsCursor, PreparedStatementCursor):
+            pass
+
+        conn = self.connect(connection_factory=Conn, cursor_factory=Cursor)
+        conn.initialize(self.stats)
+        curs = conn.cursor()
+        for i in range(10):
+            curs.execute("select %s::int", (i,))
+        self.assertEqual(curs.fetchone(), (9,))
+        self.assertEqual(self.stats.top()[0]['calls'], 10)
+        self.assertEqual(self.stats.top()[0]['query'], "select %s::int")
+
+
+def test_suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
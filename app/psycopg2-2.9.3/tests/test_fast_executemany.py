@@ -15,7 +15,8 @@
 # FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
 # License for more details.
 
-from datetime import date
+import uuid
+from datetime import date, datetime, timedelta, timezone
 
 from . import testutils
 import unittest
@@ -260,6 +261,157 @@ class TestExecuteValues(FastExecuteTestMixin, testutils.ConnectingTestCase):
         cur.execute("select id, data from testfast")
         self.assertEqual(cur.fetchall(), [(1, 'hi')])
 
+    def test_page_bytes(self):
+        cur = self.conn.cursor()
+        psycopg2.extras.execute_values(cur,
+            "insert into testfast (id, data) values %s",
+            ((i, 'x' * 100) for i in range(100)),
+            page_size=10, page_bytes=2000)
+
+        # after the first page the statements are around 2000 bytes long
+        self.assert_(1500 < len(cur.query) <= 2100, len(cur.query))
+
+        cur.execute("select count(*) from testfast")
+        self.assertEqual(cur.fetchone(), (100,))
+
+    def test_copy_threshold(self):
+        cur = self.conn.cursor()
+        psycopg2.extras.execute_values(cur,
+            "insert into testfast (id, date, val, data) values %s",
+            [(i, date(2017, 1, i + 1), i * 10, "x\u2603") for i in range(10)],
+            copy_threshold=10)
+        self.assert_(cur.query.startswith(b'COPY'), cur.query)
+
+        cur.execute("select id, date, val, data from testfast order by id")
+        self.assertEqual(cur.fetchall(),
+            [(i, date(2017, 1, i + 1), i * 10, "x\u2603") for i in range(10)])
+
+    def test_copy_threshold_not_reached(self):
+        cur = self.conn.cursor()
+        psycopg2.extras.execute_values(cur,
+            "insert into testfast (id, val) values %s",
+            [(i, i * 10) for i in range(9)],
+            copy_threshold=10)
+        self.assert_(cur.query.startswith(b'insert'), cur.query)
+        cur.execute("select id, val from testfast order by id")
+        self.assertEqual(cur.fetchall(), [(i, i * 10) for i in range(9)])
+
+    def test_copy_threshold_unsupported(self):
+        cur = self.conn.cursor()
+        cur.execute("alter table testfast add column amount numeric")
+        psycopg2.extras.execute_values(cur,
+            "insert into testfast (id, amount) values %s",
+            [(i, i) for i in range(10)],
+            copy_threshold=1)
+        self.assert_(cur.query.startswith(b'insert'), cur.query)
+
+        # not a simple insert
+        psycopg2.extras.execute_values(cur,
+            "insert into testfast (id) values %s on conflict do nothing",
+            [(i,) for i in range(10)],
+            copy_threshold=1)
+        self.assert_(cur.query.startswith(b'insert'), cur.query)
+
+        cur.execute("select count(*) from testfast")
+        self.assertEqual(cur.fetchone(), (10,))
+
+
+    def test_copy_threshold_same_rows(self):
+        # Values COPY can't store as VALUES would go through VALUES
+        cur = self.conn.cursor()
+        cur.execute("set timezone to 'UTC'")
+        cur.execute("""alter table testfast add column ts timestamp,
+            add column tstz timestamptz, add column j json""")
+        cols = "id, date, val, data, ts, tstz, j"
+        tz = timezone(timedelta(hours=2))
+        rows = [
+            (1, date(2020, 1, 1), 1, "a", datetime(2020, 1, 1, 10, tzinfo=tz),
+                None, None),
+            (2, datetime(2020, 1, 1, 10), 1, "b", None, None, None),
+            (3, None, "42", "c", "2020-01-01 10:00", None, None),
+            (4, None, None, "d", None, datetime(2020, 1, 1, 10), None),
+            (5, None, None, "e", None, None, psycopg2.extras.Json({"a": 1})),
+            (6, None, None, "f", datetime(2020, 1, 1, 10), None, '{"b": 2}'),
+        ]
+        got = []
+        for threshold in (None, 1):
+            for row in rows:
+                psycopg2.extras.execute_values(cur,
+                    f"insert into testfast ({cols}) values %s", [row],
+                    copy_threshold=threshold)
+            cur.execute(
+                f"select {cols}, j::text from testfast order by id")
+            got.append(cur.fetchall())
+            cur.execute("delete from testfast")
+        self.assertEqual(got[0], got[1])
+        self.assertEqual(got[1][0][4], datetime(2020, 1, 1, 8))
+
+        # and the exact types still use COPY
+        psycopg2.extras.execute_values(cur,
+            f"insert into testfast ({cols}) values %s", rows[5:],
+            copy_threshold=1)
+        self.assert_(cur.query.startswith(b'COPY'), cur.query)
+
+class TestCopyRows(testutils.ConnectingTestCase):
+    def setUp(self):
+        super().setUp()
+        cur = self.conn.cursor()
+        cur.execute("""create table testcopy (
+            b bool, i2 int2, i4 int4, i8 int8, f4 float4, f8 float8,
+            t text, vc varchar, bp char(3), j json, jb jsonb, ba bytea,
+            d date, ts timestamp, tstz timestamptz, u uuid)""")
+
+    def test_types(self):
+        row = (True, -2, 2 ** 31 - 1, -2 ** 63, 1.5, 0.1,
+            "\u2603", "hello", "abc", '{"a": 1}', '{"b": [2]}', b'\x00\xff',
+            date(1999, 12, 31), datetime(2022, 3, 4, 5, 6, 7, 890),
+            datetime(1970, 1, 1, tzinfo=timezone.utc),
+            uuid.UUID('12345678-1234-5678-1234-567812345678'))
+        cur = self.conn.cursor()
+        psycopg2.extras.register_uuid(conn_or_curs=cur)
+        psycopg2.extras.copy_rows(cur, 'testcopy', [row, (None,) * len(row)])
+
+        cur.execute("set timezone to 'UTC'")
+        cur.execute("select * from testcopy")
+        rows = cur.fetchall()
+        self.assertEqual(len(rows), 2)
+        got = rows[0]
+        self.assertEqual(got[:9], row[:9])
+        self.assertEqual(got[9], {'a': 1})
+        self.assertEqual(got[10], {'b': [2]})
+        self.assertEqual(bytes(got[11]), row[11])
+        self.assertEqual(got[12:14], row[12:14])
+        self.assertEqual(got[14].timestamp(), 0)
+        self.assertEqual(got[15], row[15])
+        self.assertEqual(rows[1], (None,) * len(row))
+
+    def test_columns(self):
+        cur = self.conn.cursor()
+        psycopg2.extras.copy_rows(cur, 'testcopy',
+            ((i, str(i)) for i in range(1000)), columns=['i4', 't'], size=100)
+        cur.execute("select i4, t from testcopy order by i4")
+        self.assertEqual(cur.fetchall(), [(i, str(i)) for i in range(1000)])
+
+    def test_unsupported(self):
+        cur = self.conn.cursor()
+        cur.execute("alter table testcopy add column n numeric")
+        self.assertRaises(psycopg2.NotSupportedError,
+            psycopg2.extras.copy_rows, cur, 'testcopy', [], columns=['n'])
+
+    def test_aware_timestamp(self):
+        cur = self.conn.cursor()
+        dt = datetime(2020, 1, 1, 10, tzinfo=timezone.utc)
+        self.assertRaises(psycopg2.extensions.QueryCanceledError,
+            psycopg2.extras.copy_rows, cur, 'testcopy', [(dt,)],
+            columns=['ts'])
+
+    def test_bad_row(self):
+        cur = self.conn.cursor()
+        # errors in read() abort the copy, as in copy_expert()
+        self.assertRaises(psycopg2.extensions.QueryCanceledError,
+            psycopg2.extras.copy_rows, cur, 'testcopy', [(1, 2)],
+            columns=['i4'])
+
 
 def test_suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
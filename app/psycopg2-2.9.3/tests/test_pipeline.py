@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+#
+# test_pipeline.py - tests for the connection pipeline mode
+#
+# Copyright (C) 2020-2021 The Psycopg Team
+#
+# psycopg2 is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+
+import unittest
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+import psycopg2.extensions as ext
+
+from .testutils import (
+    ConnectingTestCase, skip_before_libpq, skip_if_crdb, skip_if_green)
+
+
+@skip_before_libpq(14)
+@skip_if_green("pipeline mode not supported with a wait callback")
+@skip_if_crdb("pipeline mode")
+class PipelineTests(ConnectingTestCase):
+    def setUp(self):
+        ConnectingTestCase.setUp(self)
+        curs = self.conn.cursor()
+        curs.execute("create temp table pltest (id int primary key, data text)")
+        self.conn.commit()
+
+    def count(self):
+        curs = self.conn.cursor()
+        curs.execute("select count(*) from pltest")
+        return curs.fetchone()[0]
+
+    def test_status(self):
+        self.assertEqual(
+            self.conn.info.pipeline_status, ext.PIPELINE_STATUS_OFF)
+        with self.conn.pipeline():
+            self.assertEqual(
+                self.conn.info.pipeline_status, ext.PIPELINE_STATUS_ON)
+        self.assertEqual(
+            self.conn.info.pipeline_status, ext.PIPELINE_STATUS_OFF)
+
+    def test_results_on_exit(self):
+        c1 = self.conn.cursor()
+        c2 = self.conn.cursor()
+        with self.conn.pipeline():
+            c1.execute("insert into pltest values (1, 'a'), (2, 'b')")
+            c2.execute("select %s::int, %s::text", (42, 'x'))
+        self.assertEqual(c1.rowcount, 2)
+        self.assertEqual(c1.statusmessage, "INSERT 0 2")
+        self.assertEqual(c2.description[0].type_code, 23)
+        self.assertEqual(c2.fetchall(), [(42, 'x')])
+
+    def test_fetch_waits(self):
+        curs = self.conn.cursor()
+        with self.conn.pipeline():
+            curs.execute("insert into pltest values (1, 'a')")
+            curs.execute("select data from pltest")
+            self.assertEqual(curs.fetchone(), ('a',))
+            curs.execute("select %s", (10,))
+            self.assertEqual(curs.rowcount, 1)
+            self.assertEqual(curs.fetchone(), (10,))
+
+    def test_sync(self):
+        c1 = self.conn.cursor()
+        c2 = self.conn.cursor()
+        with self.conn.pipeline() as p:
+            c1.execute("insert into pltest values (1, 'a')")
+            p.sync()
+            self.assertEqual(c1.rowcount, 1)
+            c2.execute("select count(*) from pltest")
+        self.assertEqual(c2.fetchone(), (1,))
+
+    def test_transaction(self):
+        curs = self.conn.cursor()
+        with self.conn.pipeline():
+            curs.execute("insert into pltest values (1, 'a')")
+        self.assertEqual(self.conn.status, ext.STATUS_BEGIN)
+        self.conn.rollback()
+        self.assertEqual(self.count(), 0)
+
+    def test_commit_in_pipeline(self):
+        curs = self.conn.cursor()
+        with self.conn.pipeline():
+            curs.execute("insert into pltest values (1, 'a')")
+            self.conn.commit()
+            curs.execute("insert into pltest values (2, 'b')")
+            self.conn.rollback()
+        self.assertEqual(self.count(), 1)
+
+    def test_error(self):
+        c1 = self.conn.cursor()
+        c2 = self.conn.cursor()
+        c3 = self.conn.cursor()
+        with self.assertRaises(psycopg2.errors.UniqueViolation):
+            with self.conn.pipeline():
+                c1.execute("insert into pltest values (1, 'a')")
+                c2.execute("insert into pltest values (1, 'b')")
+                c3.execute("select 1")
+
+        self.assertEqual(c1.rowcount, 1)
+        # the query after the error was skipped
+        self.assertEqual(c3.rowcount, -1)
+        self.assertRaises(psycopg2.ProgrammingError, c3.fetchone)
+        self.assertEqual(
+            self.conn.info.transaction_status,
+            ext.TRANSACTION_STATUS_INERROR)
+        self.conn.rollback()
+        self.assertEqual(self.count(), 0)
+
+    def test_error_in_block(self):
+        curs = self.conn.cursor()
+        with self.assertRaises(ZeroDivisionError):
+            with self.conn.pipeline():
+                curs.execute("insert into pltest values (1, 'a')")
+                curs.execute("insert into pltest values (1, 'b')")
+                1 / 0
+        self.assertEqual(
+            self.conn.info.pipeline_status, ext.PIPELINE_STATUS_OFF)
+        self.conn.rollback()
+        self.assertEqual(self.count(), 0)
+
+    def test_autocommit(self):
+        self.conn.autocommit = True
+        curs = self.conn.cursor()
+        with self.conn.pipeline():
+            curs.execute("insert into pltest values (1, 'a')")
+        self.assertEqual(
+            self.conn.info.transaction_status, ext.TRANSACTION_STATUS_IDLE)
+        self.assertEqual(self.count(), 1)
+
+    def test_execute_batch(self):
+        curs = self.conn.cursor()
+        with self.conn.pipeline():
+            psycopg2.extras.execute_batch(
+                curs, "insert into pltest values (%s, %s)",
+                [(i, str(i)) for i in range(50)])
+        self.assertEqual(self.count(), 50)
+
+    def test_binary(self):
+        curs = self.conn.cursor()
+        curs.binary = True
+        with self.conn.pipeline():
+            curs.execute("select 1::int8, 'x'::text")
+        self.assertEqual(curs.fetchone(), (1, 'x'))
+
+    def test_nested(self):
+        with self.conn.pipeline():
+            self.assertRaises(psycopg2.ProgrammingError, self.conn.enter_pipeline)
+
+    def test_sync_outside_pipeline(self):
+        self.assertRaises(psycopg2.ProgrammingError, self.conn.pipeline_sync)
+
+    def test_unsupported(self):
+        with self.conn.pipeline():
+            curs = self.conn.cursor('named')
+            self.assertRaises(psycopg2.ProgrammingError, curs.execute, "select 1")
+            curs = self.conn.cursor()
+            self.assertRaises(
+                psycopg2.ProgrammingError, curs.copy_expert,
+                "copy pltest to stdout", None)
+            self.assertRaises(psycopg2.ProgrammingError, self.conn.lobject)
+
+    def test_async_connection(self):
+        aconn = self.connect(async_=True)
+        psycopg2.extras.wait_select(aconn)
+        self.assertRaises(psycopg2.ProgrammingError, aconn.pipeline)
+
+
+def test_suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
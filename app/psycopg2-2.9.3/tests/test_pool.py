@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+
+# test_pool.py - unit test for the connection pools
+#
+# Copyright (C) 2020-2021 The Psycopg Team
+#
+# psycopg2 is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+
+import time
+import asyncio
+import threading
+import unittest
+
+import psycopg2
+from psycopg2.extras import wait_asyncio
+from psycopg2.pool import AsyncConnectionPool, ManagedConnectionPool, PoolError
+
+from .testconfig import dsn
+from .testutils import ConnectingTestCase
+
+
+class ManagedConnectionPoolTests(ConnectingTestCase):
+    def make_pool(self, *args, **kwargs):
+        pool = ManagedConnectionPool(*args, dsn, **kwargs)
+        self.addCleanup(lambda: pool.closed or pool.closeall())
+        return pool
+
+    def test_reuse(self):
+        pool = self.make_pool(1, 2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assert_(pool.getconn() is conn)
+        stats = pool.get_stats()
+        self.assertEqual(stats['creations'], 1)
+        self.assertEqual(stats['hits'], 2)
+
+    def test_keep_up_to_maxconn(self):
+        pool = self.make_pool(0, 2)
+        conns = [pool.getconn(), pool.getconn()]
+        for conn in conns:
+            pool.putconn(conn)
+        self.assertEqual(pool.get_stats()['pool_available'], 2)
+
+    def test_timeout(self):
+        pool = self.make_pool(0, 1)
+        pool.getconn()
+        t0 = time.monotonic()
+        self.assertRaises(PoolError, pool.getconn, timeout=0.1)
+        self.assert_(time.monotonic() - t0 >= 0.1)
+        stats = pool.get_stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_wait(self):
+        pool = self.make_pool(0, 1)
+        conn = pool.getconn()
+        got = []
+
+        def worker():
+            got.append(pool.getconn(timeout=5))
+
+        t = threading.Thread(target=worker)
+        t.start()
+        time.sleep(0.1)
+        self.assertEqual(got, [])
+        pool.putconn(conn)
+        t.join()
+        self.assert_(got[0] is conn)
+
+    def test_close_wakes_waiters(self):
+        pool = self.make_pool(0, 1)
+        pool.getconn()
+        errors = []
+
+        def worker():
+            try:
+                pool.getconn()
+            except PoolError as e:
+                errors.append(e)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        time.sleep(0.1)
+        pool.closeall()
+        t.join()
+        self.assertEqual(len(errors), 1)
+
+    def test_max_lifetime(self):
+        pool = self.make_pool(0, 2, max_lifetime=0.1)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        time.sleep(0.2)
+        conn2 = pool.getconn()
+        self.assert_(conn2 is not conn)
+        self.assert_(conn.closed)
+
+    def test_rollback_on_put(self):
+        pool = self.make_pool(0, 1)
+        conn = pool.getconn()
+        conn.cursor().execute("select 1")
+        pool.putconn(conn)
+        self.assertEqual(
+            conn.info.transaction_status,
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def test_rollback_outside_lock(self):
+        class SlowRollback(psycopg2.extensions.connection):
+            def rollback(self):
+                time.sleep(0.2)
+                super().rollback()
+
+        pool = self.make_pool(0, 1, connection_factory=SlowRollback)
+        conn = pool.getconn()
+        conn.cursor().execute("select 1")
+        t = threading.Thread(target=pool.putconn, args=(conn,))
+        t.start()
+        time.sleep(0.05)
+        t0 = time.monotonic()
+        stats = pool.get_stats()
+        self.assert_(time.monotonic() - t0 < 0.1)
+        # still counted while rolled back
+        self.assertEqual(stats['pool_size'], 1)
+        self.assert_(pool.getconn(timeout=5) is conn)
+        t.join()
+        self.assertEqual(pool.get_stats()['creations'], 1)
+
+    def test_check_discards_broken(self):
+        pool = self.make_pool(2, 2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        # terminate the backend of one idle connection
+        self.conn.autocommit = True
+        self.conn.cursor().execute(
+            "select pg_terminate_backend(%s)", (conn.info.backend_pid,))
+        time.sleep(0.1)
+
+        pool.check()
+        stats = pool.get_stats()
+        self.assertEqual(stats['ping_failures'], 1)
+        self.assertEqual(stats['pool_available'], 2)
+        self.assert_(conn.closed)
+        for i in range(2):
+            c = pool.getconn()
+            c.cursor().execute("select 1")
+
+    def test_check_max_idle(self):
+        pool = self.make_pool(1, 3, max_idle=0.1)
+        conns = [pool.getconn() for i in range(3)]
+        for conn in conns:
+            pool.putconn(conn)
+        time.sleep(0.2)
+        pool.check()
+        self.assertEqual(pool.get_stats()['pool_available'], 1)
+
+    def test_background_check(self):
+        pool = self.make_pool(1, 1, check_interval=0.05)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.close()
+        time.sleep(0.3)
+        self.assertEqual(pool.get_stats()['discarded'], 1)
+        self.assert_(not pool.getconn().closed)
+
+
+class AsyncConnectionPoolTests(ConnectingTestCase):
+    def run_async(self, coro):
+        return asyncio.run(asyncio.wait_for(coro, 10))
+
+    async def query(self, pool, sql, vars=None):
+        async with pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(sql, vars)
+            await wait_asyncio(conn)
+            return cur.fetchall()
+
+    def test_query(self):
+        async def f():
+            pool = AsyncConnectionPool(1, 2, dsn)
+            await pool.open()
+            self.assertEqual(pool.get_stats()['pool_available'], 1)
+            rv = await self.query(pool, "select %s::int", (42,))
+            await pool.closeall()
+            return rv
+
+        self.assertEqual(self.run_async(f()), [(42,)])
+
+    def test_concurrency(self):
+        async def f():
+            pool = AsyncConnectionPool(0, 2, dsn)
+            t0 = time.monotonic()
+            await asyncio.gather(
+                *(self.query(pool, "select pg_sleep(0.1)") for i in range(4)))
+            elapsed = time.monotonic() - t0
+            stats = pool.get_stats()
+            await pool.closeall()
+            return elapsed, stats
+
+        elapsed, stats = self.run_async(f())
+        self.assert_(0.2 <= elapsed < 0.35, elapsed)
+        self.assertEqual(stats['pool_size'], 2)
+
+    def test_fairness(self):
+        async def f():
+            pool = AsyncConnectionPool(0, 1, dsn)
+            order = []
+
+            async def worker(i):
+                async with pool.connection():
+                    order.append(i)
+                    await asyncio.sleep(0.01)
+
+            conn = await pool.getconn()
+            tasks = [asyncio.ensure_future(worker(i)) for i in range(5)]
+            await asyncio.sleep(0.05)
+            await pool.putconn(conn)
+            await asyncio.gather(*tasks)
+            await pool.closeall()
+            return order
+
+        self.assertEqual(self.run_async(f()), list(range(5)))
+
+    def test_max_waiters_and_timeout(self):
+        async def f():
+            pool = AsyncConnectionPool(0, 1, dsn, max_waiters=1, timeout=0.1)
+            await pool.getconn()
+            waiting = asyncio.ensure_future(pool.getconn())
+            await asyncio.sleep(0.01)
+            with self.assertRaises(PoolError):
+                await pool.getconn()
+            with self.assertRaises(PoolError):
+                await waiting
+            self.assertEqual(pool.get_stats()['waiting'], 0)
+            await pool.closeall()
+
+        self.run_async(f())
+
+    def test_cancelled_waiter_doesnt_leak(self):
+        async def f():
+            pool = AsyncConnectionPool(0, 1, dsn)
+            conn = await pool.getconn()
+            waiting = asyncio.ensure_future(pool.getconn())
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            await asyncio.sleep(0.01)
+            await pool.putconn(conn)
+            self.assertEqual(pool.get_stats()['pool_available'], 1)
+            await pool.closeall()
+
+        self.run_async(f())
+
+    def test_rollback_on_put(self):
+        async def f():
+            pool = AsyncConnectionPool(0, 1, dsn)
+            async with pool.connection() as conn:
+                cur = conn.cursor()
+                cur.execute("begin; select 1")
+                await wait_asyncio(conn)
+                self.assertEqual(
+                    conn.info.transaction_status,
+                    psycopg2.extensions.TRANSACTION_STATUS_INTRANS)
+            self.assertEqual(
+                conn.info.transaction_status,
+                psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+            await pool.closeall()
+
+        self.run_async(f())
+
+    def test_counted_during_rollback(self):
+        async def f():
+            pool = AsyncConnectionPool(0, 1, dsn)
+            conn = await pool.getconn()
+            cur = conn.cursor()
+            cur.execute("begin; select 1")
+            await wait_asyncio(conn)
+            putting = asyncio.ensure_future(pool.putconn(conn))
+            await asyncio.sleep(0)
+            self.assertEqual(pool.get_stats()['pool_size'], 1)
+            # waits for the rollback rather than opening a second connection
+            self.assert_(await pool.getconn() is conn)
+            await putting
+            self.assertEqual(pool.get_stats()['pool_size'], 1)
+            await pool.closeall()
+
+        self.run_async(f())
+
+    def test_cancel_query(self):
+        async def f():
+            pool = AsyncConnectionPool(0, 1, dsn)
+            task = asyncio.ensure_future(
+                self.query(pool, "select pg_sleep(10)"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # the busy connection was discarded
+            self.assertEqual(pool.get_stats()['pool_size'], 0)
+            self.assertEqual(await self.query(pool, "select 1"), [(1,)])
+            await pool.closeall()
+
+        self.run_async(f())
+
+
+def test_suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
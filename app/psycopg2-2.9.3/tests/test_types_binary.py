@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+#
+# test_types_binary.py - tests for the results received in binary format
+#
+# Copyright (C) 2020-2021 The Psycopg Team
+#
+# psycopg2 is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# psycopg2 is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE.  See the GNU Lesser General Public
+# License for more details.
+
+import uuid
+import unittest
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.extensions as ext
+
+from .testutils import ConnectingTestCase, skip_if_crdb
+
+
+@skip_if_crdb("binary results")
+class BinaryResultsTests(ConnectingTestCase):
+    def execute(self, query, vars=None, binary=True):
+        cur = self.conn.cursor()
+        cur.binary = binary
+        cur.execute(query, vars)
+        return cur.fetchone()
+
+    def assertSameAsText(self, query, vars=None):
+        text = self.execute(query, vars, binary=False)
+        binary = self.execute(query, vars)
+        self.assertEqual(binary, text)
+        self.assertEqual([type(v) for v in binary], [type(v) for v in text])
+        return binary
+
+    def test_attribute(self):
+        cur = self.conn.cursor()
+        self.assertEqual(cur.binary, False)
+        cur.binary = True
+        self.assertEqual(cur.binary, True)
+        cur.execute("select 1")
+        self.assertEqual(cur.fetchone(), (1,))
+
+    def test_numbers(self):
+        self.assertSameAsText("""
+            select 1::int2, -2::int2, 32767::int2, 123456::int4, -1::int4,
+                9223372036854775807::int8, (-9223372036854775808)::int8,
+                4294967295::oid, 1.5::float4, -0.1::float8,
+                'NaN'::float8 = 'NaN'::float8, 'Infinity'::float8""")
+
+    def test_numeric(self):
+        for v in ['0', '1', '-1', '10000', '123456789.000123456', '0.0001',
+                '-0.00000001', '99999999999999999999.99', '1e30', '1e-30',
+                '100', '0.10']:
+            self.assertSameAsText("select %s::numeric", (v,))
+        self.assert_(self.execute("select 'NaN'::numeric")[0].is_nan())
+
+    def test_text(self):
+        self.assertSameAsText("""
+            select 'hello'::text, 'x'::varchar, 'ab'::char(4), 'n'::name,
+                'a'::"char", '{"a": [1]}'::json, '{"a": [1]}'::jsonb,
+                'unknown', true, false""")
+        self.assertSameAsText("select %s::text", ("☃",))
+
+    def test_bytea(self):
+        rv = self.execute("select '\\x00ff'::bytea")
+        self.assert_(isinstance(rv[0], memoryview))
+        self.assertEqual(bytes(rv[0]), b'\x00\xff')
+
+        cur = self.conn.cursor()
+        cur.binary = True
+        ext.register_type(ext.BYTES, cur)
+        cur.execute("select '\\x00ff'::bytea")
+        self.assertEqual(cur.fetchone(), (b'\x00\xff',))
+
+    def test_dates(self):
+        self.assertSameAsText("""
+            select '2000-01-01'::date, '1999-12-31'::date, '0001-01-01'::date,
+                '9999-12-31'::date, 'infinity'::date, '-infinity'::date,
+                '2022-03-04 05:06:07.890123'::timestamp,
+                '1960-01-01 00:00:00.000001'::timestamp,
+                'infinity'::timestamp, '-infinity'::timestamp,
+                '23:59:59.999999'::time, '00:00'::time""")
+
+    def test_timestamptz(self):
+        self.conn.cursor().execute("set timezone to 'Asia/Kolkata'")
+        text = self.execute("select '2022-03-04 05:06:07.8+01'::timestamptz",
+            binary=False)[0]
+        binary = self.execute("select '2022-03-04 05:06:07.8+01'::timestamptz")[0]
+        self.assertEqual(binary, text)
+        self.assertEqual(binary.utcoffset(), timedelta(0))
+        self.assertEqual(binary,
+            datetime(2022, 3, 4, 4, 6, 7, 800000, tzinfo=timezone.utc))
+
+        self.assertSameAsText("select 'infinity'::timestamptz")
+
+    def test_nulls(self):
+        self.assertSameAsText("select null::int, null::text, null::date")
+
+    def test_uuid(self):
+        u = uuid.UUID('12345678-1234-5678-1234-567812345678')
+        self.assertEqual(
+            self.execute("select %s::uuid", (str(u),))[0], str(u))
+        psycopg2.extras.register_uuid(conn_or_curs=self.conn)
+        self.assertEqual(self.execute("select %s::uuid", (str(u),))[0], u)
+
+    def test_custom_typecasters(self):
+        # the text representation is passed to non default typecasters
+        cur = self.conn.cursor()
+        cur.binary = True
+        ext.register_type(ext.new_type(
+            (20, 23, 1082, 1114, 1184, 700, 16), "TEXT",
+            lambda s, cur: s), cur)
+        cur.execute("""
+            select 42::int8, -42, '2000-01-02'::date,
+                '2000-01-02 03:04:05.6'::timestamp,
+                '2000-01-02 03:04:05+00'::timestamptz, 0.25::float4, true""")
+        self.assertEqual(cur.fetchone(), ('42', '-42', '2000-01-02',
+            '2000-01-02 03:04:05.600000', '2000-01-02 03:04:05.000000+00',
+            '0.25', 't'))
+
+        # the default typecasters for another type are used too
+        ext.register_type(ext.new_type((23,), "DEC", ext.DECIMAL), cur)
+        cur.execute("select 42::int4")
+        self.assertEqual(cur.fetchone(), (Decimal(42),))
+
+    def test_not_supported(self):
+        cur = self.conn.cursor()
+        cur.binary = True
+        cur.execute("select '{1,2}'::int[]")
+        self.assertRaises(psycopg2.NotSupportedError, cur.fetchone)
+
+        # casting to text works
+        cur.execute("select '{1,2}'::int[]::text")
+        self.assertEqual(cur.fetchone(), ('{1,2}',))
+
+    def test_multiple_statements(self):
+        cur = self.conn.cursor()
+        cur.binary = True
+        self.assertRaises(psycopg2.ProgrammingError,
+            cur.execute, "select 1; select 2")
+
+    def test_named_cursor(self):
+        cur = self.conn.cursor('test')
+        cur.binary = True
+        cur.itersize = 2
+        cur.execute("select x, '2000-01-01'::date + x from generate_series(1, 5) x")
+        self.assertEqual(list(cur),
+            [(i, date(2000, 1, 1) + timedelta(days=i)) for i in range(1, 6)])
+
+    def test_fetch_columns(self):
+        cur = self.conn.cursor()
+        cur.binary = True
+        cur.execute("""
+            select x::int2, x::int8, x / 2.0::float8, x % 2 = 0,
+                '2000-01-01'::date + x,
+                '2000-01-01 00:00:00.5'::timestamp + x * '1 hour'::interval,
+                x::numeric
+            from generate_series(-1, 1) x""")
+        cols = cur.fetch_columns(numpy=False)
+        self.assertEqual(cols[0].tolist(), [-1, 0, 1])
+        self.assertEqual(cols[1].tolist(), [-1, 0, 1])
+        self.assertEqual(cols[2].tolist(), [-0.5, 0, 0.5])
+        self.assertEqual(cols[3].tolist(), [False, True, False])
+        self.assertEqual(cols[4].tolist(), [10956, 10957, 10958])
+        self.assertEqual(cols[5].tolist(),
+            [(946684800 + 3600 * x) * 1000000 + 500000 for x in (-1, 0, 1)])
+        self.assertEqual(cols[6], [Decimal(-1), Decimal(0), Decimal(1)])
+
+    def test_async(self):
+        aconn = self.connect(async_=True)
+        self.wait(aconn)
+        cur = aconn.cursor()
+        cur.binary = True
+        cur.execute("select 42::int8, '2000-01-01'::date")
+        self.wait(cur)
+        self.assertEqual(cur.fetchone(), (42, date(2000, 1, 1)))
+
+
+def test_suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,362 @@
+from sqlalchemy import select, delete, update, union, case, cast, tuple_, any_, func, bindparam, true, text, literal_column, Integer, Float, String, Text
+from sqlalchemy.dialects.postgresql import insert, ARRAY, JSONB
+from psycopg2 import sql
+import models
+
+# Hot-path statements, built once at import time.
+# Every request reuses the same construct and only binds new parameter values,
+# so SQLAlchemy skips rebuilding the query and hits its compiled cache
+# (the cache key of an identical construct is computed once, not per request).
+# Use them with db.execute(<statement>, {<param>: <value>}).
+
+# Post + its vote count, the shape of schemas.PostOut.
+# The count is the counter the vote endpoint keeps on the post: no join, no GROUP BY.
+_post_with_vote_count = select(models.Post, models.Post.votes_count.label('votes'))
+
+# Same, counting the votes table: exact even if the counter drifted (see vote_counts.py)
+_post_with_votes = (
+    select(models.Post, func.count(models.Votes.post_id).label('votes'))
+    .join(models.Votes, models.Votes.post_id == models.Post.id, isouter=True)
+    .group_by(models.Post.id)
+)
+
+def _posts_page(posts):
+    return (
+        posts
+        .where(models.Post.title.contains(bindparam('search')))
+        .limit(bindparam('limit'))
+        .offset(bindparam('skip'))
+    )
+
+# params: search, limit, skip
+get_posts = _posts_page(_post_with_vote_count)
+get_posts_exact = _posts_page(_post_with_votes)
+
+# params: id
+get_post = _post_with_vote_count.where(models.Post.id == bindparam('id'))
+get_post_exact = _post_with_votes.where(models.Post.id == bindparam('id'))
+
+# params: id
+get_user = select(models.User).where(models.User.id == bindparam('id'))
+
+# params: post_id
+post_exists = select(models.Post.id, models.Post.owner_id).where(models.Post.id == bindparam('post_id'))
+
+# params: post_id, user_id
+get_vote = select(models.Votes).where(
+    models.Votes.post_id == bindparam('post_id'), models.Votes.user_id == bindparam('user_id'))
+
+# Which of the posts the user voted on: one statement (and plan) whatever the number of posts
+# params: user_id, post_ids
+voted_posts = select(models.Votes.post_id).where(
+    models.Votes.user_id == bindparam('user_id'),
+    models.Votes.post_id == any_(bindparam('post_ids', type_=ARRAY(Integer))),
+)
+
+# params: post_id, user_id
+delete_vote = delete(models.Votes).where(
+    models.Votes.post_id == bindparam('post_id'), models.Votes.user_id == bindparam('user_id')
+).execution_options(synchronize_session=False)
+
+# params: limit, skip
+get_trending = (
+    _post_with_vote_count
+    .order_by(models.Post.hot_score.desc())
+    .limit(bindparam('limit'))
+    .offset(bindparam('skip'))
+)
+
+def _hot_score(votes):
+    return func.log(func.greatest(votes, 1)) + func.extract('epoch', models.Post.created_at) / models.TRENDING_DECAY_SECONDS
+
+# Keeps the post's vote count and trending score in step with the votes table, in the vote transaction.
+# params: post_id, delta
+update_post_votes = update(models.Post).where(models.Post.id == bindparam('post_id')).values(
+    votes_count=models.Post.votes_count + bindparam('delta'),
+    hot_score=_hot_score(models.Post.votes_count + bindparam('delta')),
+).returning(models.Post.votes_count).execution_options(synchronize_session=False)
+
+# Counter repair (see vote_counts.py): the posts whose counter doesn't match the votes table
+_vote_counts = (
+    select(models.Votes.post_id, func.count().label('votes'))
+    .group_by(models.Votes.post_id)
+    .subquery()
+)
+drifted_vote_counts = (
+    select(models.Post.id)
+    .join(_vote_counts, _vote_counts.c.post_id == models.Post.id, isouter=True)
+    .where(models.Post.votes_count != func.coalesce(_vote_counts.c.votes, 0))
+)
+
+# params: ids
+lock_posts = (
+    select(models.Post.id)
+    .where(models.Post.id.in_(bindparam('ids', expanding=True)))
+    .order_by(models.Post.id)
+    .with_for_update(key_share=True)
+)
+
+# params: ids
+_counted_votes = (
+    select(func.count()).where(models.Votes.post_id == models.Post.id).scalar_subquery()
+)
+recount_post_votes = update(models.Post).where(models.Post.id.in_(bindparam('ids', expanding=True))).values(
+    votes_count=_counted_votes,
+    hot_score=_hot_score(_counted_votes),
+).execution_options(synchronize_session=False)
+
+# Bulk vote writes of the vote buffer (see vote_buffer.py), pairs passed as two arrays.
+# Votes on posts or by users deleted since are skipped; RETURNING gives the votes really changed.
+# params: post_ids, user_ids
+_vote_pairs = func.unnest(
+    bindparam('post_ids', type_=ARRAY(Integer)), bindparam('user_ids', type_=ARRAY(Integer))
+).table_valued('post_id', 'user_id').render_derived(name='vote_pairs')
+insert_votes = insert(models.Votes).from_select(
+    ['post_id', 'user_id'],
+    select(_vote_pairs.c.post_id, _vote_pairs.c.user_id)
+    .join(models.Post, models.Post.id == _vote_pairs.c.post_id)
+    .join(models.User, models.User.id == _vote_pairs.c.user_id)
+).on_conflict_do_nothing().returning(models.Votes.post_id)
+delete_votes = delete(models.Votes).where(
+    models.Votes.post_id == _vote_pairs.c.post_id, models.Votes.user_id == _vote_pairs.c.user_id
+).returning(models.Votes.post_id).execution_options(synchronize_session=False)
+
+# params: post_ids, deltas
+_vote_deltas = func.unnest(
+    bindparam('post_ids', type_=ARRAY(Integer)), bindparam('deltas', type_=ARRAY(Integer))
+).table_valued('post_id', 'delta').render_derived(name='vote_deltas')
+update_posts_votes = update(models.Post).where(models.Post.id == _vote_deltas.c.post_id).values(
+    votes_count=models.Post.votes_count + _vote_deltas.c.delta,
+    hot_score=_hot_score(models.Post.votes_count + _vote_deltas.c.delta),
+).returning(models.Post.id, models.Post.votes_count).execution_options(synchronize_session=False)
+
+# Nothing inserted (no row returned) if the follow exists, concurrent requests included
+# params: follower_id, followee_id
+insert_follow = insert(models.Follow).on_conflict_do_nothing().returning(models.Follow.followee_id)
+
+# params: follower_id, followee_id
+delete_follow = delete(models.Follow).where(
+    models.Follow.follower_id == bindparam('follower_id'), models.Follow.followee_id == bindparam('followee_id')
+).execution_options(synchronize_session=False)
+
+# params: user_id, delta
+update_followers_count = update(models.User).where(models.User.id == bindparam('user_id')).values(
+    followers_count=models.User.followers_count + bindparam('delta')
+).returning(models.User.followers_count).execution_options(synchronize_session=False)
+
+# Fan-out on write: a new post goes into the timelines of the author's followers and the author's own.
+# Runs as a job (see jobs.py): nothing to do if the post was deleted since.
+# params: post_id
+fanout_post = insert(models.Timeline).from_select(
+    ['user_id', 'post_id'],
+    select(models.Follow.follower_id, models.Post.id)
+    .join(models.Follow, models.Follow.followee_id == models.Post.owner_id)
+    .where(models.Post.id == bindparam('post_id'))
+    .union_all(select(models.Post.owner_id, models.Post.id).where(models.Post.id == bindparam('post_id')))
+).on_conflict_do_nothing()
+
+# Both run as jobs (see jobs.py), maybe after a later unfollow or follow:
+# they only change the timeline if the follow is still (not) there.
+_following = select(models.Follow.follower_id).where(
+    models.Follow.follower_id == bindparam('follower_id'), models.Follow.followee_id == bindparam('followee_id')
+).exists()
+
+# The latest posts of a newly followed user.
+# params: follower_id, followee_id, limit
+backfill_timeline = insert(models.Timeline).from_select(
+    ['user_id', 'post_id'],
+    select(bindparam('follower_id', type_=Integer), models.Post.id)
+    .where(models.Post.owner_id == bindparam('followee_id'), _following)
+    .order_by(models.Post.id.desc())
+    .limit(bindparam('limit'))
+).on_conflict_do_nothing()
+
+# params: follower_id, followee_id
+unfollow_timeline = delete(models.Timeline).where(
+    models.Timeline.user_id == bindparam('follower_id'),
+    models.Timeline.post_id == models.Post.id,
+    models.Post.owner_id == bindparam('followee_id'),
+    ~_following,
+).execution_options(synchronize_session=False)
+
+# The latest posts of an author into all their followers' timelines, once the author is
+# back to being fanned out on write: their posts of the fan-in period, and the history of the
+# followers who followed then, were never copied.
+# params: followee_id, limit
+_latest_posts = (
+    select(models.Post.id)
+    .where(models.Post.owner_id == bindparam('followee_id'))
+    .order_by(models.Post.id.desc())
+    .limit(bindparam('limit'))
+    .subquery()
+)
+backfill_followers = insert(models.Timeline).from_select(
+    ['user_id', 'post_id'],
+    select(models.Follow.follower_id, _latest_posts.c.id)
+    .join(_latest_posts, true())
+    .where(models.Follow.followee_id == bindparam('followee_id'))
+).on_conflict_do_nothing()
+
+# Home timeline page: a range scan of the user's timeline rows, merged with the latest
+# posts of the followed authors too big to be fanned out on write (one index scan each).
+# params: user_id, before, limit, max_followers
+_fanned_out = (
+    select(models.Timeline.post_id.label('id'))
+    .where(models.Timeline.user_id == bindparam('user_id'), models.Timeline.post_id < bindparam('before'))
+    .order_by(models.Timeline.post_id.desc())
+    .limit(bindparam('limit'))
+)
+_author_posts = (
+    select(models.Post.id)
+    .where(models.Post.owner_id == models.Follow.followee_id, models.Post.id < bindparam('before'))
+    .order_by(models.Post.id.desc())
+    .limit(bindparam('limit'))
+    .lateral()
+)
+_fanned_in = (
+    select(_author_posts.c.id)
+    .select_from(models.Follow)
+    .join(models.User, models.User.id == models.Follow.followee_id)
+    .join(_author_posts, true())
+    .where(models.Follow.follower_id == bindparam('user_id'),
+           models.User.followers_count > bindparam('max_followers'))
+)
+# UNION: posts fanned out before their author grew past the threshold are in both
+_home_ids = union(_fanned_out, _fanned_in).subquery()
+get_home = (
+    _post_with_vote_count
+    .where(models.Post.id.in_(select(_home_ids.c.id)))
+    .order_by(models.Post.id.desc())
+    .limit(bindparam('limit'))
+)
+
+# Notifications (see notifications.py), aggregated per post (so per recipient, the owner) and
+# window: the events add to the window's unread row, or start a new one.
+# RETURNING tells the new (unread) rows.
+# params: kind, window_start, post_ids, counts
+_notification_counts = func.unnest(
+    bindparam('post_ids', type_=ARRAY(Integer)), bindparam('counts', type_=ARRAY(Integer))
+).table_valued('post_id', 'count').render_derived(name='notification_counts')
+_new_notifications = insert(models.Notification).from_select(
+    ['user_id', 'post_id', 'kind', 'window_start', 'count'],
+    select(models.Post.owner_id, models.Post.id, bindparam('kind', type_=String),
+           bindparam('window_start', type_=models.Notification.window_start.type), _notification_counts.c.count)
+    .join(models.Post, models.Post.id == _notification_counts.c.post_id)
+    # Same order as the other writers of these rows and of the users' counters
+    .order_by(models.Post.owner_id, models.Post.id)
+)
+upsert_notifications = _new_notifications.on_conflict_do_update(
+    index_elements=['user_id', 'post_id', 'kind', 'window_start'],
+    index_where=text('NOT read'),
+    set_={'count': models.Notification.count + _new_notifications.excluded.count, 'updated_at': func.now()},
+).returning(models.Notification.user_id, literal_column('xmax = 0').label('inserted'))
+
+# params: user_ids, deltas
+_unread_deltas = func.unnest(
+    bindparam('user_ids', type_=ARRAY(Integer)), bindparam('deltas', type_=ARRAY(Integer))
+).table_valued('user_id', 'delta').render_derived(name='unread_deltas')
+update_unread_notifications = update(models.User).where(models.User.id == _unread_deltas.c.user_id).values(
+    unread_notifications=models.User.unread_notifications + _unread_deltas.c.delta,
+).execution_options(synchronize_session=False)
+
+# Keyset pagination, newest first: an index range scan whatever the page
+# params: user_id, before, limit
+get_notifications = (
+    select(models.Notification)
+    .where(models.Notification.user_id == bindparam('user_id'), models.Notification.id < bindparam('before'))
+    .order_by(models.Notification.id.desc())
+    .limit(bindparam('limit'))
+)
+
+# params: recipient_id, up_to
+mark_notifications_read = update(models.Notification).where(
+    models.Notification.user_id == bindparam('recipient_id'),
+    models.Notification.id <= bindparam('up_to'),
+    models.Notification.read == False,
+).values(read=True).execution_options(synchronize_session=False)
+
+# params: user_id, delta
+update_user_unread = update(models.User).where(models.User.id == bindparam('user_id')).values(
+    unread_notifications=models.User.unread_notifications + bindparam('delta'),
+).returning(models.User.unread_notifications).execution_options(synchronize_session=False)
+
+# Job queue (see jobs.py). Workers claim the due jobs with SKIP LOCKED: each gets its own
+# batch without waiting on the others, a job is locked until its worker commits or dies.
+# params: limit
+claim_jobs = (
+    select(models.Job.id, models.Job.kind, models.Job.payload)
+    .where(models.Job.failed_at.is_(None), models.Job.run_at <= func.now())
+    .order_by(models.Job.run_at, models.Job.id)
+    .limit(bindparam('limit'))
+    .with_for_update(skip_locked=True)
+)
+
+# params: ids
+delete_jobs = delete(models.Job).where(models.Job.id.in_(bindparam('ids', expanding=True)))
+
+# Run again after retry_seconds * 2^attempts, or fail for good after max_attempts.
+# params: ids, error, retry_seconds, max_attempts
+retry_jobs = update(models.Job).where(models.Job.id.in_(bindparam('ids', expanding=True))).values(
+    attempts=models.Job.attempts + 1,
+    last_error=bindparam('error', type_=String),
+    run_at=func.now() + bindparam('retry_seconds', type_=Float) * func.power(2, models.Job.attempts)
+        * literal_column("interval '1 second'"),
+    failed_at=case((models.Job.attempts + 1 >= bindparam('max_attempts'), func.now())),
+).returning(models.Job.failed_at.isnot(None)).execution_options(synchronize_session=False)
+
+# The queue per kind, for GET /admin/jobs
+job_queue = select(
+    models.Job.kind,
+    func.count().filter(models.Job.failed_at.is_(None) & (models.Job.run_at <= func.now())).label('due'),
+    func.count().filter(models.Job.failed_at.is_(None) & (models.Job.run_at > func.now())).label('scheduled'),
+    func.count().filter(models.Job.failed_at.isnot(None)).label('failed'),
+    func.extract('epoch', func.now() - func.min(models.Job.run_at).filter(
+        models.Job.failed_at.is_(None) & (models.Job.run_at <= func.now()))).label('oldest_due_seconds'),
+).group_by(models.Job.kind).order_by(models.Job.kind)
+
+# NOTIFY every payload, sent on commit (see realtime.py)
+# params: channel, payloads
+_payloads = func.unnest(bindparam('payloads', type_=ARRAY(String))).table_valued('payload').render_derived(name='payloads')
+notify = select(func.pg_notify(bindparam('channel'), _payloads.c.payload)).select_from(_payloads)
+
+# Outbox (see outbox.py)
+# params: topics, payloads
+_events = func.unnest(
+    bindparam('topics', type_=ARRAY(String)), bindparam('payloads', type_=ARRAY(String))
+).table_valued('topic', 'payload').render_derived(name='events')
+insert_outbox = insert(models.OutboxEvent).from_select(
+    ['topic', 'payload'], select(_events.c.topic, cast(_events.c.payload, JSONB)))
+
+# Transactions before the snapshot's xmin are all finished: their rows are there for good,
+# rows written from now on have a greater tx_id. So reading in (tx_id, id) order up to it
+# never skips a row committed later.
+_finished = models.OutboxEvent.tx_id < func.txid_snapshot_xmin(func.txid_current_snapshot())
+
+# params: after_tx_id, after_id, limit
+read_outbox = (
+    select(models.OutboxEvent.tx_id, models.OutboxEvent.id, cast(models.OutboxEvent.payload, Text).label('payload'))
+    .where(tuple_(models.OutboxEvent.tx_id, models.OutboxEvent.id) > tuple_(bindparam('after_tx_id'), bindparam('after_id')),
+           _finished)
+    .order_by(models.OutboxEvent.tx_id, models.OutboxEvent.id)
+    .limit(bindparam('limit'))
+)
+
+# Where a new relay starts: after the last row read_outbox can return now
+outbox_tail = (
+    select(models.OutboxEvent.tx_id, models.OutboxEvent.id)
+    .where(_finished)
+    .order_by(models.OutboxEvent.tx_id.desc(), models.OutboxEvent.id.desc())
+    .limit(1)
+)
+
+# params: seconds
+prune_outbox = delete(models.OutboxEvent).where(
+    models.OutboxEvent.created_at < func.now() - bindparam('seconds', type_=Float) * literal_column("interval '1 second'")
+).execution_options(synchronize_session=False)
+
+# A user's posts as CSV, for database.copy_iter(). COPY can't bind parameters:
+# params: owner_id, composed with .format(owner_id=sql.Literal(<id>))
+export_posts = sql.SQL(
+    "COPY (SELECT id, title, content, published, created_at FROM posts"
+    " WHERE owner_id = {owner_id} ORDER BY id) TO STDOUT (FORMAT csv, HEADER)"
+)
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict, deque
+from itertools import islice
+
+import psycopg2
+from starlette.concurrency import run_in_threadpool
+
+import queries, outbox
+from config import settings
+
+# Live post and vote updates (enabled with settings.realtime).
+#
+# The write paths NOTIFY the changes on CHANNEL in their transaction (notify_post(),
+# notify_votes()), so they go out on commit and only if committed. Each worker keeps
+# one connection LISTENing, read from the event loop, and fans every notification out
+# to its subscribers (the WebSocket clients of routers/updates.py, the Server-Sent
+# Events streams of GET /posts/stream):
+#   * the payload is a JSON string, forwarded as is to every WebSocket subscriber
+#   * for SSE it is encoded once into an event, the same bytes going to every stream
+#   * each subscriber has a bounded send queue; a client not keeping up fills it and
+#     is evicted (disconnected) rather than buffering without limit
+#   * the last settings.realtime_replay_size SSE events are kept: a stream reconnecting
+#     with Last-Event-ID (EventSource does it by itself, e.g. after an eviction) gets
+#     the ones it missed. Event ids are per worker: "<stream id>-<sequence number>".
+# Notifications sent while the listener is reconnecting are lost: clients needing an
+# exact state re-read it (GET /posts/{id}) after connecting.
+# With settings.outbox the events go through the outbox table instead, and the hub
+# subscribes to its relay (see outbox.py): no LISTEN connection, nothing lost on errors.
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "post_updates"
+
+
+def notify_post(db, post):
+    _send(db, [{"type": "post", "post_id": post.id, "owner_id": post.owner_id, "title": post.title}])
+
+
+def notify_votes(db, counts):
+    """counts: (post_id, votes) of the posts whose vote count changed."""
+    if counts:
+        _send(db, [{"type": "votes", "post_id": post_id, "votes": votes} for post_id, votes in counts])
+
+
+def _send(db, events):
+    if settings.outbox:
+        outbox.record(db, events)
+    elif settings.realtime:
+        db.execute(queries.notify, {"channel": CHANNEL, "payloads": [json.dumps(event) for event in events]})
+
+
+class Subscriber:
+    def __init__(self, queue_size: int, sse: bool = False):
+        # Gets the encoded SSE events if sse, else the payloads
+        self.sse = sse
+        self.queue = asyncio.Queue(queue_size)
+        self.posts = set()
+        self.feed = False
+        self.evicted = asyncio.Event()
+
+
+class Hub:
+    def __init__(self, queue_size: int, replay_size: int):
+        self.queue_size = queue_size
+        # Subscribers of all the updates, and per post id
+        self._feed = set()
+        self._posts = defaultdict(set)
+        # SSE event ids: Last-Event-IDs of another worker (or an earlier process) can't be resumed
+        self.stream_id = uuid.uuid4().hex[:12]
+        self._seq = 0
+        # The last encoded events, the newest being number self._seq
+        self._events = deque(maxlen=replay_size)
+        self._conn = None
+        self._fd = None
+        self._connecting = None
+
+    def subscriber(self, sse: bool = False):
+        return Subscriber(self.queue_size, sse)
+
+    def subscribe(self, subscriber: Subscriber, post_ids=(), feed: bool = False):
+        for post_id in post_ids:
+            subscriber.posts.add(post_id)
+            self._posts[post_id].add(subscriber)
+        if feed:
+            subscriber.feed = True
+            self._feed.add(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber, post_ids=(), feed: bool = False):
+        for post_id in post_ids:
+            subscriber.posts.discard(post_id)
+            subscribers = self._posts.get(post_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._posts[post_id]
+        if feed:
+            subscriber.feed = False
+            self._feed.discard(subscriber)
+
+    def remove(self, subscriber: Subscriber):
+        self.unsubscribe(subscriber, list(subscriber.posts), feed=True)
+
+    def resume(self, subscriber: Subscriber, last_event_id: str):
+        """Subscribe to the feed after last_event_id.
+
+        Returns the encoded events since then, None if they aren't all in the replay buffer
+        any more (or the id is from another stream): the client has to reload its state.
+        """
+        self.subscribe(subscriber, feed=True)
+        stream_id, _, seq = last_event_id.partition("-")
+        if stream_id != self.stream_id or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        # Events after seq, the oldest one kept being self._seq - len(self._events) + 1
+        start = int(seq) - (self._seq - len(self._events))
+        if start < 0:
+            return None
+        return list(islice(self._events, start, None))
+
+    def publish(self, payload: str):
+        event = json.loads(payload)
+        self._seq += 1
+        data = f"id: {self.stream_id}-{self._seq}\nevent: {event['type']}\ndata: {payload}\n\n".encode()
+        self._events.append(data)
+
+        slow = [s for s in self._feed if not self._put(s, data if s.sse else payload)]
+        for subscriber in self._posts.get(event.get("post_id"), ()):
+            # Feed subscribers already have it
+            if not subscriber.feed and not self._put(subscriber, data if subscriber.sse else payload):
+                slow.append(subscriber)
+        for subscriber in slow:
+            self.remove(subscriber)
+            subscriber.evicted.set()
+
+    @staticmethod
+    def _put(subscriber, message):
+        try:
+            subscriber.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    # The LISTEN connection, read from the event loop
+
+    def start(self):
+        if settings.outbox:
+            outbox.relay.subscribe(self.publish)
+            return
+        self._connecting = asyncio.create_task(self._connect())
+
+    def stop(self):
+        if settings.outbox:
+            outbox.relay.unsubscribe(self.publish)
+            return
+        if self._connecting is not None:
+            self._connecting.cancel()
+        self._close()
+
+    async def _connect(self):
+        delay = 1
+        while True:
+            try:
+                conn = await run_in_threadpool(self._open)
+                break
+            except psycopg2.OperationalError:
+                logger.exception("Can't open the LISTEN connection, retrying in %s s", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+        self._conn, self._fd = conn, conn.fileno()
+        asyncio.get_running_loop().add_reader(self._fd, self._on_readable)
+
+    @staticmethod
+    def _open():
+        conn = psycopg2.connect(
+            host=settings.database_hostname, port=settings.database_port, dbname=settings.database_name,
+            user=settings.database_username, password=settings.database_password)
+        conn.autocommit = True
+        conn.notifies = deque()
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error:
+            logger.exception("Lost the LISTEN connection, reconnecting")
+            self._close()
+            self.start()
+            return
+        notifies = self._conn.notifies
+        while notifies:
+            self.publish(notifies.popleft().payload)
+
+    def _close(self):
+        if self._conn is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            self._conn.close()
+            self._conn = self._fd = None
+
+
+hub = Hub(settings.realtime_queue_size, settings.realtime_replay_size)
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, status
+import oauth2, profiling, database, queries, jobs
+from sqlalchemy.orm import Session
+
+# Only included with their setting on, and only for settings.admin_user_ids (see main.py)
+profiling_router = APIRouter(
+    prefix="/admin",
+    tags=["ADMIN"],
+    dependencies=[Depends(oauth2.get_admin_user)]
+)
+jobs_router = APIRouter(
+    prefix="/admin",
+    tags=["ADMIN"],
+    dependencies=[Depends(oauth2.get_admin_user)]
+)
+
+# async: runs on the event loop, the same thread updating the profiling stats
+@profiling_router.get("/sql-profile")
+async def get_sql_profile(limit: int = 20):
+    return {
+        "routes": profiling.route_stats.summary()[:limit],
+        "queries": profiling.query_stats.top(limit),
+        "queries_dropped": profiling.query_stats.dropped,
+    }
+
+
+@profiling_router.delete("/sql-profile", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_sql_profile():
+    profiling.route_stats.reset()
+    profiling.query_stats.reset()
+
+
+# The queue (all the processes) and the counters of this process' workers
+@jobs_router.get("/jobs")
+def get_jobs(db: Session = Depends(database.get_db)):
+    return {
+        "queue": [dict(row._mapping) for row in db.execute(queries.job_queue)],
+        "workers": jobs.stats.summary(),
+    }
@@ -3,19 +3,35 @@ from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from database import get_db
 import schemas, models, utils, oauth2
+from login_guard import login_guard, burn_verify
+import math
 
 router = APIRouter(tags=["AUTHENTICATION"])
 
 @router.post("/login", response_model=schemas.Token)
 def login(user_credentials: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
 # def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == user_credentials.username).first()
+    email = user_credentials.username
+    invalid_credentials = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
 
+    # Locked out (known or unknown email alike): reject before touching the DB or bcrypt
+    retry_after = login_guard.retry_after(email)
+    if retry_after:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many failed login attempts",
+        headers={"Retry-After": str(math.ceil(retry_after))})
+
+    # Known or unknown email, the same lookup and the same bcrypt cost (see login_guard.py)
+    user = db.query(models.User).filter(models.User.email == email).first()
     if not user:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
+        burn_verify(user_credentials.password)
+        login_guard.record_failure(email)
+        raise invalid_credentials
     
     if not utils.verify(user_credentials.password, user.password):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+        login_guard.record_failure(email)
+        raise invalid_credentials
+
+    login_guard.record_success(email)
     
     # Create a JWT Token
     access_token = oauth2.create_access_token(data = {"user_id":user.id})
@@ -0,0 +1,46 @@
+from fastapi import Response, status, HTTPException, Depends, APIRouter
+import oauth2, database, queries, jobs
+from sqlalchemy.orm import Session
+from config import settings
+
+router = APIRouter(
+    prefix="/follow",  # For ID: /follow/{id}
+    tags=["FOLLOW"]
+)
+
+@router.post("/{id}", status_code=status.HTTP_201_CREATED)
+def follow(id: int, db: Session = Depends(database.get_db), current_user: int = Depends(oauth2.get_current_user)):
+    if id == current_user.id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Users can't follow themselves")
+
+    followee = db.execute(queries.get_user, {"id": id}).scalars().first()
+    if not followee:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User with id: {id} does not exist")
+
+    follow_params = {"follower_id": current_user.id, "followee_id": id}
+    if not db.execute(queries.insert_follow, follow_params).first():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"User {current_user.id} already follows user {id}.")
+
+    followers_count = db.execute(queries.update_followers_count, {"user_id": id, "delta": 1}).scalar()
+    # Backfill whenever the author's new posts are fanned out on write (the create_post test, on the
+    # count including this follow); past the threshold get_home merges in the author's latest posts
+    if followers_count <= settings.timeline_fanout_max_followers:
+        jobs.enqueue(db, "backfill_timeline", **follow_params, limit=settings.timeline_backfill)
+    db.commit()
+    return {"Message": f"Successfully followed user {id}"}
+
+
+@router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
+def unfollow(id: int, db: Session = Depends(database.get_db), current_user: int = Depends(oauth2.get_current_user)):
+    follow_params = {"follower_id": current_user.id, "followee_id": id}
+    if not db.execute(queries.delete_follow, follow_params).rowcount:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {current_user.id} doesn't follow user {id}")
+
+    followers_count = db.execute(queries.update_followers_count, {"user_id": id, "delta": -1}).scalar()
+    jobs.enqueue(db, "unfollow_timeline", **follow_params)
+    # Back under the fan-out threshold: get_home stops merging the author's posts in, copy the
+    # latest ones into the timelines of the followers (see queries.backfill_followers)
+    if followers_count == settings.timeline_fanout_max_followers:
+        jobs.enqueue(db, "backfill_followers", followee_id=id, limit=settings.timeline_backfill)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
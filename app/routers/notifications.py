@@ -0,0 +1,29 @@
+from fastapi import Depends, APIRouter
+import schemas, oauth2, database, queries
+from sqlalchemy.orm import Session
+from typing import Optional
+
+router = APIRouter(
+    prefix="/notifications",
+    tags=["NOTIFICATIONS"]
+)
+
+# Newest first; the next page is before=<id of the last one>. The unread count is the
+# user's counter (see notifications.py), the pages never count the rows.
+@router.get("/", response_model=schemas.NotificationPage)
+def get_notifications(db: Session = Depends(database.get_db), current_user: int = Depends(oauth2.get_current_user),
+limit: int = 20, before: Optional[int] = None):
+    params = {"user_id": current_user.id, "before": before or 2**31 - 1, "limit": limit}
+    notifications = db.execute(queries.get_notifications, params).scalars().all()
+    return {"unread": current_user.unread_notifications, "notifications": notifications}
+
+
+@router.post("/read", response_model=schemas.UnreadCount)
+def mark_read(read: schemas.NotificationsRead, db: Session = Depends(database.get_db), current_user: int = Depends(oauth2.get_current_user)):
+    params = {"recipient_id": current_user.id, "up_to": read.up_to or 2**31 - 1}
+    marked = db.execute(queries.mark_notifications_read, params).rowcount
+    unread = current_user.unread_notifications
+    if marked:
+        unread = db.execute(queries.update_user_unread, {"user_id": current_user.id, "delta": -marked}).scalar()
+    db.commit()
+    return {"unread": unread}
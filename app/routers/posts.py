@@ -1,7 +1,12 @@
-import models, schemas, oauth2
-from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
+import asyncio
+import models, schemas, oauth2, queries, realtime, jobs
+from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, copy_iter
+from config import settings
+from vote_buffer import vote_buffer
+from psycopg2 import sql
 from typing import List, Optional
 from sqlalchemy import func
 
@@ -14,7 +19,7 @@ router = APIRouter(
 # @router.get("/", response_model=List[schemas.Post])
 @router.get("/", response_model=List[schemas.PostOut])
 def get_posts(db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user),
-limit: int = 10, skip: int = 0, search: Optional[str]= ""):
+limit: int = 10, skip: int = 0, search: Optional[str]= "", fresh: bool = False, voted_by_me: bool = False):
 
     # posts = db.query(models.Post).all()
     # with LIMIT: posts = db.query(models.Post).limit(limit).all()
@@ -24,19 +29,112 @@ limit: int = 10, skip: int = 0, search: Optional[str]= ""):
     # Getting all posts for Individual Users:
     # posts = db.query(models.Post).filter(models.Post.owner_id == current_user,id).all()
 
-    posts = db.query(models.Post, func.count(models.Votes.post_id).label('votes')).join(models.Votes, models.Votes.post_id == models.Post.id, isouter = True).group_by(models.Post.id).filter(models.Post.title.contains(search)).limit(limit).offset(skip).all()
-
+    # posts = db.query(models.Post, func.count(models.Votes.post_id).label('votes')).join(models.Votes, models.Votes.post_id == models.Post.id, isouter = True).group_by(models.Post.id).filter(models.Post.title.contains(search)).limit(limit).offset(skip).all()
+    # Prebuilt statement, see queries.py. The vote counts are the counters kept on the posts,
+    # fresh=true counts the votes table instead (slower, exact even if a counter drifted)
+    statement = queries.get_posts_exact if fresh else queries.get_posts
+    posts = db.execute(statement, {"search": search, "limit": limit, "skip": skip}).all()
+
+    # Plus the votes still in the write-behind buffer, if any
+    posts = vote_buffer.overlay(posts)
+    return with_voted_by_me(db, posts, current_user.id) if voted_by_me else posts
+
+
+# The posts (Post, votes) rows with whether the user voted on each: one lookup for all of them
+def with_voted_by_me(db: Session, posts, user_id: int):
+    posts = [post if isinstance(post, dict) else dict(post._mapping) for post in posts]
+    voted = set(db.execute(queries.voted_posts,
+                           {"user_id": user_id, "post_ids": [post["Post"].id for post in posts]}).scalars())
+    for post in posts:
+        # The write-behind buffer has the latest state
+        buffered = vote_buffer.state(post["Post"].id, user_id)
+        post["voted_by_me"] = post["Post"].id in voted if buffered is None else buffered
     return posts
 
 
+# Declared before /{id}: CSV export of the user's posts, streamed from COPY in constant memory
+@router.get("/export")
+def export_posts(db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+    statement = queries.export_posts.format(owner_id=sql.Literal(current_user.id))
+    return StreamingResponse(copy_iter(db, statement), media_type="text/csv",
+                             headers={"Content-Disposition": "attachment; filename=posts.csv"})
+
+
+# Declared before /{id}: new posts and vote counts as Server-Sent Events, from realtime.hub.
+# EventSource can't set headers: the access token is a query parameter. A reconnecting
+# client gets the events it missed (Last-Event-ID) or, if they're gone, a "reset" event.
+@router.get("/stream")
+async def stream_posts(token: str, last_event_id: Optional[str] = Header(None)):
+    if not settings.realtime:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live updates are disabled")
+    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    oauth2.verify_access_token(token, credentials_exception)
+
+    hub = realtime.hub
+    subscriber = hub.subscriber(sse=True)
+    if last_event_id is None:
+        hub.subscribe(subscriber, feed=True)
+        missed = []
+    else:
+        missed = hub.resume(subscriber, last_event_id)
+
+    async def events():
+        try:
+            if missed is None:
+                yield b"event: reset\ndata: {}\n\n"
+            else:
+                for data in missed:
+                    yield data
+            queue = subscriber.queue
+            while not subscriber.evicted.is_set():
+                try:
+                    yield queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    try:
+                        yield await asyncio.wait_for(queue.get(), settings.realtime_keepalive_seconds)
+                    except asyncio.TimeoutError:
+                        yield b": keep-alive\n\n"
+            # Evicted: ending the stream makes EventSource reconnect and resume from its last event
+        finally:
+            hub.remove(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# Declared before /{id}: the hottest posts first, read from the index on the trending score
+@router.get("/trending", response_model=List[schemas.PostOut])
+def get_trending(db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user),
+limit: int = 10, skip: int = 0, voted_by_me: bool = False):
+    posts = vote_buffer.overlay(db.execute(queries.get_trending, {"limit": limit, "skip": skip}).all())
+    return with_voted_by_me(db, posts, current_user.id) if voted_by_me else posts
+
+
+# Declared before /{id}: the posts of the followed users and the user's own, newest first.
+# Pass the last id of a page as `before` to get the next one.
+@router.get("/home", response_model=List[schemas.PostOut])
+def get_home(db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user),
+limit: int = 10, before: Optional[int] = None, voted_by_me: bool = False):
+    params = {"user_id": current_user.id, "before": before if before is not None else 2**31 - 1, "limit": limit,
+              "max_followers": settings.timeline_fanout_max_followers}
+    posts = vote_buffer.overlay(db.execute(queries.get_home, params).all())
+    return with_voted_by_me(db, posts, current_user.id) if voted_by_me else posts
+
+
 @router.post("/", status_code = status.HTTP_201_CREATED, response_model=schemas.Post)
 def create_post(post: schemas.PostCreate, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
     #not efficient if we have many fields in the DB
     # new_post = models.Post(title = post.title, content = post.content, published = post.published)
     # EFFICIENT way of Unpacking fields for DB
-    print(current_user.id)
     new_post = models.Post(owner_id = current_user.id, **post.dict())
     db.add(new_post)
+    db.flush()
+    # The author's own timeline right away. Fan-out on write runs as a job (see jobs.py); big
+    # accounts aren't fanned out, their followers merge their posts in when reading (see queries.get_home)
+    db.add(models.Timeline(user_id = current_user.id, post_id = new_post.id))
+    if current_user.followers_count <= settings.timeline_fanout_max_followers:
+        jobs.enqueue(db, "fanout_post", post_id = new_post.id)
+    realtime.notify_post(db, new_post)
     db.commit()
     db.refresh(new_post)
     return new_post
@@ -44,17 +142,20 @@ def create_post(post: schemas.PostCreate, db: Session = Depends(get_db), current
 
 
 @router.get("/{id}", response_model=schemas.PostOut)
-def get_post(id: int, response: Response, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+def get_post(id: int, response: Response, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user),
+fresh: bool = False, voted_by_me: bool = False):
     # post = db.query(models.Post).filter(models.Post.id == id).first()
 
-    post = db.query(models.Post, func.count(models.Votes.post_id).label('votes')).join(models.Votes, models.Votes.post_id == models.Post.id, isouter = True).group_by(models.Post.id).filter(models.Post.id == id).first()
+    # post = db.query(models.Post, func.count(models.Votes.post_id).label('votes')).join(models.Votes, models.Votes.post_id == models.Post.id, isouter = True).group_by(models.Post.id).filter(models.Post.id == id).first()
+    post = db.execute(queries.get_post_exact if fresh else queries.get_post, {"id": id}).first()
 
 
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id: {id} not found!")
         # response.status_code = status.HTTP_404_NOT_FOUND
         # return {'message': f"Post with id: {id} not found!"}
-    return post
+    posts = vote_buffer.overlay([post])
+    return (with_voted_by_me(db, posts, current_user.id) if voted_by_me else posts)[0]
 
 
 @router.delete("/{id}", status_code = status.HTTP_204_NO_CONTENT)
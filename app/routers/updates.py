@@ -0,0 +1,80 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+import oauth2
+from config import settings
+from realtime import hub
+
+# No prefix: FastAPI 0.68 doesn't apply the router prefix to WebSocket routes
+router = APIRouter(
+    tags=["UPDATES"]
+)
+
+# Live updates over a WebSocket, fanned out by realtime.hub.
+# The client sends {"subscribe": [<post id>, ...]}, {"unsubscribe": [...]} and
+# {"feed": true|false} (every new post and vote count), and receives the updates
+# as JSON text messages: {"type": "post"|"votes", "post_id": ..., ...}.
+# Browsers can't set headers on a WebSocket: the access token is a query parameter.
+@router.websocket("/updates/ws")
+async def updates(websocket: WebSocket, token: str):
+    try:
+        oauth2.verify_access_token(token, ValueError())
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = hub.subscriber()
+    tasks = [
+        asyncio.create_task(send_updates(websocket, subscriber)),
+        asyncio.create_task(receive_commands(websocket, subscriber)),
+        asyncio.create_task(subscriber.evicted.wait()),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.remove(subscriber)
+
+    if subscriber.evicted.is_set():
+        # Too slow to keep up with the updates
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+
+async def send_updates(websocket: WebSocket, subscriber):
+    while True:
+        await websocket.send_text(await subscriber.queue.get())
+
+
+async def receive_commands(websocket: WebSocket, subscriber):
+    try:
+        while True:
+            try:
+                command = await websocket.receive_json()
+                if not isinstance(command, dict):
+                    raise ValueError("Expected a JSON object")
+                subscribe = post_ids(command, "subscribe")
+                unsubscribe = post_ids(command, "unsubscribe")
+            except (ValueError, TypeError) as error:
+                await websocket.send_json({"error": f"Invalid command: {error}"})
+                continue
+
+            if len(subscriber.posts) + len(subscribe) > settings.realtime_max_subscriptions:
+                await websocket.send_json({"error": f"At most {settings.realtime_max_subscriptions} subscriptions"})
+                continue
+            hub.subscribe(subscriber, subscribe)
+            hub.unsubscribe(subscriber, unsubscribe)
+            if "feed" in command:
+                if command["feed"]:
+                    hub.subscribe(subscriber, feed=True)
+                else:
+                    hub.unsubscribe(subscriber, feed=True)
+    except WebSocketDisconnect:
+        pass
+
+
+def post_ids(command: dict, key: str):
+    ids = command.get(key, [])
+    if not isinstance(ids, list) or not all(isinstance(post_id, int) for post_id in ids):
+        raise ValueError(f"{key} expects a list of post ids")
+    return ids
@@ -1,4 +1,5 @@
 import models, schemas, utils
+from login_guard import login_guard
 from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
 from sqlalchemy.orm import Session
 from database import get_db
@@ -19,6 +20,8 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    # Failed logins from before the account existed (in this worker) don't count against it
+    login_guard.forget(new_user.email)
     return new_user
 
 @router.get("/{id}", response_model=schemas.UserOut)
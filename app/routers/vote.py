@@ -1,8 +1,12 @@
 from fastapi import FastAPI, Response, status, HTTPException, Depends, APIRouter
 from platformdirs import user_log_dir
-import models, schemas, oauth2, database
+import models, schemas, oauth2, database, queries, realtime
+from config import settings
+from vote_buffer import vote_buffer, BufferFull
+from notifications import notification_buffer
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import math
 
 router = APIRouter(
     prefix="/vote",  # For ID: /votes/{id}
@@ -10,16 +14,20 @@ router = APIRouter(
 )
 
 @router.post("/",status_code=status.HTTP_201_CREATED)
-def vote(vote: schemas.Vote, db: Session = Depends(database.get_db), current_user: int = Depends(oauth2.get_current_user)):
+def vote(vote: schemas.Vote, response: Response, db: Session = Depends(database.get_db), current_user: int = Depends(oauth2.get_current_user)):
     
     #if the post doesn't exist:
-    post = db.query(models.Post).filter(models.Post.id == vote.post_id).first()
+    post = db.execute(queries.post_exists, {"post_id": vote.post_id}).first()
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail= f"Post with id: {vote.post_id} does not exist")
     
     # to check whether the USer has voted for thr specific post or not
-    vote_query = db.query(models.Votes).filter(models.Votes.post_id == vote.post_id, models.Votes.user_id ==current_user.id)
-    found_vote = vote_query.first()
+    vote_params = {"post_id": vote.post_id, "user_id": current_user.id}
+
+    if settings.vote_write_behind:
+        return buffer_vote(vote, response, db, current_user, vote_params, post.owner_id)
+
+    found_vote = db.execute(queries.get_vote, vote_params).first()
 
 
 
@@ -28,14 +36,48 @@ def vote(vote: schemas.Vote, db: Session = Depends(database.get_db), current_use
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"User {current_user.id} has already voted on post {vote.post_id}.")
         new_vote = models.Votes(post_id = vote.post_id, user_id = current_user.id)
         db.add(new_vote)
+        votes = db.execute(queries.update_post_votes, {"post_id": vote.post_id, "delta": 1}).scalar()
+        realtime.notify_votes(db, [(vote.post_id, votes)])
         db.commit()
+        if post.owner_id != current_user.id:
+            notification_buffer.add(vote.post_id)
         return {"Message": "Successfully added vote"}
     else:
         if not found_vote:
             raise HTTPException(status_code= status.HTTP_404_NOT_FOUND, detail="Vote does not exist")
 
-        vote_query.delete(synchronize_session=False)
+        # Only count the row this request deleted: a concurrent unvote (or a write-behind
+        # flush) may have deleted it since, and counted it
+        if not db.execute(queries.delete_vote, vote_params).rowcount:
+            raise HTTPException(status_code= status.HTTP_404_NOT_FOUND, detail="Vote does not exist")
+        votes = db.execute(queries.update_post_votes, {"post_id": vote.post_id, "delta": -1}).scalar()
+        realtime.notify_votes(db, [(vote.post_id, votes)])
         db.commit()
 
         return {"Message": "Successfully deleted vote"}
-    
\ No newline at end of file
+
+
+# Write-behind: the vote is buffered and written with the next flush (see vote_buffer.py)
+def buffer_vote(vote: schemas.Vote, response: Response, db: Session, current_user, vote_params: dict, owner_id: int):
+    found_vote = vote_buffer.state(vote.post_id, current_user.id)
+    if found_vote is None:
+        found_vote = db.execute(queries.get_vote, vote_params).first() is not None
+
+    try:
+        added = vote_buffer.add(vote.post_id, current_user.id, vote.dir == 1, found_vote)
+    except BufferFull:
+        # The flushes are behind: shed the load rather than grow the buffer
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many votes pending, retry later",
+        headers={"Retry-After": str(max(1, math.ceil(settings.vote_flush_ms / 1000)))})
+    if not added:
+        if vote.dir == 1:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"User {current_user.id} has already voted on post {vote.post_id}.")
+        raise HTTPException(status_code= status.HTTP_404_NOT_FOUND, detail="Vote does not exist")
+
+    response.status_code = status.HTTP_202_ACCEPTED
+    if vote.dir == 1:
+        # Counted when accepted, the notifications are written behind too
+        if owner_id != current_user.id:
+            notification_buffer.add(vote.post_id)
+        return {"Message": "Vote accepted"}
+    return {"Message": "Vote deletion accepted"}
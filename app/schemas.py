@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, conint
 
 # API Data Model
@@ -68,6 +68,31 @@ class Vote(BaseModel):
 class PostOut(BaseModel):
     Post: Post
     votes: int
+    # Only with voted_by_me=true
+    voted_by_me: Optional[bool] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class Notification(BaseModel):
+    id: int
+    post_id: int
+    kind: str
+    count: int
+    read: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class UnreadCount(BaseModel):
+    unread: int
+
+class NotificationPage(UnreadCount):
+    notifications: List[Notification]
+
+class NotificationsRead(BaseModel):
+    # Up to this notification id, all of them if not given
+    up_to: Optional[int] = None
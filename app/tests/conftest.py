@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# The app imports its modules as siblings (import models, ...), like uvicorn run from app/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests run against "<database_name>_test" (it must exist): its tables are dropped and
+# created again for every test
+from config import settings
+settings.database_name = f"{settings.database_name}_test"
+
+import main, models, oauth2
+from database import engine
+from vote_buffer import VoteBuffer
+
+
+@pytest.fixture
+def client():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    # Not a context manager: the background tasks (flushes, job workers, ...) don't start
+    return TestClient(main.app)
+
+
+def create_user(client, email):
+    res = client.post("/users/", json={"email": email, "password": "password123"})
+    assert res.status_code == 201
+    user = res.json()
+    user["headers"] = {"Authorization": f"Bearer {oauth2.create_access_token({'user_id': user['id']})}"}
+    return user
+
+
+@pytest.fixture
+def user(client):
+    return create_user(client, "user@example.com")
+
+
+@pytest.fixture
+def other_user(client):
+    return create_user(client, "other@example.com")
+
+
+@pytest.fixture
+def posts(client, user):
+    rv = []
+    for title in ("first", "second", "third"):
+        res = client.post("/posts/", json={"title": title, "content": "content"}, headers=user["headers"])
+        assert res.status_code == 201
+        rv.append(res.json())
+    return rv
+
+
+@pytest.fixture
+def write_behind(monkeypatch):
+    """Votes go to a fresh write-behind buffer, never flushed."""
+    buffer = VoteBuffer(1000, 1000)
+    monkeypatch.setattr(settings, "vote_write_behind", True)
+    for module in ("routers.vote", "routers.posts"):
+        monkeypatch.setattr(f"{module}.vote_buffer", buffer)
+    return buffer
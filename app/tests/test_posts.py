@@ -0,0 +1,69 @@
+import models
+from database import SessionLocal
+
+
+def vote(client, user, post, dir=1):
+    return client.post("/vote/", json={"post_id": post["id"], "dir": dir}, headers=user["headers"])
+
+
+def voted_by_me(res):
+    return {post["Post"]["id"]: post["voted_by_me"] for post in res.json()}
+
+
+def test_voted_by_me_not_asked(client, user, posts):
+    assert vote(client, user, posts[0]).status_code == 201
+    res = client.get("/posts/", headers=user["headers"])
+    assert res.status_code == 200
+    assert all(post["voted_by_me"] is None for post in res.json())
+
+
+def test_voted_by_me(client, user, other_user, posts):
+    assert vote(client, user, posts[0]).status_code == 201
+    assert vote(client, other_user, posts[1]).status_code == 201
+
+    res = client.get("/posts/?voted_by_me=true", headers=user["headers"])
+    assert res.status_code == 200
+    assert voted_by_me(res) == {posts[0]["id"]: True, posts[1]["id"]: False, posts[2]["id"]: False}
+
+    res = client.get(f"/posts/{posts[0]['id']}?voted_by_me=true", headers=other_user["headers"])
+    assert res.status_code == 200
+    assert res.json()["voted_by_me"] is False
+    assert res.json()["votes"] == 1
+
+
+def test_voted_by_me_after_unvote(client, user, posts):
+    assert vote(client, user, posts[0]).status_code == 201
+    assert vote(client, user, posts[0], dir=0).status_code == 201
+    res = client.get(f"/posts/{posts[0]['id']}?voted_by_me=true", headers=user["headers"])
+    assert res.json()["voted_by_me"] is False
+    assert res.json()["votes"] == 0
+
+
+def test_buffered_votes_overlay(client, user, other_user, posts, write_behind):
+    assert vote(client, user, posts[0]).status_code == 202
+    assert vote(client, other_user, posts[0]).status_code == 202
+    with SessionLocal() as db:
+        assert db.query(models.Votes).count() == 0
+
+    # The buffered votes are counted, and voted_by_me comes from the buffer
+    res = client.get("/posts/?voted_by_me=true", headers=user["headers"])
+    votes = {post["Post"]["id"]: post["votes"] for post in res.json()}
+    assert votes == {posts[0]["id"]: 2, posts[1]["id"]: 0, posts[2]["id"]: 0}
+    assert voted_by_me(res)[posts[0]["id"]] is True
+
+    assert vote(client, user, posts[0], dir=0).status_code == 202
+    res = client.get(f"/posts/{posts[0]['id']}?voted_by_me=true", headers=user["headers"])
+    assert res.json()["votes"] == 1
+    assert res.json()["voted_by_me"] is False
+    res = client.get(f"/posts/{posts[0]['id']}?voted_by_me=true", headers=other_user["headers"])
+    assert res.json()["voted_by_me"] is True
+
+
+def test_buffered_unvote_overlay(client, user, posts, request):
+    # Voted in the table, unvoted in the buffer
+    assert vote(client, user, posts[0]).status_code == 201
+    request.getfixturevalue("write_behind")
+    assert vote(client, user, posts[0], dir=0).status_code == 202
+    res = client.get(f"/posts/{posts[0]['id']}?voted_by_me=true", headers=user["headers"])
+    assert res.json()["voted_by_me"] is False
+    assert res.json()["votes"] == 0
@@ -0,0 +1,57 @@
+import jobs
+from config import settings
+from conftest import create_user
+
+
+def home(client, user, **params):
+    res = client.get("/posts/home", params=params, headers=user["headers"])
+    assert res.status_code == 200
+    return [post["Post"]["id"] for post in res.json()]
+
+
+def post(client, user):
+    res = client.post("/posts/", json={"title": "title", "content": "content"}, headers=user["headers"])
+    assert res.status_code == 201
+    jobs.run_batch(100)
+    return res.json()["id"]
+
+
+def follow(client, user, author):
+    assert client.post(f"/follow/{author['id']}", headers=user["headers"]).status_code == 201
+    jobs.run_batch(100)
+
+
+def unfollow(client, user, author):
+    assert client.delete(f"/follow/{author['id']}", headers=user["headers"]).status_code == 204
+    jobs.run_batch(100)
+
+
+def test_fanout_threshold_crossed(client, user, other_user, monkeypatch):
+    monkeypatch.setattr(settings, "timeline_fanout_max_followers", 1)
+    third_user = create_user(client, "third@example.com")
+
+    # Fanned out on write
+    follow(client, other_user, user)
+    p1 = post(client, user)
+    assert home(client, other_user) == [p1]
+
+    # Up: 2 followers, the new posts are merged in when reading
+    follow(client, third_user, user)
+    p2 = post(client, user)
+    assert home(client, other_user) == [p2, p1]
+    assert home(client, third_user) == [p2, p1]
+
+    # Down: fanned out on write again, nothing of the fan-in period is lost
+    unfollow(client, other_user, user)
+    assert home(client, other_user) == []
+    assert home(client, third_user) == [p2, p1]
+    p3 = post(client, user)
+    assert home(client, third_user) == [p3, p2, p1]
+
+    # Up again
+    follow(client, other_user, user)
+    p4 = post(client, user)
+    assert home(client, other_user) == [p4, p3, p2, p1]
+    assert home(client, third_user) == [p4, p3, p2, p1]
+    assert home(client, third_user, before=p3) == [p2, p1]
+    assert home(client, third_user, before=0) == []
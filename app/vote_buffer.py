@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+
+from starlette.concurrency import run_in_threadpool
+
+import queries, realtime
+from config import settings
+from database import SessionLocal
+
+# Write-behind votes (per worker process, enabled with settings.vote_write_behind).
+#
+# POST /vote only records the vote here and answers 202 Accepted; a background task
+# writes the buffered votes every settings.vote_flush_ms, in one transaction:
+#   * one INSERT and one DELETE for all the votes, one UPDATE of the posts' counters,
+#     so a viral post gets its counter updated once per flush, not once per vote
+#   * votes are coalesced per (post, user): voting and unvoting again before a
+#     flush cancels out and never reaches the DB
+#
+# Read-your-writes: the vote endpoint checks the buffered state before the votes table,
+# and the posts endpoints add the buffered count changes to the counts they read
+# (see overlay()). Both only see this worker's buffer: with several workers, route a
+# user's requests to the same one (sticky sessions) or expect up to a flush interval of lag.
+#
+# Crash safety: the buffer is memory only. A clean shutdown flushes it; a killed
+# worker loses the votes accepted since the last flush. That is what the 202 tells the
+# client. Keep write-behind off where an accepted vote must never be lost.
+#
+# Requests never write: past settings.vote_buffer_max votes, the request adding one wakes
+# the flush task up early; past settings.vote_buffer_hard_max (the database can't keep up),
+# add() raises BufferFull and the vote is answered 503, to be retried.
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    pass
+
+
+class VoteBuffer:
+    def __init__(self, max_pending: int, hard_max_pending: int):
+        self.max_pending = max_pending
+        self.hard_max_pending = hard_max_pending
+
+        self._lock = threading.Lock()
+        # One flush at a time, so the batches are written in order
+        self._flush_lock = threading.Lock()
+        # (post_id, user_id) -> voted, the state once written (only kept if it differs from the table's)
+        self._pending = {}
+        # post_id -> change of its vote count once written
+        self._deltas = Counter()
+        # Same for the batch being written: still visible until it's committed
+        self._flushing = {}
+        self._flushing_deltas = Counter()
+        # Set by flush_forever(): wakes it up from the request threads (loop, asyncio.Event)
+        self._wakeup = None
+        self._woken = False
+
+    def state(self, post_id: int, user_id: int):
+        """Buffered vote state of the user on the post, None if there is none: ask the table."""
+        key = (post_id, user_id)
+        with self._lock:
+            return self._pending.get(key, self._flushing.get(key))
+
+    def add(self, post_id: int, user_id: int, voted: bool, table_voted: bool):
+        """Buffer a vote (voted=True) or an unvote, False if the vote is already in that state.
+
+        table_voted is the state in the votes table, used if nothing is buffered.
+        Raises BufferFull past hard_max_pending buffered votes.
+        """
+        key = (post_id, user_id)
+        with self._lock:
+            base = self._flushing.get(key, table_voted)
+            if self._pending.get(key, base) == voted:
+                return False
+            if key in self._pending:
+                # Back to the state the table will have: nothing to write
+                del self._pending[key]
+                self._change(post_id, voted)
+                return True
+            if len(self._pending) >= self.hard_max_pending:
+                raise BufferFull
+            self._pending[key] = voted
+            self._change(post_id, voted)
+            wake = len(self._pending) >= self.max_pending and not self._woken
+            if wake:
+                self._woken = True
+        if wake and self._wakeup is not None:
+            loop, event = self._wakeup
+            loop.call_soon_threadsafe(event.set)
+        return True
+
+    def _change(self, post_id, voted):
+        self._deltas[post_id] += 1 if voted else -1
+        if not self._deltas[post_id]:
+            del self._deltas[post_id]
+
+    def overlay(self, rows):
+        """The (Post, votes) rows with the buffered changes added to the vote counts."""
+        with self._lock:
+            if not self._deltas and not self._flushing_deltas:
+                return rows
+            deltas = Counter(self._flushing_deltas)
+            deltas.update(self._deltas)
+        return [{"Post": row.Post, "votes": row.votes + deltas[row.Post.id]} if row.Post.id in deltas else row
+                for row in rows]
+
+    def flush(self):
+        """Write the buffered votes, returns how many there were."""
+        with self._flush_lock:
+            with self._lock:
+                self._woken = False
+                if not self._pending:
+                    return 0
+                batch, deltas = self._flushing, self._flushing_deltas = self._pending, self._deltas
+                self._pending, self._deltas = {}, Counter()
+            try:
+                self._write(batch)
+            except Exception:
+                with self._lock:
+                    self._requeue(batch, deltas)
+                raise
+            finally:
+                with self._lock:
+                    self._flushing, self._flushing_deltas = {}, Counter()
+            return len(batch)
+
+    def _write(self, batch):
+        votes = [key for key, voted in batch.items() if voted]
+        unvotes = [key for key, voted in batch.items() if not voted]
+        with SessionLocal() as db:
+            # Lock the posts in id order first, so concurrent flushes (other workers) can't deadlock
+            db.execute(queries.lock_posts, {"ids": sorted({post_id for post_id, _ in batch})})
+            # Count what really changed: the posts or users may have been deleted meanwhile
+            changes = Counter()
+            if votes:
+                post_ids, user_ids = zip(*votes)
+                changes.update(db.execute(
+                    queries.insert_votes, {"post_ids": list(post_ids), "user_ids": list(user_ids)}).scalars())
+            if unvotes:
+                post_ids, user_ids = zip(*unvotes)
+                changes.subtract(db.execute(
+                    queries.delete_votes, {"post_ids": list(post_ids), "user_ids": list(user_ids)}).scalars())
+            changes = {post_id: delta for post_id, delta in changes.items() if delta}
+            if changes:
+                counts = db.execute(queries.update_posts_votes,
+                                    {"post_ids": list(changes), "deltas": list(changes.values())}).all()
+                realtime.notify_votes(db, counts)
+            db.commit()
+
+    def _requeue(self, batch, deltas):
+        # A failed batch goes back in front of the votes buffered since
+        for key, voted in batch.items():
+            if key in self._pending:
+                # Toggled again since: back to the table's state
+                del self._pending[key]
+            else:
+                self._pending[key] = voted
+        for post_id, delta in deltas.items():
+            self._deltas[post_id] += delta
+            if not self._deltas[post_id]:
+                del self._deltas[post_id]
+
+
+vote_buffer = VoteBuffer(settings.vote_buffer_max, settings.vote_buffer_hard_max)
+
+
+async def flush_forever(interval: float):
+    wakeup = asyncio.Event()
+    vote_buffer._wakeup = (asyncio.get_running_loop(), wakeup)
+    while True:
+        try:
+            # Every interval, or as soon as the buffer is full
+            await asyncio.wait_for(wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+        try:
+            await run_in_threadpool(vote_buffer.flush)
+        except Exception:
+            logger.exception("Vote buffer flush failed, retrying with the next one")
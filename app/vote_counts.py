@@ -0,0 +1,41 @@
+import asyncio
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+import queries
+from database import SessionLocal
+
+# posts.votes_count (and the trending score built on it) is kept by the vote endpoint, in the
+# vote transaction. Votes going away any other way, e.g. with the cascade deleting a user,
+# leave it off: repair() recounts those posts from the votes table. It runs in the background
+# every settings.vote_counts_repair_seconds; GET /posts?fresh=true counts the votes table instead.
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def repair():
+    with SessionLocal() as db:
+        ids = db.execute(queries.drifted_vote_counts).scalars().all()
+        for i in range(0, len(ids), BATCH_SIZE):
+            batch = {"ids": ids[i:i + BATCH_SIZE]}
+            # Lock the posts before counting: the votes committed by then are all in the count,
+            # the vote endpoint adds the ones committed later to it
+            db.execute(queries.lock_posts, batch)
+            db.execute(queries.recount_post_votes, batch)
+            db.commit()
+    return len(ids)
+
+
+async def repair_forever(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            repaired = await run_in_threadpool(repair)
+        except Exception:
+            logger.exception("Vote counts repair failed")
+        else:
+            if repaired:
+                logger.warning("Repaired the vote count of %d posts", repaired)